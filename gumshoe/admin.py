@@ -1,9 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
-from django.contrib.contenttypes.admin import GenericTabularInline
+from django.db import router
 
 from django import forms
-from gumshoe.models import Component, Issue, IssueType, Milestone, Priority, Project, Version, Comment
+from gumshoe.models import Component, Issue, IssueType, Milestone, Priority, Project, Version, Comment, batched_issue_touches
 
 
 class IssueAdminForm (forms.ModelForm):
@@ -15,8 +15,10 @@ class IssueAdminForm (forms.ModelForm):
     assignee = forms.ModelChoiceField(queryset=User.objects.all(), empty_label="Auto Assign", required=False)
 
 
-class CommentInline(GenericTabularInline):
+class CommentInline(admin.TabularInline):
     model = Comment
+    fk_name = "issue"
+    exclude = ("content_type", "object_id")
     extra = 0
 
 
@@ -37,6 +39,12 @@ class IssueModelAdmin (admin.ModelAdmin):
 
     inlines = (CommentInline,)
 
+    def changeform_view(self, request, *args, **kwds):
+        # The form sets each many to many field in turn; bump the issue's
+        # last_updated once for all of them.
+        with batched_issue_touches(using=router.db_for_write(self.model)):
+            return super(IssueModelAdmin, self).changeform_view(request, *args, **kwds)
+
     def save_model(self, request, obj, form, change):
         obj.reporter = obj.reporter or request.user
         obj.assignee = obj.reporter or request.user
@@ -0,0 +1,90 @@
+import concurrent.futures
+import functools
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_db_executors = {}
+_db_executors_lock = threading.Lock()
+
+
+def async_db_threads():
+    return getattr(settings, "GUMSHOE_ASYNC_DB_THREADS", 8)
+
+
+def db_executor():
+    """
+    Returns the pool the async views run their queries on, sized by the
+    ``GUMSHOE_ASYNC_DB_THREADS`` setting, which also bounds the database
+    connections they hold.  With 0 there is no pool and the queries share the
+    one thread Django runs sync code on.
+    """
+    threads = async_db_threads()
+    if not threads:
+        return None
+    executor = _db_executors.get(threads)
+    if executor is None:
+        with _db_executors_lock:
+            executor = _db_executors.get(threads)
+            if executor is None:
+                executor = _db_executors[threads] = concurrent.futures.ThreadPoolExecutor(
+                    threads, thread_name_prefix="gumshoe-db")
+    return executor
+
+
+def _with_connections(func):
+    @functools.wraps(func)
+    def call(*args, **kwds):
+        # The pool's threads never see request_started or request_finished,
+        # which expire the connections of a request's thread.
+        close_old_connections()
+        try:
+            return func(*args, **kwds)
+        finally:
+            close_old_connections()
+    return call
+
+
+async def run_in_db_pool(func, *args, **kwds):
+    """
+    Calls the sync ``func``, e.g. a view or queryset evaluation, on the
+    database pool and returns its result without blocking the event loop.
+    """
+    executor = db_executor()
+    if executor is None:
+        return await sync_to_async(func)(*args, **kwds)
+    return await sync_to_async(_with_connections(func), thread_sensitive=False, executor=executor)(*args, **kwds)
+
+
+def async_read_view(view):
+    """
+    Returns an async version of the sync ``view``.  Reads are dispatched and
+    rendered on the database pool, so any number of them can wait on queries
+    at once; writes, with their transactions, are run like any sync view.
+
+    Django 4.2's async ORM runs each query on the one thread shared by all sync
+    code, so querying through it would queue every request's queries behind
+    each other.
+    """
+    def read(request, *args, **kwds):
+        response = view(request, *args, **kwds)
+        # Left to the handler, rendering would also happen on the shared thread.
+        if callable(getattr(response, "render", None)):
+            response.render()
+        return response
+
+    write = sync_to_async(view)
+
+    async def async_view(request, *args, **kwds):
+        if request.method in READ_METHODS:
+            return await run_in_db_pool(read, request, *args, **kwds)
+        return await write(request, *args, **kwds)
+
+    # The wrapped view, e.g. one of REST framework's, does its own CSRF checks.
+    async_view.csrf_exempt = getattr(view, "csrf_exempt", False)
+    async_view.wrapped_view = view
+    return async_view
@@ -0,0 +1,186 @@
+import datetime
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils.timezone import utc
+
+from gumshoe import events
+from gumshoe.listcache import invalidate_issue_lists
+from gumshoe.models import Component, Issue, Milestone, Project, Version
+from gumshoe.search import get_search_backend
+
+ISSUE_RELATION_FIELDS = {
+    "components": Component,
+    "affects_versions": Version,
+    "fix_versions": Version,
+}
+
+ISSUE_UPDATE_FIELDS = (
+    "summary", "description", "steps_to_reproduce", "project", "issue_type", "priority", "milestone", "status",
+    "resolution", "assignee", "last_updated",
+)
+
+
+class BulkItemError(Exception):
+    def __init__(self, errors):
+        super(BulkItemError, self).__init__(errors)
+        self.errors = errors
+
+
+class IssueBulkWriter(object):
+    """
+    Writes many issues with a fixed number of queries.
+
+    Related rows are loaded up front in one query per model, issues are
+    written with ``bulk_create``/``bulk_update`` and the many to many fields
+    with batched inserts into their through tables.
+
+    :param user: The user creating the issues, used as the reporter.
+    :param batch_size: Maximum number of rows per insert.
+    :param using: Database connection to use.
+    """
+    def __init__(self, user=None, batch_size=500, using="default"):
+        self.user = user
+        self.batch_size = batch_size
+        self.using = using
+
+    def write(self, items):
+        """
+        :param items: A list of (issue, validated data) pairs, where issue is
+                      None for issues to be created.
+
+        :return: Returns a list with, for each item, either the saved issue or
+                 a BulkItemError.
+        """
+        projects = self.in_bulk(Project, [attrs.get("project") for _, attrs in items])
+        milestones = self.in_bulk(Milestone, [attrs.get("milestone_id") for _, attrs in items])
+        users = self.in_bulk(User, [attrs.get("assignee_id") for _, attrs in items])
+        related = {
+            field: self.in_bulk(model, [pk for _, attrs in items for pk in attrs.get(field) or []])
+            for field, model in ISSUE_RELATION_FIELDS.items()
+        }
+
+        timestamp = datetime.datetime.utcnow().replace(tzinfo=utc)
+        results = []
+        created = []
+        updated = []
+        relations = []
+        for issue, attrs in items:
+            try:
+                issue = self.restore_issue(attrs, issue, projects, milestones, users)
+            except BulkItemError as e:
+                results.append(e)
+                continue
+
+            if issue.pk is None:
+                issue.reporter = self.user
+                issue.assignee = issue.assignee or issue.reporter
+                issue.reported = timestamp
+                created.append(issue)
+            else:
+                updated.append(issue)
+            issue.last_updated = timestamp
+
+            issue_relations = {}
+            for field in ISSUE_RELATION_FIELDS:
+                if field in attrs or issue.pk is None:
+                    issue_relations[field] = [
+                        related[field][pk] for pk in attrs.get(field) or []
+                        if pk in related[field] and related[field][pk].project_id == issue.project_id
+                    ]
+            relations.append((issue, issue_relations))
+            results.append(issue)
+
+        with transaction.atomic(using=self.using):
+            self.create_issues(created)
+            if updated:
+                Issue.objects.using(self.using).bulk_update(updated, ISSUE_UPDATE_FIELDS, batch_size=self.batch_size)
+            self.set_relations(relations)
+            get_search_backend(self.using).index_issues(created + updated)
+            invalidate_issue_lists(
+                {issue.project_id for issue in created + updated} |
+                {getattr(issue, "_loaded_project_id", None) for issue in updated},
+                using=self.using)
+            events.publish_events(
+                [events.issue_event(events.SAVED, issue.pk, issue.issue_key) for issue in created + updated],
+                using=self.using)
+
+        return results
+
+    def in_bulk(self, model, pks):
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return {}
+        return model.objects.using(self.using).in_bulk(pks)
+
+    def restore_issue(self, attrs, issue, projects, milestones, users):
+        issue = issue or Issue()
+        errors = {}
+
+        project = projects.get(attrs.get("project"))
+        if project is None:
+            errors["project"] = ["Invalid project."]
+
+        milestone_id = attrs.get("milestone_id")
+        milestone = milestones.get(milestone_id) if milestone_id else None
+        if milestone_id and milestone is None:
+            errors["milestone_id"] = ["Invalid milestone."]
+
+        assignee_id = attrs.get("assignee_id")
+        if assignee_id and assignee_id not in users:
+            errors["assignee_id"] = ["Invalid user."]
+
+        if errors:
+            raise BulkItemError(errors)
+
+        issue.summary = attrs.get("summary") or issue.summary
+        issue.description = attrs.get("description") or issue.description
+        issue.steps_to_reproduce = attrs.get("steps_to_reproduce") or issue.steps_to_reproduce
+        issue.project = project
+        issue.issue_type = attrs.get("issue_type")
+        issue.priority = attrs.get("priority")
+        issue.milestone = milestone
+        issue.status = attrs.get("status") or issue.status
+        issue.resolution = attrs.get("resolution") or issue.resolution
+        if assignee_id:
+            issue.assignee = users[assignee_id]
+        return issue
+
+    def create_issues(self, issues):
+        by_project = defaultdict(list)
+        for issue in issues:
+            if not issue.issue_key:
+                by_project[issue.project_id].append(issue)
+        # Reserve keys in project order so concurrent writers take the
+        # project row locks in the same order.
+        for _, project_issues in sorted(by_project.items()):
+            keys = project_issues[0].project.next_issue_keys(len(project_issues))
+            for issue, key in zip(project_issues, keys):
+                issue.issue_key = key
+
+        Issue.objects.using(self.using).bulk_create(issues, batch_size=self.batch_size)
+
+        # Not every backend returns the primary keys of bulk inserted rows.
+        missing = {issue.issue_key: issue for issue in issues if issue.pk is None}
+        keys = list(missing)
+        for start in range(0, len(keys), self.batch_size):
+            rows = Issue.objects.using(self.using).filter(issue_key__in=keys[start:start + self.batch_size])
+            for pk, issue_key in rows.values_list("pk", "issue_key"):
+                missing[issue_key].pk = pk
+
+    def set_relations(self, relations):
+        for field in ISSUE_RELATION_FIELDS:
+            through = getattr(Issue, field).through
+            target_column = getattr(Issue, field).field.m2m_reverse_field_name() + "_id"
+
+            replaced = [issue.pk for issue, issue_relations in relations if field in issue_relations and issue.pk is not None]
+            for start in range(0, len(replaced), self.batch_size):
+                through.objects.using(self.using).filter(issue_id__in=replaced[start:start + self.batch_size]).delete()
+
+            rows = [
+                through(issue_id=issue.pk, **{target_column: related.pk})
+                for issue, issue_relations in relations
+                for related in issue_relations.get(field, [])
+            ]
+            through.objects.using(self.using).bulk_create(rows, batch_size=self.batch_size)
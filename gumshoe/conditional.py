@@ -0,0 +1,44 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def weak_etag(*parts):
+    """
+    Returns a weak ETag for the given version parts, e.g. a timestamp, a row
+    count and the request's query parameters.
+    """
+    return 'W/"{0}"'.format(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def request_variant(request):
+    """
+    The parts of a GET request that change its response body: the path, the
+    query parameters and the negotiated media type.
+    """
+    return request.path, sorted(request.GET.lists()), getattr(request, "accepted_media_type", None)
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Returns a 304 response if the client's copy, identified by ``If-None-Match``
+    or ``If-Modified-Since``, is still current, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Adds the ETag and Last-Modified headers, and asks browsers to revalidate
+    their copy before every use.
+    """
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,96 @@
+import json
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONBackend(object):
+    """
+    Encodes and decodes the REST API's JSON with the standard library.
+
+    Accelerated backends only handle the common case: compact, UTF-8 output.
+    The renderer and parser use the standard library for everything else,
+    and whenever a backend raises, so errors and edge cases come out the same
+    whichever backend is selected.  The one known difference is NaN and
+    infinity, which orjson writes as null rather than rejecting.
+    """
+    name = "json"
+    accelerated = False
+
+    def __init__(self):
+        self.default = encoders.JSONEncoder().default
+
+    def dumps(self, data):
+        """
+        Returns ``data`` as compact, UTF-8 encoded JSON, like the REST
+        framework renderer with its default settings.
+        """
+        return json.dumps(data, default=self.default, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode()
+
+    def loads(self, content):
+        return json.loads(content)
+
+
+class OrjsonBackend(JSONBackend):
+    name = "orjson"
+    accelerated = True
+
+    def __init__(self):
+        super(OrjsonBackend, self).__init__()
+        # Dates are handed to the DRF encoder, which writes UTC as "Z".
+        self.options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=self.default, option=self.options)
+
+    def loads(self, content):
+        return orjson.loads(content)
+
+
+class UjsonBackend(JSONBackend):
+    name = "ujson"
+    accelerated = True
+
+    def dumps(self, data):
+        return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False, default=self.default).encode()
+
+    def loads(self, content):
+        return ujson.loads(content)
+
+
+default_json_backends = (
+    ("orjson", OrjsonBackend),
+    ("ujson", UjsonBackend),
+)
+
+_json_backends = {}
+
+
+def get_json_backend():
+    """
+    Returns the backend named by the ``GUMSHOE_JSON_BACKEND`` setting, or
+    else the first accelerated library that can be imported.
+    """
+    backend_path = getattr(settings, "GUMSHOE_JSON_BACKEND", None)
+    backend = _json_backends.get(backend_path)
+    if backend is None:
+        if backend_path:
+            backend_class = import_string(backend_path)
+        else:
+            available = {"orjson": orjson, "ujson": ujson}
+            backend_class = next(
+                (cls for name, cls in default_json_backends if available[name] is not None), JSONBackend)
+        backend = _json_backends[backend_path] = backend_class()
+    return backend
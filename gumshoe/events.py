@@ -0,0 +1,289 @@
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+ISSUE = "issue"
+COMMENT = "comment"
+
+SAVED = "save"
+DELETED = "delete"
+
+# Queued in place of the events a subscriber is too slow to take; its stream
+# ends so the client reconnects and catches up with the changes endpoint.
+OVERFLOW = object()
+
+
+def event_queue_size():
+    return getattr(settings, "GUMSHOE_EVENT_QUEUE_SIZE", 1000)
+
+
+def event_keepalive():
+    return getattr(settings, "GUMSHOE_EVENT_KEEPALIVE", 15)
+
+
+class Subscription(object):
+    """
+    The events queued for one stream.  Only touched from the event loop it was
+    created on: the broker hands events over with ``call_soon_threadsafe``.
+    """
+    def __init__(self, broker, loop, max_queued):
+        self.broker = broker
+        self.loop = loop
+        self.max_queued = max_queued
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_queued:
+            self.overflowed = True
+            event = OVERFLOW
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker(object):
+    """
+    Fans the events published in this process, or received by the backend
+    from other processes, out to every open stream.
+    """
+    def __init__(self):
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, max_queued=None):
+        """
+        Subscribes the running event loop to every event from now on.
+        """
+        subscription = Subscription(
+            self, asyncio.get_running_loop(), event_queue_size() if max_queued is None else max_queued)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def dispatch(self, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The loop has closed without the stream closing its subscription.
+                self.unsubscribe(subscription)
+
+
+broker = EventBroker()
+
+
+class LocalEventBackend(object):
+    """
+    Delivers events to the streams of the process that published them only.
+    Enough for a single ASGI process; anything else needs a shared backend.
+    """
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, event):
+        self.broker.dispatch(event)
+
+    def start(self):
+        """
+        Called before a stream subscribes, to start receiving events from
+        other processes.
+        """
+
+
+class RedisEventBackend(LocalEventBackend):
+    """
+    Publishes events on a Redis channel.  Processes serving streams listen on
+    the channel from a background thread and dispatch what they receive,
+    including their own events, to their broker.
+
+    :param client: A ``redis.Redis`` or anything with its ``publish`` and
+                   ``pubsub`` methods.  Defaults to a client for the
+                   ``GUMSHOE_EVENT_REDIS_URL`` setting.
+    """
+    channel = "gumshoe:events"
+    reconnect_delay = 1
+
+    def __init__(self, broker, client=None):
+        super(RedisEventBackend, self).__init__(broker)
+        if client is None:
+            if redis is None:
+                raise ImproperlyConfigured("RedisEventBackend requires the redis package.")
+            client = redis.Redis.from_url(getattr(settings, "GUMSHOE_EVENT_REDIS_URL", "redis://localhost:6379/0"))
+        self.client = client
+        self.listener = None
+        self.lock = threading.Lock()
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def start(self):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name="gumshoe-events", daemon=True)
+                self.listener.start()
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.broker.dispatch(json.loads(message["data"]))
+            except Exception:
+                logger.exception("Lost the event channel, reconnecting")
+            time.sleep(self.reconnect_delay)
+
+
+_event_backends = {}
+
+
+def get_event_backend():
+    """
+    Returns the backend named by the ``GUMSHOE_EVENT_BACKEND`` setting, by
+    default LocalEventBackend, bound to the process' broker.
+    """
+    backend_path = getattr(settings, "GUMSHOE_EVENT_BACKEND", "gumshoe.events.LocalEventBackend")
+    backend = _event_backends.get(backend_path)
+    if backend is None:
+        backend = _event_backends[backend_path] = import_string(backend_path)(broker)
+    return backend
+
+
+class EventBatch(object):
+    """
+    The events of one transaction.  Each ``publish_events`` call has its own
+    commit callback, so Django drops those registered in a savepoint that
+    rolls back; the batch only keeps the callbacks of one commit from
+    publishing the same change twice, e.g. an issue saved and then touched by
+    its relation changes.
+    """
+    def __init__(self):
+        self.published = set()
+        self.committed = False
+
+    def publish(self, events):
+        self.committed = True
+        backend = get_event_backend()
+        for event in events:
+            key = (event["model"], event["action"], event["id"])
+            if key in self.published:
+                continue
+            self.published.add(key)
+            try:
+                backend.publish(event)
+            except Exception:
+                # Streams are only a hint to refetch; the write has committed.
+                logger.exception("Could not publish %r", event)
+
+
+_event_batches = threading.local()
+
+
+def publish_events(events, using="default"):
+    """
+    Publishes the events once the transaction commits, so clients never
+    refetch before the change is visible.
+    """
+    events = list(events)
+    if not events:
+        return
+    using = using or "default"
+    # Callbacks run in order, so once one of the batch's has run, its
+    # transaction is over and later events belong to the next one.  A
+    # batch whose transaction rolled back published nothing and is reused.
+    batch = getattr(_event_batches, using, None)
+    if batch is None or batch.committed:
+        batch = EventBatch()
+        setattr(_event_batches, using, batch)
+    transaction.on_commit(functools.partial(batch.publish, events), using=using)
+
+
+def issue_event(action, pk, issue_key=None):
+    return {"model": ISSUE, "action": action, "id": pk, "issueId": pk, "issueKey": issue_key}
+
+
+def comment_event(action, pk, issue_id):
+    return {"model": COMMENT, "action": action, "id": pk, "issueId": issue_id}
+
+
+def format_event(event):
+    return "event: {0}\ndata: {1}\n\n".format(event["model"], json.dumps(event, separators=(",", ":")))
+
+
+async def event_stream(broker, issue_ids=None, keepalive=None, max_queued=None):
+    """
+    Subscribes to the broker and yields its events as ``text/event-stream``
+    messages, with a comment every ``keepalive`` seconds of quiet so proxies
+    keep the connection open and a closed one is noticed.
+
+    The subscription is only made once the stream is iterated, and closed
+    with it, so a request cancelled before its body starts leaves nothing
+    behind.  Events are delivered from the first message on.
+
+    :param issue_ids: Only yield the events of these issues.
+    """
+    keepalive = event_keepalive() if keepalive is None else keepalive
+    subscription = broker.subscribe(max_queued=max_queued)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is OVERFLOW:
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            if issue_ids is None or event["issueId"] in issue_ids:
+                yield format_event(event)
+    finally:
+        subscription.close()
+
+
+#####################################
+#  Signal handlers
+#####################################
+
+def publish_issue(sender, instance, raw=False, using="default", **kwds):
+    if raw:
+        return
+    # Only post_save sends ``created``.
+    action = SAVED if "created" in kwds else DELETED
+    publish_events([issue_event(action, instance.pk, instance.issue_key)], using=using)
+
+
+def publish_comment(sender, instance, raw=False, using="default", **kwds):
+    if raw:
+        return
+    action = SAVED if "created" in kwds else DELETED
+    publish_events([comment_event(action, instance.pk, instance.issue_id)], using=using)
@@ -0,0 +1,48 @@
+import csv
+
+from gumshoe.renderers import CaseConvertingJSONRenderer, snake_case_to_camel_case
+
+
+class Echo(object):
+    """
+    File-like object that hands each line written by ``csv.writer`` straight
+    back, so rows can be streamed instead of buffered.
+    """
+    def write(self, value):
+        return value
+
+
+def export_ndjson(rows):
+    renderer = CaseConvertingJSONRenderer()
+    for row in rows:
+        yield renderer.render(row) + b"\n"
+
+
+ISSUE_EXPORT_COLUMNS = (
+    "id", "issue_key", "summary", "project", "issue_type", "priority", "status", "resolution", "assignee",
+    "reporter", "reported", "last_updated", "milestone", "components", "affects_versions", "fix_versions",
+)
+
+# The serializers emit camelCase keys, the CSV header keeps the field names.
+ISSUE_EXPORT_KEYS = tuple(snake_case_to_camel_case(column) for column in ISSUE_EXPORT_COLUMNS)
+
+
+def export_csv_value(value):
+    if isinstance(value, dict):
+        return value.get("username") or value.get("name") or value.get("id")
+    if isinstance(value, list):
+        return ";".join(str(v) for v in value)
+    return value
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(ISSUE_EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow([export_csv_value(row.get(key)) for key in ISSUE_EXPORT_KEYS])
+
+
+ISSUE_EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", export_ndjson),
+    "csv": ("text/csv", export_csv),
+}
@@ -4,10 +4,14 @@ import time
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
 
-from gumshoe.models import IssueType, Priority
+from gumshoe import lookups
 
 
 class PkListField(serializers.Field):
+    default_error_messages = {
+        "invalid": "Expected a list of ids.",
+    }
+
     def to_representation(self, obj):
         if hasattr(obj, "all"):
             return [o.pk for o in obj.all()]
@@ -23,6 +27,10 @@ class PkListField(serializers.Field):
 
 
 class PkField(serializers.Field):
+    default_error_messages = {
+        "invalid": "Expected an id.",
+    }
+
     def to_representation(self, obj):
         if obj is not None:
             return obj.pk
@@ -36,6 +44,28 @@ class PkField(serializers.Field):
 
 
 class ShortNameField(serializers.Field):
+    """
+    Represents a foreign key to a lookup table by its short name.  Both
+    directions are resolved from the cached table, so neither costs a query.
+    """
+    lookup_table = None
+
+    default_error_messages = {
+        "invalid": "Unknown short name.",
+    }
+
+    # The related row comes from the lookup table, so there is no point
+    # joining it in.
+    eager_load = False
+
+    def get_attribute(self, instance):
+        pk = getattr(instance, self.source_attrs[-1] + "_id", None)
+        if pk is not None:
+            value = self.lookup_table.get("pk", pk)
+            if value is not None:
+                return value
+        return super(ShortNameField, self).get_attribute(instance)
+
     def to_representation(self, value):
         return value.short_name
 
@@ -43,18 +73,18 @@ class ShortNameField(serializers.Field):
         if not isinstance(data, str):
             raise ValidationError(self.error_messages["invalid"])
 
-        try:
-            return self.model.objects.get(short_name=data)
-        except self.model.DoesNotExist:
+        value = self.lookup_table.get("short_name", data)
+        if value is None:
             raise ValidationError(self.error_messages["invalid"])
+        return value
 
 
 class IssueTypeField(ShortNameField):
-    model = IssueType
+    lookup_table = lookups.issue_types
 
 
 class PriorityField(ShortNameField):
-    model = Priority
+    lookup_table = lookups.priorities
 
 
 class UnixtimeField(serializers.DateTimeField):
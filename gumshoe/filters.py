@@ -0,0 +1,227 @@
+import abc
+import collections
+import functools
+import hashlib
+import operator
+
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+
+from gumshoe.models import Issue
+from gumshoe.search import get_search_backend
+
+# Compiled querysets are kept per filter spec, search backend and database.
+COMPILED_FILTER_CACHE_SIZE = 256
+
+# The orderings the issue list accepts, each mapped to the ORDER BY it
+# compiles to.  Every field is indexed, except priority, which is ordered by
+# the weight of the tiny lookup table it joins, and resolution: the issue list
+# sorts by both, and neither has enough values for an index to pay off.
+ISSUE_ORDERINGS = {
+    "id": "id",
+    "pk": "id",
+    "issue_key": "issue_key",
+    "last_updated": "last_updated",
+    "status": "status",
+    "priority": "priority",
+    "resolution": "resolution",
+}
+
+
+def related_pks_filter(field, pks):
+    """
+    Returns a Q matching the issues related through ``field`` to any of
+    ``pks``, where -1 stands for none, e.g. no fix version or no assignee.
+
+    Many to many fields are tested with ``EXISTS`` on the through table, which
+    its (issue, related) unique index answers, rather than with joins that
+    return an issue once per matching row.
+    """
+    pks = set(pks)
+    match_none = -1 in pks
+    pks.discard(-1)
+
+    model_field = Issue._meta.get_field(field)
+    conditions = []
+    if model_field.many_to_many:
+        related = model_field.remote_field.through.objects.filter(**{model_field.m2m_field_name(): OuterRef("pk")})
+        if pks:
+            conditions.append(Q(Exists(related.filter(**{model_field.m2m_reverse_field_name() + "__in": pks}))))
+        if match_none:
+            conditions.append(~Q(Exists(related)))
+    else:
+        if pks:
+            conditions.append(Q(**{field + "__in": pks}))
+        if match_none:
+            conditions.append(Q(**{field + "__isnull": True}))
+    return functools.reduce(operator.or_, conditions)
+
+
+class IssueFilter(abc.ABC):
+    """
+    One issue list parameter: ``parse`` turns its value into a canonical,
+    hashable form, or raises ValidationError, and ``compile`` turns that form
+    into a Q.
+    """
+    @abc.abstractmethod
+    def parse(self, value):
+        pass
+
+    @abc.abstractmethod
+    def compile(self, value, search_backend):
+        pass
+
+
+class ValueSetFilter(IssueFilter):
+    """
+    A comma separated set of values for ``lookup``, optionally limited to
+    ``choices``.
+    """
+    def __init__(self, lookup, choices=None):
+        self.lookup = lookup
+        self.choices = choices
+
+    def parse(self, value):
+        values = {v for v in value.split(",") if v}
+        if self.choices is not None:
+            invalid = values - set(self.choices)
+            if invalid:
+                raise ValidationError(["Expected any of {0}.".format(", ".join(self.choices))])
+        return tuple(sorted(values))
+
+    def compile(self, value, search_backend):
+        return Q(**{self.lookup + "__in": value})
+
+
+class RelatedPkSetFilter(IssueFilter):
+    """
+    A comma separated set of primary keys of the related ``field``, where -1
+    matches issues without one.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def parse(self, value):
+        try:
+            return tuple(sorted({int(pk) for pk in value.split(",") if pk}))
+        except ValueError:
+            raise ValidationError(["Expected a comma separated list of ids."])
+
+    def compile(self, value, search_backend):
+        return related_pks_filter(self.field, value)
+
+
+class SearchTermsFilter(IssueFilter):
+    def parse(self, value):
+        return " ".join(value.split())
+
+    def compile(self, value, search_backend):
+        return search_backend.search_filter(value) | Q(issue_key=value)
+
+
+ISSUE_FILTERS = {
+    "projects": ValueSetFilter("project__issue_key"),
+    "statuses": ValueSetFilter("status", choices=[status for status, _ in Issue.STATUS_CHOICES]),
+    "fix_versions": RelatedPkSetFilter("fix_versions"),
+    "affects_versions": RelatedPkSetFilter("affects_versions"),
+    "assignees": RelatedPkSetFilter("assignee"),
+    "milestones": RelatedPkSetFilter("milestone"),
+    "terms": SearchTermsFilter(),
+}
+
+
+class IssueFilterSpec(collections.namedtuple("IssueFilterSpec", ["filters", "order_by"])):
+    """
+    The canonical form of the issue list parameters: ``filters`` is a tuple
+    of (parameter, value) pairs sorted by parameter, each value sorted, and
+    ``order_by`` a tuple of the allowed columns.  Requests asking for the same issues get
+    equal specs, whatever the order or duplication of their parameters.
+    """
+    __slots__ = ()
+
+    def get(self, name, default=None):
+        for filter_name, value in self.filters:
+            if filter_name == name:
+                return value
+        return default
+
+    @property
+    def cache_key(self):
+        return hashlib.sha1(repr(tuple(self)).encode()).hexdigest()
+
+
+def parse_order_by(value):
+    fields = []
+    columns = set()
+    for field in value.split(","):
+        descending = field.startswith("-")
+        column = ISSUE_ORDERINGS.get(field[1:] if descending else field)
+        if column is None:
+            raise ValidationError(["Expected any of {0}, optionally prefixed with -.".format(", ".join(ISSUE_ORDERINGS))])
+        # Only the first ordering on a column has any effect.
+        if column not in columns:
+            columns.add(column)
+            fields.append(("-" if descending else "") + column)
+    return tuple(fields)
+
+
+def parse_issue_filters(params):
+    """
+    Validates the issue list parameters in ``params``, e.g. ``request.GET``,
+    and returns their IssueFilterSpec.  Parameters that aren't filters are
+    ignored.
+
+    :raises ValidationError: With the errors of every invalid parameter.
+    """
+    filters = []
+    errors = {}
+    for name, issue_filter in sorted(ISSUE_FILTERS.items()):
+        value = params.get(name)
+        if not value:
+            continue
+        try:
+            value = issue_filter.parse(value)
+        except ValidationError as e:
+            errors[name] = e.detail
+            continue
+        if value:
+            filters.append((name, value))
+
+    order_by = ()
+    if params.get("order_by"):
+        try:
+            order_by = parse_order_by(params["order_by"])
+        except ValidationError as e:
+            errors["order_by"] = e.detail
+
+    if errors:
+        raise ValidationError(errors)
+    return IssueFilterSpec(tuple(filters), order_by)
+
+
+@functools.lru_cache(maxsize=COMPILED_FILTER_CACHE_SIZE)
+def _compile_issue_filters(spec, search_backend_class, using):
+    search_backend = search_backend_class(connections[using or "default"])
+
+    query = Q()
+    for name, value in spec.filters:
+        query &= ISSUE_FILTERS[name].compile(value, search_backend)
+
+    qs = Issue.objects.using(using).filter(query)
+
+    terms = spec.get("terms")
+    if spec.order_by:
+        qs = qs.order_by(*spec.order_by)
+    elif terms:
+        qs = qs.annotate(search_rank=search_backend.search_rank(terms)).order_by("-search_rank", "pk")
+    return qs
+
+
+def filter_issues(spec, using=None):
+    """
+    Returns the issues matching ``spec``.  The compiled queryset is memoized
+    per spec and only ever cloned, so a repeated filter skips building its
+    WHERE clause.
+    """
+    return _compile_issue_filters(spec, type(get_search_backend(using or "default")), using).all()
@@ -0,0 +1,136 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from gumshoe import lookups
+
+ISSUE_LIST_CACHE_PREFIX = "gumshoe:issuelist"
+
+# Lists not narrowed to some projects depend on every issue; "all" covers the
+# rows shared by every list, e.g. milestone and user names.
+ALL_LISTS = "all"
+UNSCOPED_LISTS = "unscoped"
+
+
+def issue_list_cache_timeout():
+    return getattr(settings, "GUMSHOE_ISSUE_LIST_CACHE_TIMEOUT", 60)
+
+
+def project_generation(project_id):
+    return "project:{0}".format(project_id)
+
+
+def generation_key(generation):
+    return "{0}:generation:{1}".format(ISSUE_LIST_CACHE_PREFIX, generation)
+
+
+def current_generations(generations):
+    """
+    Returns the current token of each generation, creating the missing ones.
+    """
+    keys = [generation_key(generation) for generation in generations]
+    tokens = cache.get_many(keys)
+    missing = [key for key in keys if key not in tokens]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        tokens.update(cache.get_many(missing))
+    return [tokens.get(key) for key in keys]
+
+
+def _bump_generations(generations):
+    # Random tokens rather than counters, as in the lookup tables, so an
+    # evicted generation can never come back pointing at old lists.
+    cache.set_many({generation_key(generation): uuid.uuid4().hex for generation in generations}, None)
+
+
+def bump_generations(generations, using="default"):
+    generations = set(generations)
+    _bump_generations(generations)
+    # A list read before the transaction commits is cached under the new
+    # tokens, so bump them once more when it does.
+    transaction.on_commit(lambda: _bump_generations(generations), using=using)
+
+
+def invalidate_issue_lists(project_ids=(), using="default"):
+    """
+    Invalidates the cached lists that can contain issues of the given
+    projects.  Anything writing issues without sending ``post_save``, e.g.
+    ``QuerySet.update`` or ``bulk_create``, has to call this itself.
+    """
+    generations = [project_generation(pk) for pk in project_ids if pk is not None]
+    bump_generations([UNSCOPED_LISTS] + generations, using=using)
+
+
+def invalidate_all_issue_lists(using="default"):
+    bump_generations([ALL_LISTS], using=using)
+
+
+def issue_list_cache_key(request, spec):
+    """
+    Returns the cache key for the issue list the request asks for, or None
+    if the list cache is disabled.
+
+    :param spec: The request's IssueFilterSpec.
+
+    Every signed in user can see every issue, so the projects filter is the
+    only scope: the key includes the generation of each listed project, or
+    the generation of the unscoped lists if there is no projects filter.  The
+    filter spec, the remaining parameters, e.g. the page, the host and the
+    media type only pick the entry.
+    """
+    if not issue_list_cache_timeout():
+        return None
+
+    spec_params = {name for name, _ in spec.filters} | {"order_by"}
+    params = sorted((name, values) for name, values in request.GET.lists() if name not in spec_params)
+
+    generations = [ALL_LISTS]
+    tokens = []
+    project_keys = spec.get("projects")
+    if project_keys:
+        # New projects change the keys that map to a project.
+        tokens.append(lookups.projects.current_version())
+        for issue_key in project_keys:
+            project = lookups.projects.get("issue_key", issue_key)
+            if project is not None:
+                generations.append(project_generation(project.pk))
+    else:
+        generations.append(UNSCOPED_LISTS)
+    tokens.extend(current_generations(generations))
+
+    variant = (
+        spec.cache_key, request.get_host(), request.path, params, getattr(request, "accepted_media_type", None), tokens)
+    return "{0}:{1}".format(ISSUE_LIST_CACHE_PREFIX, hashlib.sha1(repr(variant).encode()).hexdigest())
+
+
+def invalidate_issue(sender, instance, raw=False, using="default", **kwds):
+    if raw:
+        return
+    invalidate_issue_lists({instance.project_id, getattr(instance, "_loaded_project_id", None)}, using=using)
+
+
+def invalidate_comment_issue(sender, instance, raw=False, using="default", **kwds):
+    if raw:
+        return
+    content_type = instance.content_type
+    if content_type.app_label == "gumshoe" and content_type.model == "issue":
+        issue = instance.content
+        if issue is not None:
+            invalidate_issue_lists([issue.project_id], using=using)
+
+
+def invalidate_project_issues(sender, instance, raw=False, using="default", **kwds):
+    if raw:
+        return
+    invalidate_issue_lists([instance.project_id], using=using)
+
+
+def invalidate_all(sender, instance=None, raw=False, using="default", update_fields=None, **kwds):
+    # Logging in saves the user only to record the time.
+    if raw or (update_fields is not None and set(update_fields) <= {"last_login"}):
+        return
+    invalidate_all_issue_lists(using=using)
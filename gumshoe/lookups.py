@@ -0,0 +1,102 @@
+import time
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+LOOKUP_CACHE_PREFIX = "gumshoe:lookup"
+
+
+def lookup_check_interval():
+    return getattr(settings, "GUMSHOE_LOOKUP_CHECK_INTERVAL", 1)
+
+
+class LookupTable(object):
+    """
+    Cached copy of a small, rarely changing table such as the priorities or
+    issue types.
+
+    Rows are kept in the process and in the shared Django cache under a
+    version token.  The local copy is served as is for
+    ``GUMSHOE_LOOKUP_CHECK_INTERVAL`` seconds, then its version is compared
+    with the one in the shared cache, so a change made by any process is
+    picked up by all of them within the interval without touching the
+    database.  Changes made by this process are seen at once.
+    """
+    def __init__(self, model_label, clock=time.monotonic):
+        self.model_label = model_label
+        self.version_key = "{0}:{1}:version".format(LOOKUP_CACHE_PREFIX, model_label)
+        self.clock = clock
+        # (version, rows, indexes, checked), replaced as a whole.
+        self._local = (None, None, None, None)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def data_key(self, version):
+        return "{0}:{1}:{2}".format(LOOKUP_CACHE_PREFIX, self.model_label, version)
+
+    def current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def load(self):
+        local = self._local
+        now = self.clock()
+        if local[0] is not None and now - local[3] < lookup_check_interval():
+            return local
+
+        version = self.current_version()
+        if local[0] != version or version is None:
+            rows = cache.get(self.data_key(version))
+            if rows is None:
+                rows = list(self.model.objects.all())
+                cache.set(self.data_key(version), rows, None)
+            local = self._local = (version, rows, {}, now)
+        else:
+            local = self._local = local[:3] + (now, )
+        return local
+
+    def all(self):
+        return self.load()[1]
+
+    def get(self, field, value):
+        """
+        Returns the row whose ``field`` equals ``value``, or None.
+        """
+        _, rows, indexes, _ = self.load()
+        index = indexes.get(field)
+        if index is None:
+            index = indexes[field] = {getattr(row, field): row for row in rows}
+        return index.get(value)
+
+    def invalidate(self):
+        # A random token rather than a counter, so a version key evicted
+        # from the shared cache can never come back pointing at old rows.
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+        self._local = (None, None, None, None)
+
+
+lookup_tables = {
+    "gumshoe.priority": LookupTable("gumshoe.priority"),
+    "gumshoe.issuetype": LookupTable("gumshoe.issuetype"),
+    "gumshoe.project": LookupTable("gumshoe.project"),
+}
+
+priorities = lookup_tables["gumshoe.priority"]
+issue_types = lookup_tables["gumshoe.issuetype"]
+projects = lookup_tables["gumshoe.project"]
+
+
+def invalidate_lookup_table(sender, using="default", **kwds):
+    lookup_table = lookup_tables[sender._meta.label_lower]
+    lookup_table.invalidate()
+    # Another process may have reloaded the old rows before the transaction
+    # committed, so invalidate once more when it does.
+    transaction.on_commit(lookup_table.invalidate, using=using)
@@ -0,0 +1,185 @@
+import asyncio
+import concurrent.futures
+import io
+import statistics
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+from gumshoe.asyncviews import async_db_threads
+from gumshoe.models import Issue
+
+
+class Command(BaseCommand):
+    help = ('Load tests the read-heavy REST endpoints through gumshoe.standalone.wsgi and gumshoe.standalone.asgi, '
+            'called in this process, and compares their throughput and latency.  Requests are made as the first '
+            'user; run benchmark_issue_list --seed first for a realistic database.  --query-delay simulates a '
+            'slow database.')
+
+    paths = [
+        "/rest/issues/",
+        "/rest/issues/?statuses=OPEN&order_by=-last_updated",
+        "/rest/issues/{issue_key}/",
+        "/rest/issues/{issue_key}/comments/",
+        "/rest/projects/",
+        "/rest/users/",
+        "/rest/milestones/",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", dest="requests", type=int, default=200,
+            help="Number of requests made to each endpoint through each entry point."
+        )
+        parser.add_argument(
+            "--concurrency", dest="concurrency", type=int, default=32,
+            help="Number of clients making requests at once."
+        )
+        parser.add_argument(
+            "--wsgi-threads", dest="wsgi_threads", type=int, default=None,
+            help="Number of WSGI worker threads, by default GUMSHOE_ASYNC_DB_THREADS, the size of the ASGI "
+                 "database pool."
+        )
+        parser.add_argument(
+            "--query-delay", dest="query_delay", type=float, default=0,
+            help="Milliseconds added to every query."
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by("pk").first()
+        issue = Issue.objects.order_by("pk").first()
+        if user is None or issue is None:
+            raise CommandError("No issues, run benchmark_issue_list --seed first.")
+
+        if options["query_delay"]:
+            delay = options["query_delay"] / 1000
+
+            def slow_query(execute, sql, params, many, context):
+                time.sleep(delay)
+                return execute(sql, params, many, context)
+
+            def add_delay(sender, connection, **kwds):
+                # Threads reuse their connection objects when reconnecting.
+                if slow_query not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(slow_query)
+            connection_created.connect(add_delay, weak=False)
+
+        client = Client()
+        client.force_login(user)
+        allowed_hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+        host = (allowed_hosts or ["localhost"])[0]
+        headers = {
+            "host": host,
+            "cookie": "{0}={1}".format(settings.SESSION_COOKIE_NAME, client.cookies[settings.SESSION_COOKIE_NAME].value),
+            "accept": "application/json",
+        }
+
+        from gumshoe.standalone.asgi import application as asgi_application
+        from gumshoe.standalone.wsgi import application as wsgi_application
+
+        count = options["requests"]
+        concurrency = options["concurrency"]
+        wsgi_threads = options["wsgi_threads"] or async_db_threads() or 1
+        self.stdout.write("{0} requests per endpoint, {1} clients, {2} WSGI threads, {3} ASGI database threads".format(
+            count, concurrency, wsgi_threads, async_db_threads()))
+
+        self.stdout.write("{0:<52} {1:>10} {2:>10} {3:>9} {4:>9} {5:>9} {6:>9}".format(
+            "", "WSGI r/s", "ASGI r/s", "WSGI p50", "ASGI p50", "WSGI p95", "ASGI p95"))
+        for path in self.paths:
+            path = path.format(issue_key=issue.issue_key)
+            # The first requests only warm up the caches.
+            self.load_wsgi(wsgi_application, path, headers, concurrency, concurrency, wsgi_threads)
+            asyncio.run(self.load_asgi(asgi_application, path, headers, concurrency, concurrency))
+
+            wsgi = self.load_wsgi(wsgi_application, path, headers, count, concurrency, wsgi_threads)
+            asgi = asyncio.run(self.load_asgi(asgi_application, path, headers, count, concurrency))
+            self.stdout.write("{0:<52} {1:>10.1f} {2:>10.1f} {3:>9.1f} {4:>9.1f} {5:>9.1f} {6:>9.1f}".format(
+                path, wsgi[0], asgi[0], wsgi[1], asgi[1], wsgi[2], asgi[2]))
+
+    def summarize(self, latencies, elapsed):
+        """
+        Returns the requests per second and the median and 95th percentile
+        latencies in milliseconds.
+        """
+        latencies = sorted(latency * 1000 for latency in latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return len(latencies) / elapsed, statistics.median(latencies), p95
+
+    def check_status(self, path, status):
+        if status != 200:
+            raise CommandError("{0} answered {1}.".format(path, status))
+
+    def load_wsgi(self, application, path, headers, count, concurrency, threads):
+        # Clients queue for the worker threads, as behind a threaded WSGI server.
+        workers = threading.BoundedSemaphore(threads)
+        path_info, _, query_string = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": "GET", "SCRIPT_NAME": "", "PATH_INFO": path_info, "QUERY_STRING": query_string,
+            "SERVER_NAME": headers["host"], "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1",
+            "wsgi.version": (1, 0), "wsgi.url_scheme": "http", "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True, "wsgi.multiprocess": False, "wsgi.run_once": False,
+        }
+        environ.update(("HTTP_" + name.upper(), value) for name, value in headers.items())
+
+        def request():
+            statuses = []
+            start = time.perf_counter()
+            with workers:
+                result = application(dict(environ, **{"wsgi.input": io.BytesIO()}),
+                                     lambda status, headers, exc_info=None: statuses.append(status))
+                try:
+                    b"".join(result)
+                finally:
+                    result.close()
+            self.check_status(path, int(statuses[0].split()[0]))
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(lambda _: request(), range(count)))
+        return self.summarize(latencies, time.perf_counter() - start)
+
+    async def load_asgi(self, application, path, headers, count, concurrency):
+        path_info, _, query_string = path.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path_info, "raw_path": path_info.encode(), "query_string": query_string.encode(),
+            "root_path": "", "client": ("127.0.0.1", 0), "server": (headers["host"], 80),
+            "headers": [(name.encode(), value.encode()) for name, value in headers.items()],
+        }
+        clients = asyncio.Semaphore(concurrency)
+
+        async def request():
+            statuses = []
+            received = []
+            done = asyncio.Event()
+
+            async def receive():
+                if not received:
+                    received.append(True)
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await done.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+                elif not message.get("more_body", False):
+                    done.set()
+
+            async with clients:
+                start = time.perf_counter()
+                await application(dict(scope), receive, send)
+                latency = time.perf_counter() - start
+            self.check_status(path, statuses[0])
+            return latency
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*[request() for _ in range(count)])
+        return self.summarize(latencies, time.perf_counter() - start)
@@ -0,0 +1,165 @@
+import datetime
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils.timezone import utc
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from gumshoe.models import Component, Issue, IssueType, Milestone, Priority, Project, Version
+from gumshoe.views import IssueViewSet
+
+BENCHMARK_PROJECT_KEY = "BENCH"
+
+
+class Command(BaseCommand):
+    help = ('Times the issue list endpoint for the filter combinations the list view sends, with and without '
+            'the issue indexes.  Use --seed to fill the database with generated issues first.  This changes '
+            'the database, do not run it against a real tracker.')
+
+    list_queries = [
+        "projects={project}&statuses=OPEN",
+        "projects={project}&statuses=OPEN,RESOLVED&order_by=-last_updated",
+        "projects={project}&statuses=OPEN&order_by=priority",
+        "assignees={assignee}&statuses=OPEN",
+        "milestones={milestone}&statuses=OPEN,RESOLVED",
+        "statuses=OPEN&order_by=-last_updated",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", "-D", dest="database", default="default",
+            help="Database connection to use."
+        )
+        parser.add_argument(
+            "--seed", dest="seed", type=int, default=0,
+            help="Number of issues to generate before benchmarking, e.g. 1000000."
+        )
+        parser.add_argument(
+            "--batch-size", dest="batch_size", type=int, default=5000,
+            help="Number of issues inserted per query while seeding."
+        )
+        parser.add_argument(
+            "--repeat", dest="repeat", type=int, default=10,
+            help="Number of times each list request is timed."
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if options["seed"]:
+            self.seed(options["seed"], options["batch_size"], using)
+
+        try:
+            project = Project.objects.using(using).get(issue_key=BENCHMARK_PROJECT_KEY)
+        except Project.DoesNotExist:
+            raise CommandError("No benchmark data, run with --seed first.")
+
+        user = User.objects.using(using).order_by("pk").first()
+        params = {
+            "project": project.issue_key,
+            "assignee": user.pk,
+            "milestone": Milestone.objects.using(using).order_by("pk").first().pk,
+        }
+        queries = [query.format(**params) for query in self.list_queries]
+
+        self.stdout.write("{0} issues".format(Issue.objects.using(using).count()))
+
+        self.drop_indexes(using)
+        try:
+            before = self.time_queries(queries, user, options["repeat"])
+        finally:
+            self.create_indexes(using)
+        after = self.time_queries(queries, user, options["repeat"])
+
+        self.stdout.write("{0:<70} {1:>12} {2:>12}".format("median ms", "no indexes", "indexes"))
+        for query in queries:
+            self.stdout.write("{0:<70} {1:>12.1f} {2:>12.1f}".format(query, before[query], after[query]))
+
+    def time_queries(self, queries, user, repeat):
+        allowed_hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+        factory = APIRequestFactory(SERVER_NAME=(allowed_hosts or ["localhost"])[0])
+        view = IssueViewSet.as_view({"get": "list"})
+
+        timings = {}
+        for query in queries:
+            samples = []
+            # The first request only warms up the database's caches.
+            for _ in range(repeat + 1):
+                request = factory.get("/rest/issues/?" + query)
+                force_authenticate(request, user=user)
+                start = time.perf_counter()
+                response = view(request)
+                response.render()
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[query] = statistics.median(samples[1:])
+        return timings
+
+    def drop_indexes(self, using):
+        with connections[using].schema_editor() as schema_editor:
+            for index in Issue._meta.indexes:
+                schema_editor.remove_index(Issue, index)
+
+    def create_indexes(self, using):
+        with connections[using].schema_editor() as schema_editor:
+            for index in Issue._meta.indexes:
+                schema_editor.add_index(Issue, index)
+
+    def seed(self, count, batch_size, using):
+        project, _ = Project.objects.using(using).get_or_create(
+            issue_key=BENCHMARK_PROJECT_KEY, defaults={"name": "Benchmark"})
+        other_project, _ = Project.objects.using(using).get_or_create(
+            issue_key=BENCHMARK_PROJECT_KEY + "OTHER", defaults={"name": "Benchmark Other"})
+        projects = [project, other_project]
+
+        users = [User.objects.using(using).get_or_create(username="benchmark-{0}".format(n))[0] for n in range(20)]
+        milestones = [Milestone.objects.using(using).get_or_create(name="Benchmark {0}".format(n))[0] for n in range(5)]
+        components = {p.pk: [Component.objects.using(using).get_or_create(project=p, name="Component {0}".format(n))[0] for n in range(5)] for p in projects}
+        versions = {p.pk: [Version.objects.using(using).get_or_create(project=p, name="Version {0}".format(n))[0] for n in range(5)] for p in projects}
+        priorities = list(Priority.objects.using(using).all())
+        issue_types = list(IssueType.objects.using(using).all())
+        statuses = [status for status, _ in Issue.STATUS_CHOICES]
+        resolutions = [resolution for resolution, _ in Issue.RESOLUTION_CHOICES]
+
+        if not priorities or not issue_types:
+            raise CommandError("Load the initial_data fixture before seeding.")
+
+        now = time.time()
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            issue_project = projects[created // batch_size % len(projects)]
+            with transaction.atomic(using=using):
+                keys = issue_project.next_issue_keys(size)
+                last_pk = Issue.objects.using(using).aggregate(last_pk=Max("pk"))["last_pk"] or 0
+                issues = []
+                for key in keys:
+                    timestamp = now - random.randint(0, 3 * 365 * 24 * 3600)
+                    issue = Issue(
+                        project=issue_project, issue_key=key, summary="Generated issue " + key,
+                        description="", issue_type=random.choice(issue_types), priority=random.choice(priorities),
+                        assignee=random.choice(users), reporter=random.choice(users),
+                        milestone=random.choice(milestones + [None]), status=random.choice(statuses),
+                        resolution=random.choice(resolutions),
+                    )
+                    issue.reported = issue.last_updated = datetime.datetime.fromtimestamp(timestamp, tz=utc)
+                    issues.append(issue)
+                Issue.objects.using(using).bulk_create(issues)
+
+                issues = Issue.objects.using(using).filter(pk__gt=last_pk).only("pk")
+                Issue.components.through.objects.using(using).bulk_create([
+                    Issue.components.through(issue_id=issue.pk, component_id=random.choice(components[issue_project.pk]).pk)
+                    for issue in issues])
+                Issue.fix_versions.through.objects.using(using).bulk_create([
+                    Issue.fix_versions.through(issue_id=issue.pk, version_id=random.choice(versions[issue_project.pk]).pk)
+                    for issue in issues])
+                Issue.affects_versions.through.objects.using(using).bulk_create([
+                    Issue.affects_versions.through(issue_id=issue.pk, version_id=random.choice(versions[issue_project.pk]).pk)
+                    for issue in issues])
+
+            created += size
+            self.stdout.write("Seeded {0}/{1} issues".format(created, count))
@@ -0,0 +1,73 @@
+import timeit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from gumshoe.renderers import CaseConvertingJSONRenderer, do_transform, snake_case_to_camel_case
+from gumshoe.views import IssueViewSet
+
+
+def recursive_transform(data, transformer):
+    """
+    The plain recursive key transform, without the key cache, that
+    ``do_transform`` is compared with.
+    """
+    if isinstance(data, str):
+        return data
+    elif hasattr(data, "items"):
+        return {transformer(k): recursive_transform(v, transformer) for k, v in data.items()}
+    elif hasattr(data, "__iter__"):
+        return [recursive_transform(i, transformer) for i in data]
+    return data
+
+
+class Command(BaseCommand):
+    help = ('Times rendering a page of the issue list, its camelCase key transform and a plain recursive '
+            'transform without the key cache.  The page is fetched as the first user; run benchmark_issue_list '
+            '--seed first for a realistic database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-size", dest="page_size", type=int, default=50,
+            help="Number of issues on the rendered page."
+        )
+        parser.add_argument(
+            "--number", dest="number", type=int, default=20,
+            help="Number of times each step is run per timing."
+        )
+        parser.add_argument(
+            "--repeat", dest="repeat", type=int, default=3,
+            help="Number of timings, of which the fastest is reported."
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by("pk").first()
+        if user is None:
+            raise CommandError("No users, run benchmark_issue_list --seed first.")
+
+        allowed_hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+        factory = APIRequestFactory(SERVER_NAME=(allowed_hosts or ["localhost"])[0])
+        request = factory.get("/rest/issues/", {"page_size": options["page_size"]})
+        force_authenticate(request, user=user)
+        data = IssueViewSet.as_view({"get": "list"})(request).data
+        if not data["results"]:
+            raise CommandError("No issues, run benchmark_issue_list --seed first.")
+
+        renderer = CaseConvertingJSONRenderer()
+        number, repeat = options["number"], options["repeat"]
+
+        def best(func):
+            return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1000
+
+        timings = [
+            ("render", best(lambda: renderer.render(data))),
+            ("key transform", best(lambda: do_transform(data, snake_case_to_camel_case))),
+            ("uncached recursive transform",
+             best(lambda: recursive_transform(data, snake_case_to_camel_case.__wrapped__))),
+        ]
+
+        self.stdout.write("{0} issue page".format(len(data["results"])))
+        for name, milliseconds in timings:
+            self.stdout.write("{0:<40} {1:>9.2f} ms".format(name, milliseconds))
@@ -1,27 +1,25 @@
+import datetime
+import json
+import multiprocessing
 import re
-from optparse import make_option
-import sys
+import time
 
 from django.core.management.base import BaseCommand, CommandError
 
 from django.contrib.auth.models import User
-from django.db import connections, models
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.utils import timezone
 
-from gumshoe.models import Project, Version, Component, Priority, IssueType, Issue, Comment
+from gumshoe import lookups
+from gumshoe.bulk import IssueBulkWriter
+from gumshoe.listcache import invalidate_issue_lists
+from gumshoe.models import BugzillaIssueMap, Project, Version, Component, Issue, Comment
+from gumshoe.search import get_search_backend
 
-TEMPORARY_TABLE_NAME = "bugzillaimport"
 camel_case_split_pattern = r'((?<=[a-z])[A-Z]|(?<!\A)[A-Z](?=[a-z]))'
 
 
-class BugzillaIssueMap(models.Model):
-    bugzilla_id = models.IntegerField(primary_key=True)
-    issue = models.ForeignKey(Issue)
-
-    class Meta:
-        managed = False
-        db_table = TEMPORARY_TABLE_NAME
-
-
 def project_name_to_keys(name):
     """
     Returns a list of possible issue keys based on the name.  The first key
@@ -72,18 +70,14 @@ def import_projects(project_list, key_map=None):
         issue_key = key_map.get(project.name)
         if not issue_key:
             possible_issue_keys = iter(project_name_to_keys(project.name))
-            issue_key = possible_issue_keys.next()
+            issue_key = next(possible_issue_keys)
             while issue_key in issue_keys_taken:
-                issue_key = possible_issue_keys.next()
+                issue_key = next(possible_issue_keys)
         project.issue_key = issue_key
         issue_keys_taken.add(issue_key)
         project.save()
 
 
-def default_log_dot_fn():
-    sys.stdout.write(".")
-
-
 def rowdict(row, cur):
     if hasattr(cur, "description"):
         return dict(zip([d[0] for d in cur.description], row))
@@ -96,36 +90,131 @@ def rowdict_cursor(cur):
         yield rowdict(row, fields)
 
 
-class DotLogger(object):
-    def __init__(self, cnt=1, fn=default_log_dot_fn):
-        self.cnt = cnt
-        self.fn = fn
-        self.cur = 0
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
-    def __call__(self):
-        if self.cur >= self.cnt:
-            self.fn()
-            self.cur = 0
-        self.cur += 1
 
+_worker_command = None
 
-class Command(BaseCommand):
-    option_list = BaseCommand.option_list + (
-        make_option(
-            "--database", "-D", dest="database", default='bugzilla',
-            help="Database connection to use."
-        ),
 
-        make_option(
-            "--user-map", "-U", dest="user_map", action="append",
-            help="A mapping of a user's email address to their username of the form 'some-email@email.com=some-username"
-        ),
+def init_worker(state):
+    global _worker_command
+    _worker_command = Command()
+    _worker_command.__dict__.update(state)
 
-        make_option(
-            "--project-key-map", "-K", dest="project_key_map", action="append",
-            help="Project key map in the form of 'Project Name=PROJECTKEY'."
-        ),
-    )
+
+def import_bug_range(bug_range):
+    cur = connections[_worker_command.database].cursor()
+    try:
+        return _worker_command.import_bugs(cur, *bug_range)
+    finally:
+        cur.close()
+        connections.close_all()
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "?"
+    return str(datetime.timedelta(seconds=int(seconds)))
+
+
+class ProgressPhase(object):
+    """
+    Rows done and time spent in one phase of the import.
+    """
+    def __init__(self, name, total=None, started=None):
+        self.name = name
+        self.total = total
+        self.started = started
+        self.rows = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def eta(self):
+        if self.total is None or not self.rate:
+            return None
+        return max(self.total - self.rows, 0) / self.rate
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "rows": self.rows,
+            "total": self.total,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rate, 1),
+        }
+
+
+class ProgressReporter(object):
+    """
+    Reports rows done, throughput and time left for each import phase, at
+    most once every ``interval`` seconds.  On a terminal the progress line is
+    redrawn in place, elsewhere each report is a line of its own.
+
+    :param stream: The management command's output wrapper.
+    :param interval: Minimum number of seconds between two reports.
+    :param clock: Returns the current time in seconds.
+    """
+    def __init__(self, stream, interval=None, clock=time.monotonic):
+        self.stream = stream
+        self.redraw = stream.isatty()
+        self.interval = interval if interval is not None else (0.25 if self.redraw else 10.0)
+        self.clock = clock
+        self.phases = []
+        self.last_report = None
+
+    def start(self, name, total=None, wall_clock=True):
+        """
+        Starts a phase.  Phases that overlap with others pass
+        ``wall_clock=False`` and the time spent on them to ``update``.
+        """
+        phase = ProgressPhase(name, total, self.clock() if wall_clock else None)
+        self.phases.append(phase)
+        return phase
+
+    def update(self, phase, rows, seconds=None, report=True):
+        phase.rows += rows
+        if seconds is not None:
+            phase.seconds += seconds
+        elif phase.started is not None:
+            phase.seconds = self.clock() - phase.started
+
+        now = self.clock()
+        if report and (self.last_report is None or now - self.last_report >= self.interval):
+            self.last_report = now
+            self.write(self.progress_line(phase), final=False)
+
+    def finish(self, phase):
+        if phase.started is not None:
+            phase.seconds = self.clock() - phase.started
+        self.write("{0}: {1} rows in {2} ({3:.1f} rows/s)".format(
+            phase.name, phase.rows, format_seconds(phase.seconds), phase.rate), final=True)
+
+    def progress_line(self, phase):
+        total = "/{0}".format(phase.total) if phase.total is not None else ""
+        return "{0}: {1}{2} rows, {3:.1f} rows/s, ETA {4}, elapsed {5}".format(
+            phase.name, phase.rows, total, phase.rate, format_seconds(phase.eta), format_seconds(phase.seconds))
+
+    def write(self, line, final):
+        if self.redraw:
+            self.stream.write("\r\033[K" + line, ending="\n" if final else "")
+            self.stream.flush()
+        else:
+            self.stream.write(line)
+
+    def summary(self):
+        return {
+            "phases": [phase.as_dict() for phase in self.phases],
+            "seconds": round(sum(phase.seconds for phase in self.phases if phase.started is not None), 3),
+        }
+
+
+class Command(BaseCommand):
     help = 'Imports bugs from a bugzilla database.'
 
     default_status_map = {
@@ -166,194 +255,417 @@ class Command(BaseCommand):
 
     default_issue_type_field = "cf_issue_type"
 
-    def create_temporary_tables(self):
-        conn = connections["default"]
-        cur = conn.cursor()
-        q = """
-            CREATE TEMPORARY TABLE {0} (
-                bugzilla_id INTEGER,
-                issue_id INTEGER
-            )
-        """.format(TEMPORARY_TABLE_NAME)
-        cur.execute(q)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", "-D", dest="database", default='bugzilla',
+            help="Database connection to use."
+        )
+        parser.add_argument(
+            "--user-map", "-U", dest="user_map", action="append",
+            help="A mapping of a user's email address to their username of the form 'some-email@email.com=some-username"
+        )
+        parser.add_argument(
+            "--project-key-map", "-K", dest="project_key_map", action="append",
+            help="Project key map in the form of 'Project Name=PROJECTKEY'."
+        )
+        parser.add_argument(
+            "--batch-size", dest="batch_size", type=int, default=1000,
+            help="Number of bugs read, written and committed together."
+        )
+        parser.add_argument(
+            "--insert-size", dest="insert_size", type=int, default=500,
+            help="Maximum number of rows per insert query."
+        )
+        parser.add_argument(
+            "--workers", dest="workers", type=int, default=1,
+            help="Number of processes importing bugs in parallel.  Only useful on databases that allow "
+                 "concurrent writers, e.g. PostgreSQL."
+        )
+        parser.add_argument(
+            "--resume", dest="resume", action="store_true", default=False,
+            help="Continue an interrupted import from the last committed batch instead of starting over."
+        )
+        parser.add_argument(
+            "--progress-interval", dest="progress_interval", type=float, default=None,
+            help="Minimum number of seconds between progress reports.  Defaults to 0.25 on a terminal and 10 "
+                 "otherwise."
+        )
+        parser.add_argument(
+            "--summary-json", dest="summary_json", default=None,
+            help="Write the row counts and timings of every phase to this file as JSON when the import ends."
+        )
 
     def split_key_value_pairs(self, args):
         return dict(tuple(arg.split("=") for arg in args))
 
     def handle(self, *args, **options):
-        def log(msg):
-            sys.stdout.write(msg)
-            sys.stdout.flush()
-
-        print(args, options)
-
-        print("Setting up project key maps.")
-        project_key_map_args = options.get("project_key_map") or []
-        project_key_map = self.split_key_value_pairs(project_key_map_args)
-        print(project_key_map)
-
-        print("Initializing username mappings")
+        if options["batch_size"] < 1 or options["insert_size"] < 1:
+            raise CommandError("Batch sizes must be positive.")
+        if options["workers"] < 1:
+            raise CommandError("At least one worker is needed.")
+        if options["workers"] > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            raise CommandError("More than one worker needs the fork start method, which this platform lacks.")
+
+        self.using = "default"
+        self.database = options["database"]
+        self.resume = options["resume"]
+        self.batch_size = options["batch_size"]
+        self.insert_size = options["insert_size"]
+        self.comment_seconds = 0.0
+        self.progress = ProgressReporter(self.stdout, options["progress_interval"])
+
+        self.stdout.write("Setting up project key maps.")
+        project_key_map = self.split_key_value_pairs(options.get("project_key_map") or [])
+
+        self.stdout.write("Initializing username mappings")
         user_name_map = self.split_key_value_pairs(options.get("user_map") or [])
-        user_map = {}
 
-        print("Initializing priority mappings.")
-        priority_name_map = self.default_priority_map
-        priority_map = {k: Priority.objects.get(short_name=v) for k, v in priority_name_map.items()}
+        self.stdout.write("Initializing priority, resolution and issue type mappings.")
+        self.priority_map = {k: lookups.priorities.get("short_name", v) for k, v in self.default_priority_map.items()}
+        self.resolution_map = self.default_resolution_map
+        self.status_map = self.default_status_map
+        self.issue_type_map = {k: lookups.issue_types.get("short_name", v) for k, v in self.default_issue_type_map.items()}
+        self.default_issue_type_obj = self.issue_type_map[self.default_issue_type]
+
+        self.stdout.write("Acquiring connection.")
+        cur = connections[self.database].cursor()
+        try:
+            if not self.resume:
+                BugzillaIssueMap.objects.using(self.using).all().delete()
 
-        print("Initializing resolution mappings.")
-        resolution_map = self.default_resolution_map
-        status_map = self.default_status_map
+            phase = self.progress.start("users")
+            self.user_map = self.import_users(cur, user_name_map, phase)
+            self.progress.finish(phase)
 
-        print("Initializing issue type mappings.")
-        issue_type_name_map = self.default_issue_type_map
-        issue_type_map = {k: IssueType.objects.get(short_name=v) for k, v in issue_type_name_map.items()}
-        default_issue_type = issue_type_map[self.default_issue_type]
+            phase = self.progress.start("products")
+            self.projects = self.import_products(cur, project_key_map, phase)
+            self.progress.finish(phase)
 
-        log_dot = DotLogger()
+            phase = self.progress.start("versions")
+            self.version_map = self.import_versions(cur, phase)
+            self.progress.finish(phase)
 
-        cur = None
-        try:
-            self.create_temporary_tables()
-
-            print("Acquiring connection.")
-            conn = connections[options.get("database")]
-            cur = conn.cursor()
-
-
-            print("Importing users.")
-            cur.execute("SELECT userid, login_name FROM profiles")
-            for row in cur:
-                username = user_name_map.get(row[1]) or row[1]
-
-                try:
-                    user = User.objects.get(username=username)
-                except User.DoesNotExist:
-                    try:
-                        user = User.objects.get(email=username)
-                    except User.DoesNotExist:
-                        user = User(username=username, email=row[1], password=username)
-                        user.save()
-
-                user_map[row[0]] = user.pk
-
-            print("Importing products as projects.")
-            cur.execute("SELECT id, name, description FROM products")
-            all_projects = {row[0]: Project(name=row[1], description=row[2]) for row in cur}
-
-            import_projects(all_projects.values(), project_key_map)
-
-            print("Importing versions.")
-            cur.execute("SELECT id, value, product_id from versions")
-            for row in cur:
-                project = all_projects.get(row[2])
-                version = Version(name=row[1], description="Autoimport from bugzilla.", project=project)
-                version.save()
-
-            print("Importing components.")
-            cur.execute("SELECT id, name, description, product_id from components")
-            for row in cur:
-                project = all_projects.get(row[-1])
-                component = Component(name=row[1], description=row[2], project=project)
-                component.save()
-
-            print("Importing issues.")
-            print("starting query")
-            issue_type_field_clause = ", cf_issue_type AS issue_type"
-            cur.execute("""
-                SELECT bug.bug_id AS id,
-                       assignee.login_name AS assignee,
-                       bug.product_id AS product_id,
-                       bug.bug_severity AS priority,
-                       bug.bug_status AS status,
-                       bug.creation_ts AS creation_time,
-                       bug.delta_ts AS delta_time,
-                       bug.short_desc AS summary,
-                       reporter.login_name AS reporter,
-                       bug.version AS version_name,
-                       c.name AS component_name,
-                       bug.lastdiffed AS last_changed,
-                       bug.resolution AS resolution
-                       {0}
-                FROM bugs bug
-                JOIN profiles assignee ON bug.assigned_to = assignee.userid
-                JOIN profiles reporter ON bug.reporter = reporter.userid
-                LEFT JOIN components c ON bug.component_id = c.id
-            """.format(issue_type_field_clause))
-            print("query done")
-
-            for row in rowdict_cursor(cur):
-                assignee = User.objects.get(email=row["assignee"])
-                project = all_projects[row["product_id"]]
-                priority = priority_map[row["priority"]]
-                status = status_map[row["status"]]
-                creation_time = row["creation_time"]
-                delta_time = row["delta_time"]
-                summary = row["summary"]
-                reporter = User.objects.get(email=row["reporter"])
-                version = project.version_set.get(name=row["version_name"])
-                component = project.component_set.get(name=row["component_name"])
-                last_changed = row["last_changed"]
-                resolution = resolution_map[row["resolution"]]
-                issue_type = issue_type_map.get(row["issue_type"], default_issue_type)
-
-                issue = Issue()
-                issue.project = project
-                issue.issue_type = issue_type
-                issue.assignee = assignee
-                issue.reporter = reporter
-                issue.priority = priority
-                issue.summary = summary
-                issue.status = status
-                issue.resolution = resolution
-                issue.reported = creation_time
-                issue.last_updated = last_changed
-                issue.save(update_timestamps=False)
-
-                issue.affects_versions = [version]
-                issue.fix_versions = [version]
-                issue.components = [component]
-
-                bugzilla_map = BugzillaIssueMap()
-                bugzilla_map.issue = issue
-                bugzilla_map.bugzilla_id = row["id"]
-                bugzilla_map.save()
-
-                log_dot()
-
-            print("")
-            print("Importing comments.")
-            cur.execute("""
-                SELECT d.bug_id AS bug,
-                       p.login_name AS user_email,
-                       d.bug_when AS timestamp,
-                       d.thetext AS description
-                FROM longdescs d
-                JOIN profiles p ON d.who = p.userid
-                ORDER BY bug
-            """)
-            for row in rowdict_cursor(cur):
-                bugzilla_map = BugzillaIssueMap.objects.get(bugzilla_id=row["bug"])
-                author = User.objects.get(email=row["user_email"])
-                timestamp = row["timestamp"]
-                text = row["description"]
-
-                if text:
-                    if timestamp == bugzilla_map.issue.reported:
-                        bugzilla_map.issue.description += text
-                        bugzilla_map.issue.save(update_timestamps=False)
-                    else:
-                        comment = Comment()
-                        comment.content = bugzilla_map.issue
-                        comment.text = text
-                        comment.author = author
-                        comment.created = timestamp
-                        comment.updated = timestamp
-                        comment.save(update_timestamps=False)
-
-                log_dot()
+            phase = self.progress.start("components")
+            self.component_map = self.import_components(cur, phase)
+            self.progress.finish(phase)
 
+            bug_ranges = self.split_bug_ids(cur, options["workers"])
+            bugs_phase = self.progress.start("bugs", self.count_rows(cur, "bugs", "bug_id", bug_ranges))
+            comments_phase = self.progress.start(
+                "comments", self.count_rows(cur, "longdescs", "bug_id", bug_ranges), wall_clock=False)
         finally:
-            if cur is not None:
+            cur.close()
+
+        def batch_done(bugs, comment_rows, comment_seconds):
+            self.progress.update(comments_phase, comment_rows, comment_seconds, report=False)
+            self.progress.update(bugs_phase, bugs)
+
+        if options["workers"] == 1:
+            cur = connections[self.database].cursor()
+            try:
+                for low, high in bug_ranges:
+                    self.import_bugs(cur, low, high, batch_done)
+            finally:
                 cur.close()
+        else:
+            self.import_bugs_in_parallel(bug_ranges, options["workers"], batch_done)
+
+        self.progress.finish(bugs_phase)
+        self.progress.finish(comments_phase)
+        self.stdout.write("Imported {0} issues.".format(bugs_phase.rows))
+
+        if options["summary_json"]:
+            summary = self.progress.summary()
+            summary.update(issues=bugs_phase.rows, workers=options["workers"], batch_size=self.batch_size, resumed=self.resume)
+            with open(options["summary_json"], "w") as f:
+                json.dump(summary, f, indent=2)
+
+    def worker_state(self):
+        return {
+            key: value for key, value in self.__dict__.items()
+            if key not in ("stdout", "stderr", "style", "progress")
+        }
+
+    def import_bugs_in_parallel(self, bug_ranges, workers, batch_done):
+        # Workers are forked whatever the platform's default: they inherit the
+        # configured Django and database settings, where spawned ones would
+        # import this module before django.setup() and from the settings
+        # module alone.  They must not share the parent's connections, they
+        # open their own on first use.
+        context = multiprocessing.get_context("fork")
+        connections.close_all()
+        with context.Pool(workers, initializer=init_worker, initargs=(self.worker_state(), )) as pool:
+            for totals in pool.imap_unordered(import_bug_range, bug_ranges):
+                batch_done(*totals)
+
+    def count_rows(self, cur, table, column, bug_ranges):
+        """
+        Counts the rows of ``table`` still to be imported, skipping the bugs a
+        resumed import already has.
+        """
+        if not bug_ranges:
+            return 0
+        cur.execute("SELECT COUNT(*) FROM {0}".format(table))
+        total = cur.fetchone()[0]
+        if self.resume:
+            done = BugzillaIssueMap.objects.using(self.using).values_list("bugzilla_id", flat=True)
+            for bug_ids in chunks(list(done), self.insert_size):
+                cur.execute("SELECT COUNT(*) FROM {0} WHERE {1} IN ({2})".format(
+                    table, column, ", ".join(["%s"] * len(bug_ids))), bug_ids)
+                total -= cur.fetchone()[0]
+        return total
+
+    def split_bug_ids(self, cur, workers):
+        """
+        Splits the bug ids into ranges of the form (low, high], several per
+        worker so that a worker given a sparse range is not left idle.
+        """
+        cur.execute("SELECT MIN(bug_id), MAX(bug_id) FROM bugs")
+        first, last = cur.fetchone()
+        if first is None:
+            return []
+        if workers == 1:
+            return [(first - 1, last)]
+
+        parts = workers * 4
+        step = max(1, -(-(last - first + 1) // parts))
+        return [(low, min(low + step, last)) for low in range(first - 1, last, step)]
+
+    def import_users(self, cur, user_name_map, phase):
+        """
+        :return: Returns a map of bugzilla user ids to user primary keys.
+        """
+        by_username = {}
+        by_email = {}
+        for pk, username, email in User.objects.using(self.using).values_list("pk", "username", "email"):
+            by_username[username] = pk
+            by_email.setdefault(email, pk)
+
+        cur.execute("SELECT userid, login_name FROM profiles")
+        profiles = list(cur.fetchall())
+        phase.total = len(profiles)
+
+        new_users = {}
+        for userid, login_name in profiles:
+            username = user_name_map.get(login_name) or login_name
+            if username not in by_username and username not in by_email and username not in new_users:
+                new_users[username] = User(username=username, email=login_name, password=username)
+
+        with transaction.atomic(using=self.using):
+            User.objects.using(self.using).bulk_create(new_users.values(), batch_size=self.insert_size)
+            for usernames in chunks(list(new_users), self.insert_size):
+                rows = User.objects.using(self.using).filter(username__in=usernames).values_list("username", "pk")
+                by_username.update(rows)
 
-
+        user_map = {}
+        for userid, login_name in profiles:
+            username = user_name_map.get(login_name) or login_name
+            user_map[userid] = by_username.get(username) or by_email[username]
+        self.progress.update(phase, len(profiles))
+        return user_map
+
+    def import_products(self, cur, project_key_map, phase):
+        """
+        :return: Returns a map of bugzilla product ids to projects.
+        """
+        cur.execute("SELECT id, name, description FROM products")
+        projects = {row[0]: Project(name=row[1], description=row[2]) for row in cur.fetchall()}
+        phase.total = len(projects)
+        if self.resume:
+            existing = Project.objects.using(self.using).in_bulk([p.name for p in projects.values()], field_name="name")
+            projects = {product_id: existing.get(project.name, project) for product_id, project in projects.items()}
+        with transaction.atomic(using=self.using):
+            import_projects([project for project in projects.values() if project.pk is None], project_key_map)
+        self.progress.update(phase, len(projects))
+        return projects
+
+    def import_project_rows(self, model, rows, phase):
+        """
+        Creates the versions or components in rows, given as (bugzilla id,
+        product id, name, description) tuples.
+
+        :return: Returns a map of (product id, name) to primary keys.
+        """
+        objs = [
+            model(project=self.projects[product_id], name=name, description=description or "")
+            for _, product_id, name, description in rows if product_id in self.projects
+        ]
+        project_products = {project.pk: product_id for product_id, project in self.projects.items()}
+        phase.total = len(rows)
+        with transaction.atomic(using=self.using):
+            model.objects.using(self.using).bulk_create(objs, batch_size=self.insert_size, ignore_conflicts=True)
+            existing = model.objects.using(self.using).filter(project__in=project_products)
+            self.progress.update(phase, len(rows))
+            return {(project_products[project_id], name): pk for pk, project_id, name in existing.values_list("pk", "project_id", "name")}
+
+    def import_versions(self, cur, phase):
+        """
+        :return: Returns a map of (product id, version name) to version
+                 primary keys.
+        """
+        cur.execute("SELECT id, product_id, value, NULL FROM versions")
+        return self.import_project_rows(Version, cur.fetchall(), phase)
+
+    def import_components(self, cur, phase):
+        """
+        :return: Returns a map of bugzilla component ids to component primary
+                 keys.
+        """
+        cur.execute("SELECT id, product_id, name, description FROM components")
+        rows = cur.fetchall()
+        by_name = self.import_project_rows(Component, rows, phase)
+        return {component_id: by_name[product_id, name] for component_id, product_id, name, _ in rows if (product_id, name) in by_name}
+
+    def fetch_bugs(self, cur, after, high):
+        """
+        Reads the next batch of bugs ordered by id, up to ``high``.  Paging on
+        the bug id keeps memory flat on every database, where a plain cursor
+        over all the bugs would be buffered by the MySQL client.
+        """
+        cur.execute("""
+            SELECT bug.bug_id AS id,
+                   bug.assigned_to AS assignee_id,
+                   bug.reporter AS reporter_id,
+                   bug.product_id AS product_id,
+                   bug.bug_severity AS priority,
+                   bug.bug_status AS status,
+                   bug.creation_ts AS creation_time,
+                   bug.delta_ts AS delta_time,
+                   bug.short_desc AS summary,
+                   bug.version AS version_name,
+                   bug.component_id AS component_id,
+                   bug.lastdiffed AS last_changed,
+                   bug.resolution AS resolution,
+                   bug.{0} AS issue_type
+            FROM bugs bug
+            WHERE bug.bug_id > %s AND bug.bug_id <= %s
+            ORDER BY bug.bug_id
+            LIMIT %s
+        """.format(self.default_issue_type_field), [after, high, self.batch_size])
+        return list(rowdict_cursor(cur))
+
+    def fetch_comments(self, cur, first, last):
+        cur.execute("""
+            SELECT d.bug_id AS bug,
+                   d.who AS author_id,
+                   d.bug_when AS timestamp,
+                   d.thetext AS description
+            FROM longdescs d
+            WHERE d.bug_id >= %s AND d.bug_id <= %s
+            ORDER BY d.bug_id, d.bug_when, d.comment_id
+        """, [first, last])
+        return rowdict_cursor(cur)
+
+    def import_bugs(self, cur, low, high, batch_done=None):
+        """
+        Imports the bugs with ids in (low, high], skipping those an earlier,
+        interrupted import already mapped.  The ranges may differ from the
+        earlier import's, e.g. with another ``--workers``, so the mapped bugs
+        are skipped one by one rather than from the highest mapped id.
+
+        :param batch_done: Called after each batch with the number of bugs and
+                           comment rows imported, and the seconds spent on the
+                           comments.
+
+        :return: Returns the totals passed to ``batch_done`` for the range.
+        """
+        done = set(BugzillaIssueMap.objects.using(self.using)
+                   .filter(bugzilla_id__gt=low, bugzilla_id__lte=high).values_list("bugzilla_id", flat=True))
+        after = low
+
+        totals = [0, 0, 0.0]
+        while True:
+            fetched = self.fetch_bugs(cur, after, high)
+            if not fetched:
+                break
+            after = fetched[-1]["id"]
+            rows = [row for row in fetched if row["id"] not in done]
+            if not rows:
+                continue
+
+            started = time.monotonic()
+            bug_ids = {row["id"] for row in rows}
+            comments = [comment for comment in self.fetch_comments(cur, rows[0]["id"], rows[-1]["id"])
+                        if comment["bug"] in bug_ids]
+            self.comment_seconds = time.monotonic() - started
+            with transaction.atomic(using=self.using):
+                self.import_batch(rows, comments)
+
+            batch = (len(rows), len(comments), self.comment_seconds)
+            totals = [total + n for total, n in zip(totals, batch)]
+            if batch_done is not None:
+                batch_done(*batch)
+        return tuple(totals)
+
+    def aware(self, value):
+        if value is not None and timezone.is_naive(value):
+            return timezone.make_aware(value)
+        return value
+
+    def import_batch(self, rows, comment_rows):
+        """
+        Writes one batch of bugs along with all of their comments.
+        """
+        issues = {}
+        relations = []
+        for row in rows:
+            project = self.projects[row["product_id"]]
+            issue = Issue(
+                project=project,
+                issue_type=self.issue_type_map.get(row["issue_type"], self.default_issue_type_obj),
+                assignee_id=self.user_map[row["assignee_id"]],
+                reporter_id=self.user_map[row["reporter_id"]],
+                priority=self.priority_map[row["priority"]],
+                summary=row["summary"],
+                description="",
+                status=self.status_map[row["status"]],
+                resolution=self.resolution_map[row["resolution"]],
+                reported=self.aware(row["creation_time"]),
+                last_updated=self.aware(row["last_changed"] or row["delta_time"]),
+            )
+            issues[row["id"]] = (issue, row["creation_time"])
+
+            version_pk = self.version_map.get((row["product_id"], row["version_name"]))
+            component_pk = self.component_map.get(row["component_id"])
+            versions = [Version(pk=version_pk)] if version_pk else []
+            relations.append((issue, {
+                "affects_versions": versions,
+                "fix_versions": versions,
+                "components": [Component(pk=component_pk)] if component_pk else [],
+            }))
+
+        comments = []
+        for row in comment_rows:
+            issue, reported = issues[row["bug"]]
+            text = row["description"]
+            if text:
+                if row["timestamp"] == reported:
+                    issue.description += text
+                else:
+                    timestamp = self.aware(row["timestamp"])
+                    # Bulk inserted comments don't send the signals that
+                    # keep the count.
+                    issue.comment_count += 1
+                    comments.append((issue, Comment(
+                        author_id=self.user_map[row["author_id"]], text=text, created=timestamp, updated=timestamp)))
+
+        writer = IssueBulkWriter(batch_size=self.insert_size, using=self.using)
+        created = [issue for issue, _ in issues.values()]
+        writer.create_issues(created)
+        writer.set_relations(relations)
+
+        started = time.monotonic()
+        content_type = ContentType.objects.db_manager(self.using).get_for_model(Issue)
+        for issue, comment in comments:
+            comment.content_type = content_type
+            comment.object_id = issue.pk
+            comment.issue_id = issue.pk
+        Comment.objects.using(self.using).bulk_create([comment for _, comment in comments], batch_size=self.insert_size)
+        self.comment_seconds += time.monotonic() - started
+
+        BugzillaIssueMap.objects.using(self.using).bulk_create(
+            [BugzillaIssueMap(bugzilla_id=bug_id, issue_id=issue.pk) for bug_id, (issue, _) in issues.items()],
+            batch_size=self.insert_size)
+
+        get_search_backend(self.using).index_issues(created)
+        invalidate_issue_lists({issue.project_id for issue in created}, using=self.using)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gumshoe.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full text index used by issue searches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", "-D", dest="database", default="default",
+            help="Database connection to use."
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        with transaction.atomic(using=using):
+            get_search_backend(using).rebuild()
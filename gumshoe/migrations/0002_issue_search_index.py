@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+ISSUE_COMMENTS_SQL = """
+    (SELECT {aggregate}
+     FROM gumshoe_comment c
+     JOIN django_content_type ct ON c.content_type_id = ct.id
+     WHERE ct.app_label = 'gumshoe' AND ct.model = 'issue' AND c.object_id = i.id)
+"""
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("CREATE VIRTUAL TABLE gumshoe_issue_fts USING fts5(summary, description, comments)")
+        schema_editor.execute("""
+            INSERT INTO gumshoe_issue_fts (rowid, summary, description, comments)
+            SELECT i.id, i.summary, i.description, COALESCE({0}, '')
+            FROM gumshoe_issue i
+        """.format(ISSUE_COMMENTS_SQL.format(aggregate="group_concat(c.text, ' ')")))
+    elif vendor == "postgresql":
+        schema_editor.execute("""
+            CREATE TABLE gumshoe_issue_search (
+                issue_id integer PRIMARY KEY REFERENCES gumshoe_issue (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                document tsvector NOT NULL
+            )
+        """)
+        schema_editor.execute("CREATE INDEX gumshoe_issue_search_document ON gumshoe_issue_search USING GIN (document)")
+        schema_editor.execute("""
+            INSERT INTO gumshoe_issue_search (issue_id, document)
+            SELECT i.id,
+                   setweight(to_tsvector('english', i.summary), 'A') ||
+                   setweight(to_tsvector('english', i.description), 'B') ||
+                   setweight(to_tsvector('english', COALESCE({0}, '')), 'C')
+            FROM gumshoe_issue i
+        """.format(ISSUE_COMMENTS_SQL.format(aggregate="string_agg(c.text, ' ')")))
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE gumshoe_issue_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP TABLE gumshoe_issue_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gumshoe', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+def seed_issue_counters(apps, schema_editor):
+    Project = apps.get_model('gumshoe', 'Project')
+    Issue = apps.get_model('gumshoe', 'Issue')
+    db_alias = schema_editor.connection.alias
+
+    counters = {}
+    for project_id, issue_key in Issue.objects.using(db_alias).values_list('project_id', 'issue_key').iterator():
+        _, _, number = issue_key.rpartition('-')
+        if number.isdigit():
+            counters[project_id] = max(counters.get(project_id, 0), int(number))
+
+    for project_id, counter in counters.items():
+        Project.objects.using(db_alias).filter(pk=project_id).update(issue_counter=counter)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gumshoe', '0002_issue_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='issue_counter',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(seed_issue_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gumshoe', '0003_project_issue_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'status', 'last_updated'], name='gumshoe_iss_proj_stat_upd'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'last_updated'], name='gumshoe_iss_proj_upd'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['assignee', 'status'], name='gumshoe_iss_assignee_stat'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['milestone', 'status'], name='gumshoe_iss_milestone_stat'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['status', 'last_updated'], name='gumshoe_iss_stat_upd'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['last_updated', 'id'], name='gumshoe_iss_upd_id'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gumshoe', '0004_issue_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BugzillaIssueMap',
+            fields=[
+                ('bugzilla_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('issue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gumshoe.issue')),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def seed_comment_counts(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Comment = apps.get_model('gumshoe', 'Comment')
+    Issue = apps.get_model('gumshoe', 'Issue')
+    db_alias = schema_editor.connection.alias
+
+    content_type = ContentType.objects.using(db_alias).filter(app_label='gumshoe', model='issue').first()
+    if content_type is None:
+        return
+
+    counts = Comment.objects.using(db_alias).filter(content_type=content_type, object_id=OuterRef('pk')) \
+        .order_by().values('object_id').annotate(count=Count('pk')).values('count')
+    Issue.objects.using(db_alias).filter(pk__in=Comment.objects.using(db_alias).filter(content_type=content_type).values('object_id')) \
+        .update(comment_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('gumshoe', '0005_bugzilla_issue_map'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(seed_comment_counts, migrations.RunPython.noop),
+    ]
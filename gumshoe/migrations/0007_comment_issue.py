@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+
+
+def backfill_comment_issues(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Comment = apps.get_model('gumshoe', 'Comment')
+    Issue = apps.get_model('gumshoe', 'Issue')
+    db_alias = schema_editor.connection.alias
+
+    content_type = ContentType.objects.using(db_alias).filter(app_label='gumshoe', model='issue').first()
+    if content_type is None:
+        return
+
+    # Comments left behind by deleted issues keep a null issue.
+    Comment.objects.using(db_alias) \
+        .filter(content_type=content_type, object_id__in=Issue.objects.using(db_alias).values('pk')) \
+        .update(issue_id=F('object_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('gumshoe', '0006_issue_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='issue',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gumshoe.issue'),
+        ),
+        migrations.RunPython(backfill_comment_issues, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_type', 'object_id', 'created'], name='gumshoe_com_ct_obj_created'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['issue', 'created'], name='gumshoe_com_issue_created'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gumshoe', '0007_comment_issue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('issue', 'Issue'), ('comment', 'Comment')], max_length=16)),
+                ('object_id', models.PositiveIntegerField()),
+                ('issue_id', models.PositiveIntegerField(null=True)),
+                ('issue_key', models.CharField(blank=True, max_length=32)),
+                ('deleted', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated', 'issue'], name='gumshoe_com_updated_issue'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted', 'id'], name='gumshoe_tomb_deleted_id'),
+        ),
+    ]
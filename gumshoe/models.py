@@ -1,23 +1,41 @@
+import contextlib
 import datetime
+import threading
 
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
-from django.db.models.signals import m2m_changed
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.utils.timezone import utc
 
+from gumshoe import events, listcache, lookups, search
+
 
 class Comment(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.PROTECT)
     object_id = models.PositiveIntegerField()
     content = GenericForeignKey('content_type', 'object_id')
 
+    # The issue commented on, if content is one, so issue comments can be
+    # joined and filtered on a plain foreign key.  Kept in step with content
+    # by save.
+    issue = models.ForeignKey('Issue', null=True, blank=True, editable=False, db_index=False, on_delete=models.CASCADE,
+                              related_name='+')
+
     author = models.ForeignKey(User, on_delete=models.PROTECT)
     created = models.DateTimeField(null=False)
     updated = models.DateTimeField(null=False)
     text = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'created'], name='gumshoe_com_ct_obj_created'),
+            models.Index(fields=['issue', 'created'], name='gumshoe_com_issue_created'),
+            models.Index(fields=['updated', 'issue'], name='gumshoe_com_updated_issue'),
+        ]
+
     def __str__(self):
         return self.text
 
@@ -26,6 +44,16 @@ class Comment(models.Model):
             if self.pk is None:
                 self.created = datetime.datetime.utcnow().replace(tzinfo=utc)
             self.updated = datetime.datetime.utcnow().replace(tzinfo=utc)
+
+        issue_content_type = ContentType.objects.db_manager(kwds.get("using") or self._state.db).get_for_model(Issue)
+        if self.content_type_id is None and self.issue_id is not None:
+            # Created through the foreign key, e.g. by the issue admin.
+            self.content_type = issue_content_type
+            self.object_id = self.issue_id
+        elif self.content_type_id == issue_content_type.pk:
+            self.issue_id = self.object_id
+        else:
+            self.issue_id = None
         super(Comment, self).save(*args, **kwds)
 
 
@@ -33,9 +61,31 @@ class Project(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True, null=False)
     issue_key = models.CharField(max_length=16, unique=True)
+    issue_counter = models.PositiveIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwds):
+        if not self._state.adding and kwds.get("update_fields") is None:
+            # The counter is only ever moved by next_issue_keys, so a stale
+            # copy must not be written back over it.
+            kwds["update_fields"] = [f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != "issue_counter"]
+        super(Project, self).save(*args, **kwds)
 
     def next_issue_key(self):
-        return "{0}-{1}".format(self.issue_key, self.issue_set.count() + 1)
+        return self.next_issue_keys(1)[0]
+
+    def next_issue_keys(self, count):
+        """
+        Reserves ``count`` consecutive issue keys for this project.
+
+        The counter is bumped with a single ``UPDATE``, which holds the row
+        lock until the surrounding transaction ends, so concurrent creates
+        never see the same number.
+        """
+        with transaction.atomic(using=self._state.db):
+            Project.objects.filter(pk=self.pk).update(issue_counter=F("issue_counter") + count)
+            self.issue_counter = Project.objects.filter(pk=self.pk).values_list("issue_counter", flat=True).get()
+        first = self.issue_counter - count + 1
+        return ["{0}-{1}".format(self.issue_key, number) for number in range(first, self.issue_counter + 1)]
 
     def __str__(self):
         return self.name
@@ -135,13 +185,37 @@ class Issue(models.Model):
     resolution = models.CharField(max_length=32, choices=RESOLUTION_CHOICES, default='UNRESOLVED')
 
     comments = GenericRelation(Comment)
+    # Kept current by the comment signals below, so issue lists can show it
+    # without counting.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        # Built around the filter combinations the issue list sends: a set of
+        # projects and statuses (optionally an assignee or milestone) sorted
+        # by recency.  (project, last_updated) serves several statuses at
+        # once without sorting the joined rows.
+        indexes = [
+            models.Index(fields=['project', 'status', 'last_updated'], name='gumshoe_iss_proj_stat_upd'),
+            models.Index(fields=['project', 'last_updated'], name='gumshoe_iss_proj_upd'),
+            models.Index(fields=['assignee', 'status'], name='gumshoe_iss_assignee_stat'),
+            models.Index(fields=['milestone', 'status'], name='gumshoe_iss_milestone_stat'),
+            models.Index(fields=['status', 'last_updated'], name='gumshoe_iss_stat_upd'),
+            models.Index(fields=['last_updated', 'id'], name='gumshoe_iss_upd_id'),
+        ]
 
     def __str__(self):
         return "{0} - {1}".format(self.issue_key, self.summary)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        issue = super(Issue, cls).from_db(db, field_names, values)
+        # Moving an issue changes the lists of the project it leaves too.
+        issue._loaded_project_id = issue.__dict__.get("project_id")
+        return issue
+
     def full_clean(self, exclude=None, validate_unique=True):
-        exclude = exclude or []
-        exclude += ["issue_key"]
+        # Django passes a set, older code a list.
+        exclude = set(exclude or ()) | {"issue_key"}
         super(Issue, self).full_clean(exclude, validate_unique)
 
     def save(self, *args, **kwds):
@@ -153,12 +227,202 @@ class Issue(models.Model):
                 self.reported = datetime.datetime.utcnow().replace(tzinfo=utc)
             self.last_updated = datetime.datetime.utcnow().replace(tzinfo=utc)
 
+        if not self._state.adding and kwds.get("update_fields") is None:
+            # The comment count is only ever moved by the comment signals, so
+            # a stale copy must not be written back over it.
+            kwds["update_fields"] = [f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != "comment_count"]
+
         return super(Issue, self).save(*args, **kwds)
 
 
-def issue_update_timestamp(*args, **kwds):
-    if kwds.get("action") in {"post_add", "post_remove", "post_clear"}:
-        kwds["instance"].save()
+class BugzillaIssueMap(models.Model):
+    """
+    The issue each bugzilla bug was imported as.  Rows are written in the same
+    transaction as their issues, so they double as the checkpoint an
+    interrupted ``import_bugzilla`` resumes from.
+    """
+    bugzilla_id = models.IntegerField(primary_key=True)
+    issue = models.OneToOneField(Issue, on_delete=models.CASCADE, related_name="+")
+
+    def __str__(self):
+        return "{0} : {1}".format(self.bugzilla_id, self.issue_id)
+
+
+class Tombstone(models.Model):
+    """
+    Records a deleted issue or comment, so clients syncing changes since a
+    point in time learn about deletions too.
+    """
+    ISSUE = "issue"
+    COMMENT = "comment"
+    KIND_CHOICES = (
+        (ISSUE, "Issue"),
+        (COMMENT, "Comment"),
+    )
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    # The issue deleted, or the comment's issue, which may be gone as well.
+    issue_id = models.PositiveIntegerField(null=True)
+    issue_key = models.CharField(max_length=32, blank=True)
+    deleted = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted', 'id'], name='gumshoe_tomb_deleted_id'),
+        ]
+
+    def __str__(self):
+        return "{0} {1}".format(self.kind, self.object_id)
+
+
+class IssueTouchBatch(object):
+    """
+    Collects the issues whose ``last_updated`` needs bumping so they can all
+    be written with one ``UPDATE``.
+    """
+    def __init__(self, using=None):
+        self.using = using
+        self.issues = {}
+
+    def add(self, issue):
+        self.issues.setdefault(issue.pk, []).append(issue)
+
+    def add_pks(self, pks):
+        for pk in pks:
+            self.issues.setdefault(pk, [])
+
+    def flush(self):
+        if not self.issues:
+            return
+        timestamp = datetime.datetime.utcnow().replace(tzinfo=utc)
+        issues = Issue.objects.using(self.using).filter(pk__in=list(self.issues))
+        issues.update(last_updated=timestamp)
+        project_ids = {instance.project_id for instances in self.issues.values() for instance in instances}
+        if not all(self.issues.values()):
+            project_ids.update(issues.values_list("project_id", flat=True).distinct())
+        listcache.invalidate_issue_lists(project_ids, using=self.using or "default")
+        events.publish_events(
+            [events.issue_event(events.SAVED, pk, instances[0].issue_key if instances else None)
+             for pk, instances in self.issues.items()], using=self.using or "default")
+        for instances in self.issues.values():
+            for instance in instances:
+                instance.last_updated = timestamp
+        self.issues = {}
+
+
+_touch_batches = threading.local()
+
+
+@contextlib.contextmanager
+def batched_issue_touches(using=None):
+    """
+    Runs the block in a transaction and defers the ``last_updated`` bumps made
+    by relation changes inside it to a single ``UPDATE`` just before commit.
+
+    Nested blocks join the outermost batch.
+    """
+    batch = getattr(_touch_batches, "current", None)
+    if batch is not None:
+        with transaction.atomic(using=using):
+            yield batch
+        return
+
+    batch = _touch_batches.current = IssueTouchBatch(using)
+    try:
+        with transaction.atomic(using=using):
+            yield batch
+            batch.flush()
+    finally:
+        _touch_batches.current = None
+
+
+def touch_issues(issues=(), pks=(), using=None):
+    batch = getattr(_touch_batches, "current", None)
+    if batch is None:
+        batch = IssueTouchBatch(using)
+        batch_is_local = True
+    else:
+        batch_is_local = False
+
+    for issue in issues:
+        batch.add(issue)
+    batch.add_pks(pks)
+
+    if batch_is_local:
+        batch.flush()
+
+
+def issue_comment_count(sender, instance, signal, raw=False, using="default", **kwds):
+    if signal is post_save:
+        if raw or not kwds["created"]:
+            return
+        delta = 1
+    else:
+        delta = -1
+    if instance.issue_id is not None:
+        Issue.objects.using(using).filter(pk=instance.issue_id).update(comment_count=F("comment_count") + delta)
+
+
+def record_tombstone(sender, instance, using="default", **kwds):
+    timestamp = datetime.datetime.utcnow().replace(tzinfo=utc)
+    if isinstance(instance, Issue):
+        tombstone = Tombstone(kind=Tombstone.ISSUE, object_id=instance.pk, issue_id=instance.pk, issue_key=instance.issue_key)
+    else:
+        tombstone = Tombstone(kind=Tombstone.COMMENT, object_id=instance.pk, issue_id=instance.issue_id)
+    tombstone.deleted = timestamp
+    tombstone.save(using=using)
+
+
+def issue_update_timestamp(sender, instance, action, reverse, model, pk_set, using="default", **kwds):
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+    if isinstance(instance, Issue):
+        touch_issues(issues=[instance], using=using)
+    elif model is Issue and pk_set:
+        touch_issues(pks=pk_set, using=using)
 
 
 m2m_changed.connect(issue_update_timestamp, dispatch_uid="gumshoe.models.issue_update_timestamp")
+
+post_save.connect(search.index_issue, sender=Issue, dispatch_uid="gumshoe.search.index_issue")
+post_delete.connect(search.unindex_issue, sender=Issue, dispatch_uid="gumshoe.search.unindex_issue")
+post_save.connect(search.index_comment_issue, sender=Comment, dispatch_uid="gumshoe.search.index_comment_issue.save")
+post_delete.connect(search.index_comment_issue, sender=Comment, dispatch_uid="gumshoe.search.index_comment_issue.delete")
+
+post_save.connect(issue_comment_count, sender=Comment, dispatch_uid="gumshoe.models.issue_comment_count.save")
+post_delete.connect(issue_comment_count, sender=Comment, dispatch_uid="gumshoe.models.issue_comment_count.delete")
+
+post_delete.connect(record_tombstone, sender=Issue, dispatch_uid="gumshoe.models.record_tombstone.issue")
+post_delete.connect(record_tombstone, sender=Comment, dispatch_uid="gumshoe.models.record_tombstone.comment")
+
+post_save.connect(events.publish_issue, sender=Issue, dispatch_uid="gumshoe.events.publish_issue.save")
+post_delete.connect(events.publish_issue, sender=Issue, dispatch_uid="gumshoe.events.publish_issue.delete")
+post_save.connect(events.publish_comment, sender=Comment, dispatch_uid="gumshoe.events.publish_comment.save")
+post_delete.connect(events.publish_comment, sender=Comment, dispatch_uid="gumshoe.events.publish_comment.delete")
+
+post_save.connect(lookups.invalidate_lookup_table, sender=Priority, dispatch_uid="gumshoe.lookups.priority.save")
+post_delete.connect(lookups.invalidate_lookup_table, sender=Priority, dispatch_uid="gumshoe.lookups.priority.delete")
+post_save.connect(lookups.invalidate_lookup_table, sender=IssueType, dispatch_uid="gumshoe.lookups.issuetype.save")
+post_delete.connect(lookups.invalidate_lookup_table, sender=IssueType, dispatch_uid="gumshoe.lookups.issuetype.delete")
+post_save.connect(lookups.invalidate_lookup_table, sender=Project, dispatch_uid="gumshoe.lookups.project.save")
+post_delete.connect(lookups.invalidate_lookup_table, sender=Project, dispatch_uid="gumshoe.lookups.project.delete")
+
+post_save.connect(listcache.invalidate_issue, sender=Issue, dispatch_uid="gumshoe.listcache.issue.save")
+post_delete.connect(listcache.invalidate_issue, sender=Issue, dispatch_uid="gumshoe.listcache.issue.delete")
+post_save.connect(listcache.invalidate_comment_issue, sender=Comment, dispatch_uid="gumshoe.listcache.comment.save")
+post_delete.connect(listcache.invalidate_comment_issue, sender=Comment, dispatch_uid="gumshoe.listcache.comment.delete")
+post_save.connect(listcache.invalidate_project_issues, sender=Component, dispatch_uid="gumshoe.listcache.component.save")
+post_delete.connect(listcache.invalidate_project_issues, sender=Component, dispatch_uid="gumshoe.listcache.component.delete")
+post_save.connect(listcache.invalidate_project_issues, sender=Version, dispatch_uid="gumshoe.listcache.version.save")
+post_delete.connect(listcache.invalidate_project_issues, sender=Version, dispatch_uid="gumshoe.listcache.version.delete")
+post_save.connect(listcache.invalidate_all, sender=Project, dispatch_uid="gumshoe.listcache.project.save")
+post_delete.connect(listcache.invalidate_all, sender=Project, dispatch_uid="gumshoe.listcache.project.delete")
+post_save.connect(listcache.invalidate_all, sender=Milestone, dispatch_uid="gumshoe.listcache.milestone.save")
+post_delete.connect(listcache.invalidate_all, sender=Milestone, dispatch_uid="gumshoe.listcache.milestone.delete")
+post_save.connect(listcache.invalidate_all, sender=User, dispatch_uid="gumshoe.listcache.user.save")
+post_delete.connect(listcache.invalidate_all, sender=User, dispatch_uid="gumshoe.listcache.user.delete")
+post_save.connect(listcache.invalidate_all, sender=Priority, dispatch_uid="gumshoe.listcache.priority.save")
+post_delete.connect(listcache.invalidate_all, sender=Priority, dispatch_uid="gumshoe.listcache.priority.delete")
+post_save.connect(listcache.invalidate_all, sender=IssueType, dispatch_uid="gumshoe.listcache.issuetype.save")
+post_delete.connect(listcache.invalidate_all, sender=IssueType, dispatch_uid="gumshoe.listcache.issuetype.delete")
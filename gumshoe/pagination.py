@@ -0,0 +1,214 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def keyset_ordering(model, ordering, annotations=None):
+    """
+    Expands an ``order_by`` list into the concrete, non-null fields the rows
+    are actually sorted on, with the primary key appended as a tie breaker.
+
+    Ordering on a relation sorts by the related model's default ordering, so
+    ``priority`` becomes ``-priority__weight``.
+
+    :param model: The model being paginated.
+    :param ordering: The ``order_by`` arguments of the queryset.
+    :param annotations: The queryset's annotations, which may also be ordered on.
+
+    :return: Returns a list of (lookup path, field, descending) tuples.
+    """
+    annotations = annotations or {}
+    expanded = []
+    for item in ordering:
+        name = item.lstrip("-") if isinstance(item, str) else None
+        if name in annotations:
+            expanded.append((name, annotations[name].output_field, item.startswith("-")))
+        else:
+            expanded += _expand_ordering_item(model, item)
+
+    if not any(path in ("pk", model._meta.pk.name) for path, _, _ in expanded):
+        expanded.append(("pk", model._meta.pk, False))
+    return expanded
+
+
+def _expand_ordering_item(model, item, prefix=""):
+    if not isinstance(item, str) or item == "?":
+        raise ValidationError("Cursor pagination cannot be ordered by {0!r}.".format(item))
+
+    descending = item.startswith("-")
+    name = item.lstrip("-")
+    if name == "pk":
+        return [(prefix + "pk", model._meta.pk, descending)]
+
+    field = None
+    current_model = model
+    for part in name.split("__"):
+        try:
+            field = current_model._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise ValidationError("Cannot order by unknown field {0!r}.".format(name))
+        if field.null or field.many_to_many or field.one_to_many:
+            raise ValidationError("Cursor pagination cannot be ordered by {0!r}.".format(name))
+        if field.is_relation:
+            current_model = field.related_model
+
+    if not field.is_relation:
+        return [(prefix + name, field, descending)]
+
+    related_ordering = current_model._meta.ordering or ["pk"]
+    expanded = []
+    for related_item in related_ordering:
+        for path, related_field, related_descending in _expand_ordering_item(current_model, related_item, prefix + name + "__"):
+            expanded.append((path, related_field, related_descending != descending))
+    return expanded
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """
+    Builds the ``Q`` selecting the rows that come after ``values`` in
+    ``ordering``, or before them when ``reverse`` is set.
+    """
+    condition = None
+    for index, (path, _, descending) in enumerate(ordering):
+        lookup = "lt" if descending != reverse else "gt"
+        clause = Q(**{"{0}__{1}".format(path, lookup): values[index]})
+        for previous_index, (previous_path, _, _) in enumerate(ordering[:index]):
+            clause &= Q(**{previous_path: values[previous_index]})
+        condition = clause if condition is None else condition | clause
+
+    # A redundant range on the leading column lets the database seek on an
+    # index instead of evaluating the OR for every row.
+    path, _, descending = ordering[0]
+    leading_lookup = "lte" if descending != reverse else "gte"
+    return Q(**{"{0}__{1}".format(path, leading_lookup): values[0]}) & condition
+
+
+def estimate_count(queryset):
+    """
+    Asks the query planner for the number of rows ``queryset`` will return.
+
+    Returns None if the database backend cannot provide an estimate.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor based pagination over the queryset's own ordering.
+
+    Pages are selected with a ``WHERE`` on the ordering columns rather than an
+    ``OFFSET``, and the total is only computed when asked for through the
+    ``count`` parameter (``exact`` or ``estimate``).
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), "page")
+
+        ordering = queryset.query.order_by
+        if not ordering and queryset.query.default_ordering:
+            ordering = queryset.model._meta.ordering
+        self.ordering = keyset_ordering(queryset.model, ordering, queryset.query.annotations)
+
+        self.count = self.get_count(queryset)
+
+        position, reverse = self.decode_cursor(request)
+
+        order_by = [("-" if descending != reverse else "") + path for path, _, descending in self.ordering]
+        queryset = queryset.order_by(*order_by)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_count(self, queryset):
+        count_param = self.request.query_params.get(self.count_query_param)
+        if count_param == "exact":
+            return queryset.count()
+        if count_param == "estimate":
+            return estimate_count(queryset)
+        return None
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            values = cursor["v"]
+            reverse = bool(cursor.get("r", False))
+            if len(values) != len(self.ordering):
+                raise ValueError(values)
+            position = [field.to_python(value) for (_, field, _), value in zip(self.ordering, values)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        values = [self.get_position_value(instance, path) for path, _, _ in self.ordering]
+        cursor = {"v": values}
+        if reverse:
+            cursor["r"] = True
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor, default=str).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_position_value(self, instance, path):
+        value = instance
+        for part in path.split("__"):
+            value = getattr(value, part)
+        return value
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("count", self.count),
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
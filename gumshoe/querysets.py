@@ -0,0 +1,78 @@
+import functools
+
+from django.core.exceptions import FieldDoesNotExist
+
+
+@functools.lru_cache(maxsize=None)
+def relation_paths(model, serializer_class, prefix=""):
+    """
+    Works out which relations a serializer will touch when representing
+    instances of ``model``.
+
+    :param model: The model class being serialized.
+    :param serializer_class: The serializer class used to represent the model.
+    :param prefix: Lookup prefix used when recursing into nested serializers.
+
+    :return: Returns a tuple of (select_related, prefetch_related) lookups.
+    """
+    select_related = []
+    prefetch_related = []
+
+    for name, field in serializer_class().fields.items():
+        if field.write_only or not getattr(field, "eager_load", True):
+            continue
+
+        source = field.source or name
+        if source == "*" or "." in source:
+            continue
+
+        model_field = _model_field(model, source)
+        if model_field is None or not model_field.is_relation:
+            continue
+
+        lookup = prefix + source
+        if model_field.many_to_one or model_field.one_to_one:
+            select_related.append(lookup)
+            nested_serializer_class = _nested_serializer_class(field)
+            if nested_serializer_class is not None:
+                nested_select, nested_prefetch = relation_paths(model_field.related_model, nested_serializer_class, lookup + "__")
+                select_related.extend(nested_select)
+                prefetch_related.extend(nested_prefetch)
+        else:
+            prefetch_related.append(lookup)
+
+    return tuple(select_related), tuple(prefetch_related)
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        pass
+
+    # Reverse relations are usually reached through their accessor,
+    # e.g. ``component_set`` rather than ``component``.
+    for related_object in model._meta.related_objects:
+        if related_object.get_accessor_name() == name:
+            return related_object
+    return None
+
+
+def _nested_serializer_class(field):
+    child = getattr(field, "child", field)
+    if hasattr(child, "fields"):
+        return type(child)
+    return None
+
+
+def eager_load(queryset, serializer_class):
+    """
+    Applies the select_related/prefetch_related calls needed to serialize
+    ``queryset`` with ``serializer_class`` in a fixed number of queries.
+    """
+    select_related, prefetch_related = relation_paths(queryset.model, serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
@@ -1,37 +1,136 @@
+import codecs
+import functools
+import io
 import re
 
+from django.conf import settings
 from rest_framework import renderers, parsers
 
+from gumshoe.encoders import get_json_backend
+
 camel_case_to_snake_case_regex = re.compile('((?<=[a-z0-9])[A-Z]|(?!^)[A-Z](?=[a-z]))')
 camel_case_to_snake_case_substitution_pattern = r'_\1'
 
+# Responses use a small, fixed set of keys, but parsed request bodies can
+# contain anything, so the key translation caches are bounded.
+KEY_CACHE_SIZE = 1024
+
 
+@functools.lru_cache(maxsize=KEY_CACHE_SIZE)
 def snake_case_to_camel_case(key):
     components = key.split("_")
     return components[0] + "".join([c.capitalize() for c in components[1:]])
 
 
+@functools.lru_cache(maxsize=KEY_CACHE_SIZE)
 def camel_case_to_snake_case(key):
     return camel_case_to_snake_case_regex.sub(camel_case_to_snake_case_substitution_pattern, key).lower()
 
 
+class CamelCaseDict(dict):
+    """
+    A mapping whose keys, and the keys of everything below it, are already
+    camelCase, so ``do_transform`` passes it through untouched.
+    """
+
+
+SCALAR, CONVERTED, MAPPING, SEQUENCE = range(4)
+CONTAINERS = (MAPPING, SEQUENCE)
+
+_type_kinds = {
+    CamelCaseDict: CONVERTED,
+    str: SCALAR,
+    int: SCALAR,
+    float: SCALAR,
+    bool: SCALAR,
+    type(None): SCALAR,
+    dict: MAPPING,
+    list: SEQUENCE,
+    tuple: SEQUENCE,
+}
+
+
+def type_kind(data_type):
+    kind = _type_kinds.get(data_type)
+    if kind is None:
+        if issubclass(data_type, str):
+            kind = SCALAR
+        elif hasattr(data_type, "items"):
+            kind = MAPPING
+        elif hasattr(data_type, "__iter__"):
+            kind = SEQUENCE
+        else:
+            kind = SCALAR
+        _type_kinds[data_type] = kind
+    return kind
+
+
 def do_transform(data, transformer):
-    if isinstance(data, str):
+    """
+    Returns a copy of data with every mapping key passed through transformer.
+    Mappings become dicts and other iterables, except strings, become lists.
+
+    The tree is walked with an explicit stack rather than recursion, and each
+    node is classified by a lookup on its type.  A CamelCaseDict is returned
+    as is.
+    """
+    kind = type_kind(type(data))
+    if kind not in CONTAINERS:
         return data
-    elif hasattr(data, "items"):
-        return {transformer(k): do_transform(v, transformer) for k, v in data.items()}
-    elif hasattr(data, "__iter__"):
-        return [do_transform(i, transformer) for i in data]
-    return data
+
+    root = [None]
+    stack = [(data, kind, root, 0)]
+    while stack:
+        value, kind, parent, slot = stack.pop()
+        if kind == MAPPING:
+            result = {}
+            for k, v in value.items():
+                k = transformer(k)
+                v_kind = type_kind(type(v))
+                result[k] = v
+                if v_kind in CONTAINERS:
+                    stack.append((v, v_kind, result, k))
+        else:
+            result = list(value)
+            for i, v in enumerate(result):
+                v_kind = type_kind(type(v))
+                if v_kind in CONTAINERS:
+                    stack.append((v, v_kind, result, i))
+        parent[slot] = result
+    return root[0]
 
 
 class CaseConvertingJSONRenderer(renderers.JSONRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None):
         data = do_transform(data, transformer=snake_case_to_camel_case)
+
+        backend = get_json_backend()
+        if (backend.accelerated and data is not None and self.compact and not self.ensure_ascii
+                and self.get_indent(accepted_media_type, renderer_context or {}) is None):
+            try:
+                ret = backend.dumps(data)
+            except (TypeError, ValueError, OverflowError):
+                pass
+            else:
+                # Same escaping as the DRF renderer, so the output stays a
+                # strict JavaScript subset.
+                return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
         return super(CaseConvertingJSONRenderer, self).render(data, accepted_media_type, renderer_context)
 
 
 class CaseConvertingJSONParser(parsers.JSONParser):
     def parse(self, stream, media_type=None, parser_context=None):
-        res = super(CaseConvertingJSONParser, self).parse(stream, media_type, parser_context)
+        backend = get_json_backend()
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if backend.accelerated and codecs.lookup(encoding).name == "utf-8":
+            content = stream.read()
+            try:
+                res = backend.loads(content)
+            except (ValueError, OverflowError):
+                # Let the standard parser produce the error, or handle what
+                # the backend doesn't, e.g. integers beyond 64 bits.
+                res = super(CaseConvertingJSONParser, self).parse(io.BytesIO(content), media_type, parser_context)
+        else:
+            res = super(CaseConvertingJSONParser, self).parse(stream, media_type, parser_context)
         return do_transform(res, transformer=camel_case_to_snake_case)
@@ -0,0 +1,264 @@
+import abc
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils.module_loading import import_string
+
+INDEXED_FIELDS = ("summary", "description")
+
+search_terms_pattern = re.compile(r"\w+")
+
+
+def search_words(terms):
+    return search_terms_pattern.findall(terms or "")
+
+
+class SearchBackend(abc.ABC):
+    """
+    Base class for the issue search backends.
+
+    A backend keeps a full text index of each issue's summary, description
+    and comments and turns the ``terms`` of an issue search into a filter and
+    a relevance ranking.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    @abc.abstractmethod
+    def search_filter(self, terms):
+        pass
+
+    def search_rank(self, terms):
+        return Value(0.0, output_field=FloatField())
+
+    def index_issue(self, issue):
+        pass
+
+    def index_issues(self, issues):
+        for issue in issues:
+            self.index_issue(issue)
+
+    def get_documents(self, issues):
+        """
+        Same as get_document for many issues, fetching their comments in a
+        single query.
+        """
+        if not issues:
+            return []
+        comment_model = issues[0]._meta.get_field("comments").related_model
+        content_type = ContentType.objects.get_for_model(issues[0])
+        comments = defaultdict(list)
+        rows = comment_model.objects.filter(content_type=content_type, object_id__in=[issue.pk for issue in issues])
+        for object_id, text in rows.order_by("pk").values_list("object_id", "text"):
+            comments[object_id].append(text)
+        return [[getattr(issue, field) or "" for field in INDEXED_FIELDS] + [" ".join(comments[issue.pk])] for issue in issues]
+
+    def remove_issue(self, issue_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def get_document(self, issue):
+        comments = " ".join(issue.comments.values_list("text", flat=True))
+        return [getattr(issue, field) or "" for field in INDEXED_FIELDS] + [comments]
+
+
+class LikeSearchBackend(SearchBackend):
+    """
+    Fallback for databases without a supported full text engine.  Every word
+    has to appear somewhere in the summary or description.
+    """
+    def search_filter(self, terms):
+        query = Q()
+        for word in search_words(terms):
+            query &= Q(summary__icontains=word) | Q(description__icontains=word)
+        return query
+
+
+class SqliteSearchBackend(SearchBackend):
+    """
+    SQLite FTS5 backend.  The index is the ``gumshoe_issue_fts`` virtual
+    table, keyed on the issue's id.
+    """
+    table_name = "gumshoe_issue_fts"
+
+    def match_expression(self, terms):
+        words = search_words(terms)
+        if not words:
+            return None
+        # Quoting each word keeps FTS5 syntax in the terms from being
+        # interpreted, and the last word is a prefix so searches work while
+        # the user is still typing.
+        return " ".join('"{0}"'.format(word) for word in words) + "*"
+
+    def search_filter(self, terms):
+        match = self.match_expression(terms)
+        if match is None:
+            return Q()
+        return Q(pk__in=RawSQL("SELECT rowid FROM {0} WHERE {0} MATCH %s".format(self.table_name), [match]))
+
+    def search_rank(self, terms):
+        match = self.match_expression(terms)
+        if match is None:
+            return super(SqliteSearchBackend, self).search_rank(terms)
+        # bm25() is negative and lower is better.
+        rank = RawSQL(
+            "SELECT -bm25({0}) FROM {0} WHERE {0} MATCH %s AND rowid = gumshoe_issue.id".format(self.table_name),
+            [match], output_field=FloatField())
+        return Coalesce(rank, Value(0.0, output_field=FloatField()))
+
+    def index_issue(self, issue):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM {0} WHERE rowid = %s".format(self.table_name), [issue.pk])
+            cursor.execute(
+                "INSERT INTO {0} (rowid, summary, description, comments) VALUES (%s, %s, %s, %s)".format(self.table_name),
+                [issue.pk] + self.get_document(issue))
+
+    def index_issues(self, issues):
+        documents = self.get_documents(issues)
+        with self.connection.cursor() as cursor:
+            cursor.executemany("DELETE FROM {0} WHERE rowid = %s".format(self.table_name), [[issue.pk] for issue in issues])
+            cursor.executemany(
+                "INSERT INTO {0} (rowid, summary, description, comments) VALUES (%s, %s, %s, %s)".format(self.table_name),
+                [[issue.pk] + document for issue, document in zip(issues, documents)])
+
+    def remove_issue(self, issue_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM {0} WHERE rowid = %s".format(self.table_name), [issue_id])
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM {0}".format(self.table_name))
+            cursor.execute("""
+                INSERT INTO {0} (rowid, summary, description, comments)
+                SELECT i.id, i.summary, i.description,
+                       COALESCE((SELECT group_concat(c.text, ' ')
+                                 FROM gumshoe_comment c
+                                 JOIN django_content_type ct ON c.content_type_id = ct.id
+                                 WHERE ct.app_label = 'gumshoe' AND ct.model = 'issue' AND c.object_id = i.id), '')
+                FROM gumshoe_issue i
+            """.format(self.table_name))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    PostgreSQL backend.  Documents are stored as a weighted ``tsvector`` in
+    ``gumshoe_issue_search``, which has a GIN index on the vector.
+    """
+    table_name = "gumshoe_issue_search"
+    config = "english"
+
+    document_sql = """
+        setweight(to_tsvector('{config}', %s), 'A') ||
+        setweight(to_tsvector('{config}', %s), 'B') ||
+        setweight(to_tsvector('{config}', %s), 'C')
+    """
+
+    def tsquery(self, terms):
+        words = search_words(terms)
+        if not words:
+            return None
+        return " & ".join(words) + ":*"
+
+    def search_filter(self, terms):
+        tsquery = self.tsquery(terms)
+        if tsquery is None:
+            return Q()
+        return Q(pk__in=RawSQL(
+            "SELECT issue_id FROM {0} WHERE document @@ to_tsquery('{1}', %s)".format(self.table_name, self.config),
+            [tsquery]))
+
+    def search_rank(self, terms):
+        tsquery = self.tsquery(terms)
+        if tsquery is None:
+            return super(PostgresSearchBackend, self).search_rank(terms)
+        rank = RawSQL(
+            "SELECT ts_rank(document, to_tsquery('{1}', %s)) FROM {0} WHERE issue_id = gumshoe_issue.id".format(self.table_name, self.config),
+            [tsquery], output_field=FloatField())
+        return Coalesce(rank, Value(0.0, output_field=FloatField()))
+
+    upsert_sql = """
+        INSERT INTO {0} (issue_id, document) VALUES (%s, {1})
+        ON CONFLICT (issue_id) DO UPDATE SET document = EXCLUDED.document
+    """
+
+    def index_issue(self, issue):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.upsert_sql.format(self.table_name, self.document_sql.format(config=self.config)),
+                [issue.pk] + self.get_document(issue))
+
+    def index_issues(self, issues):
+        documents = self.get_documents(issues)
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                self.upsert_sql.format(self.table_name, self.document_sql.format(config=self.config)),
+                [[issue.pk] + document for issue, document in zip(issues, documents)])
+
+    def remove_issue(self, issue_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM {0} WHERE issue_id = %s".format(self.table_name), [issue_id])
+
+    def rebuild(self):
+        document_sql = self.document_sql.format(config=self.config).replace("%s", "{}")
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM {0}".format(self.table_name))
+            cursor.execute("""
+                INSERT INTO {0} (issue_id, document)
+                SELECT i.id, {1}
+                FROM gumshoe_issue i
+            """.format(self.table_name, document_sql.format(
+                "i.summary", "i.description",
+                """COALESCE((SELECT string_agg(c.text, ' ')
+                             FROM gumshoe_comment c
+                             JOIN django_content_type ct ON c.content_type_id = ct.id
+                             WHERE ct.app_label = 'gumshoe' AND ct.model = 'issue' AND c.object_id = i.id), '')""")))
+
+
+default_search_backends = {
+    "sqlite": SqliteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(using="default"):
+    connection = connections[using]
+    backend_path = getattr(settings, "GUMSHOE_SEARCH_BACKEND", None)
+    if backend_path:
+        backend_class = import_string(backend_path)
+    else:
+        backend_class = default_search_backends.get(connection.vendor, LikeSearchBackend)
+    return backend_class(connection)
+
+
+#####################################
+#  Signal handlers
+#####################################
+
+def index_issue(sender, instance, raw=False, update_fields=None, using="default", **kwds):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    get_search_backend(using).index_issue(instance)
+
+
+def unindex_issue(sender, instance, using="default", **kwds):
+    get_search_backend(using).remove_issue(instance.pk)
+
+
+def index_comment_issue(sender, instance, raw=False, using="default", **kwds):
+    if raw:
+        return
+    content_type = instance.content_type
+    if content_type.app_label == "gumshoe" and content_type.model == "issue":
+        issue = instance.content
+        if issue is not None:
+            get_search_backend(using).index_issue(issue)
@@ -1,11 +1,58 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 
+from gumshoe import lookups
 from gumshoe.fields import UnixtimeField, PkListField, PkField, IssueTypeField, PriorityField
-from gumshoe.models import Version, Component, Priority, IssueType, Issue, Project, Milestone, Comment
-
-
-class ComponentSerializer (serializers.HyperlinkedModelSerializer):
+from gumshoe.models import Version, Component, Priority, Issue, Project, Milestone, Comment, Tombstone
+from gumshoe.renderers import CONTAINERS, CamelCaseDict, do_transform, snake_case_to_camel_case, type_kind
+
+
+class CamelCaseSerializerMixin(object):
+    """
+    Builds the representation with camelCase keys directly, as a CamelCaseDict
+    the renderer passes through without converting it again.
+
+    The camelCase name of each field is worked out once per serializer class.
+    Nested serializers using this mixin are already converted; any other
+    mapping a field returns, e.g. from a SerializerMethodField, is converted
+    here.
+    """
+    def camel_case_field_names(self):
+        cls = type(self)
+        names = cls.__dict__.get("_camel_case_field_names")
+        if names is None:
+            names = {}
+            setattr(cls, "_camel_case_field_names", names)
+        return names
+
+    def to_representation(self, instance):
+        names = self.camel_case_field_names()
+        ret = CamelCaseDict()
+        for field in self._readable_fields:
+            key = names.get(field.field_name)
+            if key is None:
+                key = names[field.field_name] = snake_case_to_camel_case(field.field_name)
+
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            if check_for_none is None:
+                ret[key] = None
+                continue
+
+            value = field.to_representation(attribute)
+            if type_kind(type(value)) in CONTAINERS:
+                value = do_transform(value, snake_case_to_camel_case)
+            ret[key] = value
+        return ret
+
+
+class ComponentSerializer(CamelCaseSerializerMixin, serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="components_detail", lookup_field="pk")
 
     class Meta:
@@ -13,13 +60,13 @@ class ComponentSerializer (serializers.HyperlinkedModelSerializer):
         fields = ('id', 'url', 'name', 'description')
 
 
-class PrioritySerializer(serializers.ModelSerializer):
+class PrioritySerializer(CamelCaseSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Priority
         fields = ('id', 'name', 'short_name', 'weight')
 
 
-class VersionSerializer(serializers.HyperlinkedModelSerializer):
+class VersionSerializer(CamelCaseSerializerMixin, serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="versions_detail", lookup_field="pk")
 
     class Meta:
@@ -28,7 +75,7 @@ class VersionSerializer(serializers.HyperlinkedModelSerializer):
         lookup_field = "versions_detail"
 
 
-class ProjectSerializer (serializers.HyperlinkedModelSerializer):
+class ProjectSerializer(CamelCaseSerializerMixin, serializers.HyperlinkedModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="project-detail", lookup_field="pk")
     components = ComponentSerializer(many=True, source="component_set", read_only=True)
     versions = VersionSerializer(many=True, source="version_set", read_only=True)
@@ -38,10 +85,10 @@ class ProjectSerializer (serializers.HyperlinkedModelSerializer):
     resolutions = serializers.SerializerMethodField()
 
     def get_priorities(self, obj):
-        return PrioritySerializer(list(Priority.objects.all()), many=True).data
+        return PrioritySerializer(lookups.priorities.all(), many=True).data
 
     def get_issue_types(self, obj):
-        return [issue_type.short_name for issue_type in IssueType.objects.all()]
+        return [issue_type.short_name for issue_type in lookups.issue_types.all()]
 
     def get_resolutions(self, obj):
         return [resolution[0] for resolution in Issue.RESOLUTION_CHOICES]
@@ -54,20 +101,20 @@ class ProjectSerializer (serializers.HyperlinkedModelSerializer):
         fields = ('id', 'url', 'name', 'description', 'issue_key', 'components', 'versions', 'priorities', 'issue_types', 'resolutions', 'statuses')
 
 
-class MilestoneSerializer(serializers.ModelSerializer):
+class MilestoneSerializer(CamelCaseSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Milestone
         fields = ("id", "name", "description")
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CamelCaseSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'first_name', 'last_name', 'email')
         read_only_fields = ('id', 'username', 'first_name', 'last_name')
 
 
-class CommentSerializer(serializers.Serializer):
+class CommentSerializer(CamelCaseSerializerMixin, serializers.Serializer):
     url = serializers.HyperlinkedIdentityField(view_name="comment-detail", lookup_field="pk")
     author = UserSerializer(read_only=True)
     created = UnixtimeField(read_only=True, millis=True)
@@ -88,7 +135,7 @@ class CommentSerializer(serializers.Serializer):
         return self._restore_comment(validated_data, instance)
 
 
-class IssueSerializer(serializers.Serializer):
+class IssueSerializer(CamelCaseSerializerMixin, serializers.Serializer):
     id = serializers.IntegerField(source="pk", required=False)
     url = serializers.HyperlinkedIdentityField(view_name="issue-detail", lookup_field="issue_key")
     summary = serializers.CharField()
@@ -113,6 +160,7 @@ class IssueSerializer(serializers.Serializer):
     milestone = MilestoneSerializer(required=False, read_only=True)
 
     comments_url = serializers.SerializerMethodField()
+    comment_count = serializers.IntegerField(read_only=True)
 
     def _restore_issue(self, attrs, issue=None):
         issue.summary = attrs.get("summary") or issue.summary
@@ -150,3 +198,12 @@ class IssueSerializer(serializers.Serializer):
 
     def update(self, instance, validated_data):
         return self._restore_issue(validated_data, instance)
+
+
+class TombstoneSerializer(CamelCaseSerializerMixin, serializers.ModelSerializer):
+    id = serializers.IntegerField(source="object_id")
+    deleted = UnixtimeField(millis=True)
+
+    class Meta:
+        model = Tombstone
+        fields = ("kind", "id", "issue_id", "issue_key", "deleted")
@@ -0,0 +1,33 @@
+"""
+ASGI config for the standalone tracker.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+e.g. for ``uvicorn gumshoe.standalone.asgi:application``.  It serves the event
+stream, and the read-heavy REST endpoints with async views that wait on the
+database from a thread pool rather than holding a worker each.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gumshoe.standalone.settings")
+
+import django
+from django.core.handlers.asgi import ASGIHandler
+
+from gumshoe.standalone.middleware import DisconnectMiddleware
+
+
+class StandaloneASGIHandler(ASGIHandler):
+    urlconf = "gumshoe.standalone.asgi_urls"
+
+    def create_request(self, scope, body_file):
+        request, error_response = super(StandaloneASGIHandler, self).create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+application = DisconnectMiddleware(StandaloneASGIHandler())
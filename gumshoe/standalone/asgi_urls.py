@@ -0,0 +1,7 @@
+from django.urls import include, re_path
+
+from gumshoe.standalone.urls import urlpatterns as wsgi_urlpatterns
+from gumshoe.urls import async_rest_urlpatterns
+
+# The async read endpoints come first; everything else is served as under WSGI.
+urlpatterns = [re_path(r'^rest/', include(async_rest_urlpatterns))] + wsgi_urlpatterns
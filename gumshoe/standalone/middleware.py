@@ -1,13 +1,52 @@
+import asyncio
 import traceback
 
+from django.utils.deprecation import MiddlewareMixin
 
-class ExceptionLoggerMiddleware(object):
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        return self.get_response(request)
 
+class ExceptionLoggerMiddleware(MiddlewareMixin):
+    # A sync only middleware would send every ASGI request through the one
+    # thread Django runs sync code on.
     def process_exception(self, request, exception):
         print(exception)
         print(traceback.format_exc())
+
+
+class DisconnectMiddleware(object):
+    """
+    ASGI middleware cancelling a request once its client disconnects.
+
+    Django 4.2 stops listening to the client after reading the request body,
+    so a streaming response, e.g. the event stream, would otherwise run on
+    after its client has gone.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        body_read = asyncio.Event()
+
+        async def receive_body():
+            message = await receive()
+            if message["type"] != "http.request" or not message.get("more_body", False):
+                body_read.set()
+            return message
+
+        async def watch():
+            await body_read.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            request.cancel()
+
+        request = asyncio.ensure_future(self.app(scope, receive_body, send))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await request
+        except asyncio.CancelledError:
+            if not watcher.done():
+                raise
+        finally:
+            watcher.cancel()
@@ -83,6 +83,8 @@ ROOT_URLCONF = 'gumshoe.standalone.urls'
 
 WSGI_APPLICATION = 'gumshoe.standalone.wsgi.application'
 
+ASGI_APPLICATION = 'gumshoe.standalone.asgi.application'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -0,0 +1,119 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.timezone import utc
+from rest_framework.exceptions import ValidationError
+
+from gumshoe.models import Comment, Issue, Tombstone
+
+# Changes are merged into one sequence ordered by (time, rank, id), with the
+# issues changed at a given time before the deletions made at that time.
+ISSUE_RANK = 0
+TOMBSTONE_RANK = 1
+
+
+def sync_lag():
+    """
+    How far behind the present a returned high-water mark is held, so
+    changes from transactions that commit late are still picked up.
+    """
+    return datetime.timedelta(seconds=getattr(settings, "GUMSHOE_SYNC_LAG", 5))
+
+
+def encode_mark(mark):
+    timestamp, rank, pk = mark
+    value = json.dumps({"t": timestamp.isoformat(), "r": rank, "i": pk})
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def decode_mark(encoded):
+    try:
+        value = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+        timestamp = models.DateTimeField().to_python(value["t"])
+        rank = int(value["r"])
+        pk = int(value["i"])
+        if timestamp is None or rank not in (ISSUE_RANK, TOMBSTONE_RANK):
+            raise ValueError(value)
+    except Exception:
+        raise ValidationError({"since": ["Invalid high-water mark."]})
+    return timestamp, rank, pk
+
+
+def after_mark(time_field, rank, mark):
+    """
+    Builds the ``Q`` selecting the rows of the given rank whose
+    (``time_field``, rank, pk) comes after ``mark``.
+    """
+    timestamp, mark_rank, pk = mark
+    if rank < mark_rank:
+        return Q(**{time_field + "__gt": timestamp})
+    if rank > mark_rank:
+        return Q(**{time_field + "__gte": timestamp})
+    return Q(**{time_field + "__gt": timestamp}) | Q(**{time_field: timestamp, "pk__gt": pk})
+
+
+def changed_issues(mark, issues=None):
+    """
+    Returns the issues changed after ``mark``, annotated with ``changed``:
+    the later of their ``last_updated`` and their comments' ``updated``.
+
+    :param issues: The queryset to filter, e.g. with its relations eager
+                   loaded.  Defaults to all issues.
+    """
+    issues = Issue.objects.all() if issues is None else issues
+    timestamp = mark[0]
+    last_comment_update = Subquery(
+        Comment.objects.filter(issue=OuterRef("pk")).order_by().values("issue").annotate(updated=Max("updated")).values("updated"))
+
+    # Narrow down to the candidates with the issue and comment timestamp
+    # indexes before computing the change time of each.
+    candidates = Q(last_updated__gte=timestamp) | Q(
+        pk__in=Comment.objects.filter(updated__gte=timestamp, issue__isnull=False).values("issue_id"))
+    return issues.filter(candidates) \
+        .annotate(changed=Greatest("last_updated", Coalesce(last_comment_update, "last_updated"))) \
+        .filter(after_mark("changed", ISSUE_RANK, mark)) \
+        .order_by("changed", "pk")
+
+
+def deleted_since(mark):
+    return Tombstone.objects.filter(after_mark("deleted", TOMBSTONE_RANK, mark)).order_by("deleted", "pk")
+
+
+def changes_since(mark, limit, issues=None):
+    """
+    Collects the issue changes and deletions after ``mark``.
+
+    :param mark: The high-water mark, a (timestamp, rank, pk) tuple.
+    :param limit: The maximum number of issues plus deletions to return.
+    :param issues: The issue queryset to draw from, see changed_issues.
+
+    :return: Returns a tuple of (changed issues, tombstones, next mark,
+             whether more changes remain).
+    """
+    changes = [((issue.changed, ISSUE_RANK, issue.pk), issue) for issue in changed_issues(mark, issues)[:limit + 1]]
+    changes += [((tombstone.deleted, TOMBSTONE_RANK, tombstone.pk), tombstone) for tombstone in deleted_since(mark)[:limit + 1]]
+    changes.sort(key=lambda change: change[0])
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # The next mark never passes the lag, so a client may see a change twice
+    # but never misses one; a full batch only moves it up to its last change.
+    present = present_mark()
+    next_mark = max(mark, min(changes[-1][0], present) if has_more else present)
+
+    changed = [item for key, item in changes if key[1] == ISSUE_RANK]
+    tombstones = [item for key, item in changes if key[1] == TOMBSTONE_RANK]
+    return changed, tombstones, next_mark, has_more
+
+
+def present_mark():
+    """
+    The high-water mark a client starts from: the present, less the lag.
+    """
+    return datetime.datetime.utcnow().replace(tzinfo=utc) - sync_lag(), ISSUE_RANK, 0
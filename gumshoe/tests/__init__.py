@@ -1 +1,7 @@
+from .bugzilla import ImportBugzillaTests, ParallelImportBugzillaTests, ProgressReporterTests
 from .issues import *
+from .projects import ProjectsApiTests
+from .renderers import (
+    CaseConversionTests, IssuePageTransformTests, JSONBackendParityTests, SerializerCaseTests, StdlibJSONBackendTests,
+)
+from .asyncviews import AsyncReadPoolTests, AsyncReadViewTests
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase as TestCaseBase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import resolve
+
+from gumshoe.tests.utils import IssueTestCaseBase
+from gumshoe.views import IssueViewSet
+
+ASGI_URLCONF = "gumshoe.standalone.asgi_urls"
+
+
+@override_settings(GUMSHOE_ASYNC_DB_THREADS=0)
+class AsyncReadViewTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+        self.async_client.force_login(self.user)
+        self.issue = self.generate_issue()
+        self.generate_comment(self.issue)
+
+    def read_uris(self):
+        return [
+            "/rest/issues/",
+            "/rest/issues/?projects=TESTPROJECT&order_by=-last_updated",
+            "/rest/issues/{0}/".format(self.issue.issue_key),
+            "/rest/issues/{0}/comments/".format(self.issue.issue_key),
+            "/rest/projects/",
+            "/rest/projects/{0}/".format(self.project.pk),
+            "/rest/users/",
+            "/rest/users/{0}/".format(self.user.pk),
+            "/rest/milestones/",
+            "/rest/milestones/{0}/".format(self.milestone.pk),
+        ]
+
+    def async_request(self, method, uri, **kwds):
+        async def request():
+            return await getattr(self.async_client, method)(uri, **kwds)
+        with override_settings(ROOT_URLCONF=ASGI_URLCONF):
+            return async_to_sync(request)()
+
+    def test_routes(self):
+        for uri in self.read_uris():
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(uri.split("?")[0], ASGI_URLCONF).func), uri)
+        self.assertEqual("issue-changes", resolve("/rest/issues/changes/", ASGI_URLCONF).url_name)
+        self.assertFalse(asyncio.iscoroutinefunction(resolve("/rest/issues/changes/", ASGI_URLCONF).func))
+
+    def test_responses_match_wsgi(self):
+        for uri in self.read_uris():
+            expected = self.client.get(uri)
+            response = self.async_request("get", uri)
+            self.assertEqual(200, response.status_code, uri)
+            self.assertEqual(json.loads(expected.content), json.loads(response.content), uri)
+            self.assertEqual(expected.get("ETag"), response.get("ETag"), uri)
+
+    def test_errors(self):
+        self.assertEqual(404, self.async_request("get", "/rest/issues/TESTPROJECT-999/").status_code)
+        self.assertEqual(400, self.async_request("get", "/rest/issues/?statuses=NONSENSE").status_code)
+
+        self.async_client.logout()
+        self.assertEqual(403, self.async_request("get", "/rest/issues/").status_code)
+
+    def test_writes(self):
+        uri = "/rest/issues/{0}/comments/".format(self.issue.issue_key)
+        response = self.async_request("post", uri, data={"text": "Async"}, content_type="application/json")
+        self.assertEqual(201, response.status_code, response.content)
+        self.assertEqual(2, len(json.loads(self.async_request("get", uri).content)["results"]))
+
+
+@override_settings(GUMSHOE_ASYNC_DB_THREADS=2, ROOT_URLCONF=ASGI_URLCONF)
+class AsyncReadPoolTests(IssueTestCaseBase, TransactionTestCase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+        self.async_client.force_login(self.user)
+
+    def test_reads_run_on_the_pool(self):
+        issue = self.generate_issue()
+        threads = []
+        list_issues = IssueViewSet.list
+
+        def record_thread(view, request):
+            threads.append(threading.current_thread().name)
+            return list_issues(view, request)
+
+        async def get_lists():
+            return await asyncio.gather(*[self.async_client.get("/rest/issues/") for _ in range(4)])
+
+        with mock.patch.object(IssueViewSet, "list", autospec=True, side_effect=record_thread):
+            responses = async_to_sync(get_lists)()
+
+        for response in responses:
+            self.assertEqual(200, response.status_code, response.content)
+            self.assertEqual([issue.issue_key], [i["issueKey"] for i in json.loads(response.content)["results"]])
+        self.assertEqual(4, len(threads))
+        self.assertTrue(all(name.startswith("gumshoe-db") for name in threads), threads)
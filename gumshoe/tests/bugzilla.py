@@ -0,0 +1,244 @@
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import OutputWrapper
+from django.db import connection
+from django.test import TestCase as TestCaseBase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from gumshoe.management.commands.import_bugzilla import Command, ProgressReporter
+from gumshoe.models import BugzillaIssueMap, Comment, Issue, Project
+
+BUGZILLA_SCHEMA = [
+    "CREATE TABLE profiles (userid INTEGER PRIMARY KEY, login_name VARCHAR(255))",
+    "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR(64), description TEXT)",
+    "CREATE TABLE versions (id INTEGER PRIMARY KEY, value VARCHAR(64), product_id INTEGER)",
+    "CREATE TABLE components (id INTEGER PRIMARY KEY, name VARCHAR(64), description TEXT, product_id INTEGER)",
+    """CREATE TABLE bugs (
+        bug_id INTEGER PRIMARY KEY, assigned_to INTEGER, reporter INTEGER, product_id INTEGER,
+        bug_severity VARCHAR(64), bug_status VARCHAR(64), creation_ts DATETIME, delta_ts DATETIME,
+        short_desc VARCHAR(255), version VARCHAR(64), component_id INTEGER, lastdiffed DATETIME,
+        resolution VARCHAR(64), cf_issue_type VARCHAR(64)
+    )""",
+    """CREATE TABLE longdescs (
+        comment_id INTEGER PRIMARY KEY, bug_id INTEGER, who INTEGER, bug_when DATETIME, thetext TEXT
+    )""",
+]
+
+
+class BugzillaDatabaseMixin(object):
+    """
+    Fills the test database with a small Bugzilla schema for the command to
+    import from.
+    """
+    def setUpBugzilla(self):
+        with connection.cursor() as cur:
+            for statement in BUGZILLA_SCHEMA:
+                cur.execute(statement)
+
+            cur.executemany("INSERT INTO profiles VALUES (%s, %s)", [(1, "one@example.com"), (2, "two@example.com")])
+            cur.execute("INSERT INTO products VALUES (1, 'Bug Tracker', 'Tracks bugs')")
+            cur.execute("INSERT INTO versions VALUES (1, '1.0', 1)")
+            cur.execute("INSERT INTO components VALUES (1, 'Backend', 'Server side', 1)")
+
+            self.bug_count = 25
+            created = datetime.datetime(2012, 1, 1)
+            bugs = []
+            comments = []
+            for bug_id in range(1, self.bug_count + 1):
+                reported = created + datetime.timedelta(days=bug_id)
+                bugs.append((
+                    bug_id, 1, 2, 1, "critical", "RESOLVED", reported, reported, "Bug {0}".format(bug_id), "1.0",
+                    1, reported + datetime.timedelta(hours=1), "FIXED", "Task" if bug_id % 2 else None,
+                ))
+                comments.append((bug_id, 2, reported, "Description of {0}".format(bug_id)))
+                comments.append((bug_id, 1, reported + datetime.timedelta(minutes=5), "First comment"))
+                comments.append((bug_id, 2, reported + datetime.timedelta(minutes=10), "Second comment"))
+            cur.executemany("INSERT INTO bugs VALUES ({0})".format(", ".join(["%s"] * 14)), bugs)
+            cur.executemany("INSERT INTO longdescs (bug_id, who, bug_when, thetext) VALUES (%s, %s, %s, %s)", comments)
+
+    def import_bugzilla(self, **kwds):
+        stdout = io.StringIO()
+        call_command("import_bugzilla", database="default", stdout=stdout, **kwds)
+        return stdout.getvalue()
+
+
+class ImportBugzillaTests(BugzillaDatabaseMixin, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpBugzilla()
+
+    def test_import(self):
+        self.import_bugzilla(batch_size=10, insert_size=4)
+
+        project = Project.objects.get(name="Bug Tracker")
+        self.assertEqual("BUG", project.issue_key)
+        self.assertEqual(self.bug_count, project.issue_counter)
+        self.assertEqual(["1.0"], [v.name for v in project.version_set.all()])
+
+        issue = Issue.objects.get(issue_key="BUG-1")
+        self.assertEqual("Bug 1", issue.summary)
+        self.assertEqual("Description of 1", issue.description)
+        self.assertEqual("TASK", issue.issue_type.short_name)
+        self.assertEqual("BLK", issue.priority.short_name)
+        self.assertEqual(("RESOLVED", "FIXED"), (issue.status, issue.resolution))
+        self.assertEqual("one@example.com", issue.assignee.username)
+        self.assertEqual("two@example.com", issue.reporter.username)
+        self.assertEqual(2012, issue.reported.year)
+        self.assertEqual(["Backend"], [c.name for c in issue.components.all()])
+        self.assertEqual(["1.0"], [v.name for v in issue.affects_versions.all()])
+        self.assertEqual(["1.0"], [v.name for v in issue.fix_versions.all()])
+        self.assertEqual(["First comment", "Second comment"], [c.text for c in issue.comments.order_by("created")])
+        self.assertEqual(2, issue.comment_count)
+
+        self.assertEqual("BUG", Issue.objects.get(issue_key="BUG-2").issue_type.short_name)
+        self.assertEqual(self.bug_count, Issue.objects.count())
+        self.assertEqual(2 * self.bug_count, Comment.objects.count())
+
+    def test_query_count_does_not_grow_with_batch(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.import_bugzilla(batch_size=self.bug_count)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "gumshoe_issue"')]
+        self.assertEqual(1, len(inserts))
+
+    def test_resume(self):
+        import_batch = Command.import_batch
+        calls = []
+
+        def failing_import_batch(command, rows, comments):
+            calls.append(rows[0]["id"])
+            if len(calls) == 2:
+                raise RuntimeError("Interrupted")
+            import_batch(command, rows, comments)
+
+        with mock.patch.object(Command, "import_batch", failing_import_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_bugzilla(batch_size=10)
+        self.assertEqual(10, Issue.objects.count())
+        self.assertEqual(10, BugzillaIssueMap.objects.count())
+
+        self.import_bugzilla(batch_size=10, resume=True)
+
+        self.assertEqual(1, Project.objects.filter(name="Bug Tracker").count())
+        self.assertEqual(self.bug_count, Issue.objects.count())
+        self.assertEqual(2 * self.bug_count, Comment.objects.count())
+        self.assertEqual(
+            sorted("BUG-{0}".format(n) for n in range(1, self.bug_count + 1)),
+            sorted(Issue.objects.values_list("issue_key", flat=True)))
+        self.assertEqual(
+            "Bug 25", BugzillaIssueMap.objects.select_related("issue").get(bugzilla_id=25).issue.summary)
+
+    def test_resume_with_other_ranges(self):
+        import_batch = Command.import_batch
+        calls = []
+
+        def failing_import_batch(command, rows, comments):
+            calls.append(rows[0]["id"])
+            if len(calls) == 2:
+                raise RuntimeError("Interrupted")
+            import_batch(command, rows, comments)
+
+        # As the second of several workers' ranges would be.
+        with mock.patch.object(Command, "split_bug_ids", return_value=[(12, 25)]), \
+                mock.patch.object(Command, "import_batch", failing_import_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_bugzilla(batch_size=3)
+        self.assertEqual([13, 14, 15], sorted(BugzillaIssueMap.objects.values_list("bugzilla_id", flat=True)))
+
+        self.import_bugzilla(batch_size=3, resume=True)
+
+        self.assertEqual(
+            list(range(1, self.bug_count + 1)),
+            sorted(BugzillaIssueMap.objects.values_list("bugzilla_id", flat=True)))
+        self.assertEqual(self.bug_count, Issue.objects.count())
+        self.assertEqual(2 * self.bug_count, Comment.objects.count())
+        self.assertEqual(
+            "Bug 1", BugzillaIssueMap.objects.select_related("issue").get(bugzilla_id=1).issue.summary)
+
+    def test_split_bug_ids(self):
+        with connection.cursor() as cur:
+            self.assertEqual([(0, 25)], Command().split_bug_ids(cur, 1))
+            ranges = Command().split_bug_ids(cur, 2)
+        self.assertLessEqual(len(ranges), 8)
+        self.assertEqual(list(range(1, 26)), [n for low, high in ranges for n in range(low + 1, high + 1)])
+
+    def test_summary_json(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        output = self.import_bugzilla(batch_size=10, summary_json=path)
+        self.assertIn("bugs: 25 rows in", output)
+
+        with open(path) as f:
+            summary = json.load(f)
+        self.assertEqual(25, summary["issues"])
+        self.assertEqual(
+            ["users", "products", "versions", "components", "bugs", "comments"],
+            [phase["name"] for phase in summary["phases"]])
+        phases = {phase["name"]: phase for phase in summary["phases"]}
+        self.assertEqual((2, 2), (phases["users"]["rows"], phases["users"]["total"]))
+        self.assertEqual((25, 25), (phases["bugs"]["rows"], phases["bugs"]["total"]))
+        self.assertEqual((75, 75), (phases["comments"]["rows"], phases["comments"]["total"]))
+
+
+class ParallelImportBugzillaTests(BugzillaDatabaseMixin, TransactionTestCase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        # The workers import through connections of their own, so they need
+        # a database other processes can open.
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("The test database is in memory.")
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.skipTest("Workers are forked.")
+        self.setUpBugzilla()
+
+    def tearDown(self):
+        with connection.cursor() as cur:
+            for table in ("profiles", "products", "versions", "components", "bugs", "longdescs"):
+                cur.execute("DROP TABLE {0}".format(table))
+
+    def test_import_with_workers(self):
+        output = self.import_bugzilla(batch_size=4, workers=3)
+        self.assertIn("Imported {0} issues.".format(self.bug_count), output)
+
+        self.assertEqual(
+            sorted("BUG-{0}".format(n) for n in range(1, self.bug_count + 1)),
+            sorted(Issue.objects.values_list("issue_key", flat=True)))
+        self.assertEqual(
+            list(range(1, self.bug_count + 1)),
+            sorted(BugzillaIssueMap.objects.values_list("bugzilla_id", flat=True)))
+        self.assertEqual(2 * self.bug_count, Comment.objects.count())
+        for bug_map in BugzillaIssueMap.objects.select_related("issue"):
+            self.assertEqual("Bug {0}".format(bug_map.bugzilla_id), bug_map.issue.summary)
+            self.assertEqual(2, bug_map.issue.comment_count)
+
+
+class ProgressReporterTests(TestCaseBase):
+    def test_reports_are_rate_limited(self):
+        now = [0.0]
+        stream = io.StringIO()
+        progress = ProgressReporter(OutputWrapper(stream), interval=1.0, clock=lambda: now[0])
+
+        phase = progress.start("bugs", total=1000)
+        for _ in range(10):
+            now[0] += 0.25
+            progress.update(phase, 50)
+        progress.finish(phase)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([
+            "bugs: 50/1000 rows, 200.0 rows/s, ETA 0:00:04, elapsed 0:00:00",
+            "bugs: 250/1000 rows, 200.0 rows/s, ETA 0:00:03, elapsed 0:00:01",
+            "bugs: 450/1000 rows, 200.0 rows/s, ETA 0:00:02, elapsed 0:00:02",
+            "bugs: 500 rows in 0:00:02 (200.0 rows/s)",
+        ], lines)
+        self.assertEqual(2.5, progress.summary()["seconds"])
@@ -1,3 +1,12 @@
 from .detail import IssuesApiTests
 from .comments import CommentsApiTests
-from .filters import IssueFilterTests
+from .filters import IssueFilterSpecTests, IssueFilterTests
+from .queries import IssueQueryCountTests
+from .pagination import IssueCursorPaginationTests
+from .search import IssueSearchTests
+from .bulk import IssueBulkApiTests
+from .export import IssueExportTests
+from .conditional import IssueConditionalGetTests
+from .listcache import IssueListCacheTests
+from .sync import IssueChangesTests
+from .events import IssueEventTests
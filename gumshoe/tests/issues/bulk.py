@@ -0,0 +1,87 @@
+import json
+
+from django.db import connection
+from django.test import TestCase as TestCaseBase
+from django.test.utils import CaptureQueriesContext
+
+from gumshoe.models import Issue
+from gumshoe.tests.utils import IssueTestCaseBase, random_string
+
+
+class IssueBulkApiTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+    BULK_ENDPOINT = "/rest/issues/bulk/"
+
+    def setUp(self):
+        self.setUpProject()
+
+    def issue_payload(self, **kwds):
+        payload = {
+            "project": self.project.pk,
+            "issueType": "BUG",
+            "summary": random_string(32).strip(),
+            "priority": "MAJ",
+            "status": "OPEN",
+            "resolution": "UNRESOLVED",
+            "components": [self.component_one.pk],
+            "affectsVersions": [self.version_one.pk],
+            "fixVersions": [self.version_two.pk],
+        }
+        payload.update(kwds)
+        return payload
+
+    def post(self, payload):
+        response = self.client.post(self.BULK_ENDPOINT, json.dumps(payload), content_type="application/json")
+        self.assertEqual(200, response.status_code, response.content)
+        return json.loads(response.content)
+
+    def test_bulk_create_and_update(self):
+        existing = self.generate_issue(components=[self.component_two], fix_versions=[self.version_one])
+
+        pl = self.post([
+            self.issue_payload(),
+            self.issue_payload(priority="NOPE"),
+            self.issue_payload(issueKey=existing.issue_key, summary="Updated", components=[self.component_one.pk], fixVersions=[]),
+            self.issue_payload(issueKey="TESTPROJECT-999"),
+            self.issue_payload(milestoneId=self.milestone.pk, assigneeId=self.another_user.pk),
+        ])
+
+        self.assertEqual([201, 400, 200, 404, 201], [r["status"] for r in pl])
+        self.assertIn("priority", pl[1]["errors"])
+
+        created = Issue.objects.get(issue_key=pl[0]["issue"]["issueKey"])
+        self.assertEqual("TESTPROJECT-2", created.issue_key)
+        self.assertEqual(self.user, created.reporter)
+        self.assertEqual(self.user, created.assignee)
+        self.assertEqual([self.component_one], list(created.components.all()))
+        self.assertEqual([self.version_one], list(created.affects_versions.all()))
+        self.assertEqual([self.version_two], list(created.fix_versions.all()))
+
+        existing = Issue.objects.get(pk=existing.pk)
+        self.assertEqual("Updated", existing.summary)
+        self.assertEqual([self.component_one], list(existing.components.all()))
+        self.assertEqual([], list(existing.fix_versions.all()))
+        self.assertEqual(existing.summary, pl[2]["issue"]["summary"])
+
+        last = Issue.objects.get(issue_key=pl[4]["issue"]["issueKey"])
+        self.assertEqual("TESTPROJECT-3", last.issue_key)
+        self.assertEqual(self.milestone, last.milestone)
+        self.assertEqual(self.another_user, last.assignee)
+
+        self.assertEqual(3, Issue.objects.count())
+
+    def test_query_count_does_not_grow(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.post([self.issue_payload() for _ in range(2)])
+        small = len(ctx.captured_queries)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.post([self.issue_payload() for _ in range(20)])
+        large = len(ctx.captured_queries)
+
+        self.assertEqual(small, large)
+        self.assertEqual(22, Issue.objects.count())
+
+    def test_requires_list(self):
+        response = self.client.post(self.BULK_ENDPOINT, json.dumps(self.issue_payload()), content_type="application/json")
+        self.assertEqual(400, response.status_code)
@@ -1,9 +1,15 @@
+import datetime
 import json
+import unittest
+from unittest import mock
 
+from django.db import connection
 from django.db.models import Q
 from django.test import TestCase as TestCaseBase
+from django.utils.timezone import utc
 
 from gumshoe.models import Issue, Comment
+from gumshoe.pagination import KeysetPagination
 from gumshoe.tests.utils import IssueTestCaseBase, random_string
 
 
@@ -85,3 +91,93 @@ class CommentsApiTests (IssueTestCaseBase, TestCaseBase):
 
         comment = Comment.objects.get(pk=comment_one.pk)
         self.assertEqual(request_pl["text"], comment.text)
+
+    def test_comments_are_ordered_and_authors_joined(self):
+        issue = self.generate_issue()
+        base = datetime.datetime(2020, 1, 1, tzinfo=utc)
+        comments = []
+        for minutes in (30, 10, 20, 10):
+            author = self.user if minutes % 20 else self.another_user
+            comment = Comment(content=issue, author=author, text=random_string(), created=base + datetime.timedelta(minutes=minutes),
+                              updated=base)
+            comment.save(update_timestamps=False)
+            comments.append(comment)
+        uri = self.COMMENTS_URI_TEMPLATE.format(issue_key=issue.issue_key)
+
+        # session + user, the issue, the count and the comments joined to
+        # their authors, however many comments there are.
+        with self.assertNumQueries(5):
+            response = self.client.get(uri)
+        self.assertEqual(200, response.status_code, response.content)
+        expected = [comments[1].pk, comments[3].pk, comments[2].pk, comments[0].pk]
+        self.assertEqual(expected, [int(c["url"].rstrip("/").rsplit("/", 1)[1]) for c in json.loads(response.content)["results"]])
+
+        with mock.patch.object(KeysetPagination, "page_size", 3):
+            # No count unless asked for.
+            with self.assertNumQueries(4):
+                response = self.client.get(uri + "?pagination=cursor")
+            self.assertEqual(200, response.status_code, response.content)
+            page = json.loads(response.content)
+            self.assertIsNone(page["count"])
+            texts = [c["text"] for c in page["results"]]
+            self.assertEqual(3, len(texts))
+
+            while page["next"]:
+                page = json.loads(self.client.get(page["next"]).content)
+                texts += [c["text"] for c in page["results"]]
+        self.assertEqual([Comment.objects.get(pk=pk).text for pk in expected], texts)
+
+    def test_comment_count(self):
+        issue = self.generate_issue()
+        other = self.generate_issue()
+        uri = self.COMMENTS_URI_TEMPLATE.format(issue_key=issue.issue_key)
+
+        comment = self.generate_comment(issue)
+        self.generate_comment(other)
+        response = self.client.post(uri, json.dumps({"text": random_string()}), content_type="application/json")
+        self.assertEqual(201, response.status_code, response.content)
+        self.assertEqual(2, Issue.objects.get(pk=issue.pk).comment_count)
+
+        # Editing a comment or saving a stale copy of the issue leaves it be.
+        comment.text = "Edited"
+        comment.save()
+        issue.summary = "Edited"
+        issue.save()
+        self.assertEqual(2, Issue.objects.get(pk=issue.pk).comment_count)
+
+        comment.delete()
+        self.assertEqual(1, Issue.objects.get(pk=issue.pk).comment_count)
+        self.assertEqual(1, Issue.objects.get(pk=other.pk).comment_count)
+
+        response = self.client.get(f"/rest/issues/{issue.issue_key}/")
+        self.assertEqual(1, json.loads(response.content)["commentCount"])
+
+    def test_issue_foreign_key(self):
+        issue = self.generate_issue()
+        comment = self.generate_comment(issue)
+        self.assertEqual(issue.pk, Comment.objects.get(pk=comment.pk).issue_id)
+
+        # Comments created through the foreign key, as the issue admin does,
+        # get their generic relation filled in.
+        comment = Comment(issue=issue, author=self.user, text=random_string())
+        comment.save()
+        comment = Comment.objects.get(pk=comment.pk)
+        self.assertEqual(issue, comment.content)
+        self.assertEqual(2, issue.comments.count())
+        self.assertEqual(2, Issue.objects.get(pk=issue.pk).comment_count)
+
+        # Comments on anything else have none.
+        comment.content = self.project
+        comment.save()
+        self.assertIsNone(Comment.objects.get(pk=comment.pk).issue_id)
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "Checks SQLite query plans.")
+    def test_comment_query_plans(self):
+        issue = self.generate_issue()
+        plan = Comment.objects.filter(issue=issue).order_by("created", "pk").explain()
+        self.assertIn("gumshoe_com_issue_created", plan)
+        self.assertNotIn("SCAN", plan)
+
+        plan = issue.comments.order_by("created").explain()
+        self.assertIn("gumshoe_com_ct_obj_created", plan)
+        self.assertNotIn("SCAN", plan)
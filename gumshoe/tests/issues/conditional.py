@@ -0,0 +1,124 @@
+import json
+import time
+
+from django.test import TestCase as TestCaseBase
+from django.utils.http import http_date
+
+from gumshoe.listcache import invalidate_issue_lists
+from gumshoe.models import Comment, Issue
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+class IssueConditionalGetTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def revalidate(self, uri, response, **headers):
+        return self.client.get(uri, HTTP_IF_NONE_MATCH=response["ETag"], **headers)
+
+    def test_retrieve(self):
+        issue = self.generate_issue()
+        uri = f"/rest/issues/{issue.issue_key}/"
+
+        response = self.client.get(uri)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        # session + user and the issue, nothing is prefetched or serialized.
+        with self.assertNumQueries(3):
+            not_modified = self.revalidate(uri, response)
+        self.assertEqual(304, not_modified.status_code)
+        self.assertEqual(b"", not_modified.content)
+        self.assertEqual(response["ETag"], not_modified["ETag"])
+
+        # A date can't tell that a comment changed the count, so it never
+        # validates the client's copy.
+        if_modified_since = http_date(time.time() + 60)
+        self.assertEqual(200, self.client.get(uri, HTTP_IF_MODIFIED_SINCE=if_modified_since).status_code)
+        response = self.client.post(f"{uri}comments/", data={"text": "First"}, content_type="application/json")
+        self.assertEqual(201, response.status_code, response.content)
+        commented = self.client.get(uri, HTTP_IF_MODIFIED_SINCE=if_modified_since)
+        self.assertEqual(200, commented.status_code)
+        self.assertEqual(1, json.loads(commented.content)["commentCount"])
+        response = commented
+
+        issue.fix_versions.add(self.version_two)
+        changed = self.revalidate(uri, response)
+        self.assertEqual(200, changed.status_code)
+        self.assertNotEqual(response["ETag"], changed["ETag"])
+
+    def test_list(self):
+        issues = [self.generate_issue(status="OPEN") for _ in range(3)]
+        uri = "/rest/issues/?statuses=OPEN"
+
+        response = self.client.get(uri)
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(304, self.revalidate(uri, response).status_code)
+
+        other = self.client.get("/rest/issues/?statuses=OPEN,CLOSED")
+        self.assertNotEqual(response["ETag"], other["ETag"])
+
+        # Leaving the list without being the most recently updated issue.
+        Issue.objects.filter(pk=issues[0].pk).update(status="CLOSED")
+        invalidate_issue_lists([self.project.pk])
+        changed = self.revalidate(uri, response)
+        self.assertEqual(200, changed.status_code)
+        self.assertEqual(2, len(json.loads(changed.content)["results"]))
+
+        issues[1].delete()
+        self.assertEqual(200, self.revalidate(uri, changed).status_code)
+
+    def test_comment_count(self):
+        issue = self.generate_issue()
+        uris = [f"/rest/issues/{issue.issue_key}/", "/rest/issues/", "/rest/issues/?pagination=cursor"]
+        responses = [self.client.get(uri) for uri in uris]
+
+        # Posting a comment changes the issue's count, not its last_updated.
+        last_updated = Issue.objects.get(pk=issue.pk).last_updated
+        response = self.client.post(f"/rest/issues/{issue.issue_key}/comments/", data={"text": "First"}, content_type="application/json")
+        self.assertEqual(201, response.status_code, response.content)
+        self.assertEqual(last_updated, Issue.objects.get(pk=issue.pk).last_updated)
+
+        for index, uri in enumerate(uris):
+            changed = self.revalidate(uri, responses[index])
+            self.assertEqual(200, changed.status_code, uri)
+            content = json.loads(changed.content)
+            self.assertEqual(1, (content["results"][0] if "results" in content else content)["commentCount"], uri)
+            responses[index] = changed
+
+        Comment.objects.get(issue=issue).delete()
+        for uri, response in zip(uris, responses):
+            self.assertEqual(200, self.revalidate(uri, response).status_code, uri)
+
+    def test_cursor_list(self):
+        self.generate_issue()
+        uri = "/rest/issues/?pagination=cursor"
+
+        response = self.client.get(uri)
+        self.assertEqual(304, self.revalidate(uri, response).status_code)
+
+        self.generate_issue()
+        self.assertEqual(200, self.revalidate(uri, response).status_code)
+
+    def test_comments(self):
+        issue = self.generate_issue()
+        uri = f"/rest/issues/{issue.issue_key}/comments/"
+        comment = Comment(content=issue, author=self.user, text="First")
+        comment.save()
+
+        response = self.client.get(uri)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(304, self.revalidate(uri, response).status_code)
+
+        comment.text = "Edited"
+        comment.save()
+        changed = self.revalidate(uri, response)
+        self.assertEqual(200, changed.status_code)
+
+        comment.delete()
+        self.assertEqual(200, self.revalidate(uri, changed).status_code)
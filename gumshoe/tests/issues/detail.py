@@ -2,7 +2,7 @@ import json
 
 from django.test import TestCase as TestCaseBase
 
-from gumshoe.models import Issue
+from gumshoe.models import Issue, Project
 from gumshoe.tests.utils import IssueTestCaseBase, random_issue_type, random_string, random_priority, random_status, \
     random_resolution
 
@@ -64,6 +64,21 @@ class IssuesApiTests (IssueTestCaseBase, TestCaseBase):
         self.assertSetEqual(set(request_pl["fixVersions"]), set(response_pl["fixVersions"]))
         self.assertAllEqual(self.milestone.pk, response_pl["milestone"]["id"], issue.milestone.pk)
 
+    def test_issue_keys_are_not_reused(self):
+        issue_one = self.generate_issue()
+        issue_two = self.generate_issue()
+        self.assertEqual(["TESTPROJECT-1", "TESTPROJECT-2"], [issue_one.issue_key, issue_two.issue_key])
+
+        issue_one.delete()
+
+        # A stale copy of the project must not roll the counter back.
+        Project.objects.get(pk=self.project.pk).save()
+        self.project.save()
+
+        issue_three = self.generate_issue()
+        self.assertEqual("TESTPROJECT-3", issue_three.issue_key)
+        self.assertEqual(["TESTPROJECT-4", "TESTPROJECT-5"], self.project.next_issue_keys(2))
+
     def test_get_issue(self):
         issue = self.generate_issue()
 
@@ -0,0 +1,198 @@
+import asyncio
+import contextlib
+import json
+import queue
+import threading
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.test import TestCase as TestCaseBase
+from django.test.utils import override_settings
+
+from gumshoe import events
+from gumshoe.events import EventBroker, LocalEventBackend, RedisEventBackend, event_stream
+from gumshoe.standalone.middleware import DisconnectMiddleware
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+class RecordingEventBackend(LocalEventBackend):
+    published = []
+
+    def publish(self, event):
+        self.published.append(event)
+        super(RecordingEventBackend, self).publish(event)
+
+
+class FakeRedis(object):
+    """
+    A stand-in for the part of ``redis.Redis`` the event backend uses.
+    """
+    def __init__(self):
+        self.queues = []
+        self.subscribed = threading.Event()
+
+    def publish(self, channel, message):
+        for channel_queue in self.queues:
+            channel_queue.put({"type": "message", "channel": channel, "data": message.encode()})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+class FakePubSub(object):
+    def __init__(self, client):
+        self.client = client
+        self.queue = queue.Queue()
+
+    def subscribe(self, channel):
+        self.client.queues.append(self.queue)
+        self.client.subscribed.set()
+
+    def listen(self):
+        while True:
+            yield self.queue.get()
+
+
+@override_settings(GUMSHOE_EVENT_BACKEND="gumshoe.tests.issues.events.RecordingEventBackend")
+class IssueEventTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+    EVENTS_URI = "/rest/events/"
+
+    def setUp(self):
+        self.setUpProject()
+        RecordingEventBackend.published = []
+
+    def published(self):
+        return [(event["model"], event["action"], event["id"], event["issueId"]) for event in RecordingEventBackend.published]
+
+    def committed(self, func):
+        with self.captureOnCommitCallbacks(execute=True):
+            return func()
+
+    def test_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            issue = self.generate_issue()
+        self.assertEqual([("issue", "save", issue.pk, issue.pk)], self.published())
+        self.assertEqual(issue.issue_key, RecordingEventBackend.published[0]["issueKey"])
+
+        RecordingEventBackend.published = []
+        with self.captureOnCommitCallbacks() as callbacks:
+            comment = self.generate_comment(issue)
+            self.assertEqual([], self.published())
+        for callback in callbacks:
+            callback()
+        self.assertEqual([("comment", "save", comment.pk, issue.pk)], self.published())
+
+        # Relation changes go through issue_update_timestamp.
+        RecordingEventBackend.published = []
+        with self.captureOnCommitCallbacks(execute=True):
+            issue.components.add(self.component_one)
+        self.assertEqual([("issue", "save", issue.pk, issue.pk)], self.published())
+
+        RecordingEventBackend.published = []
+        comment_pk, issue_pk = comment.pk, issue.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            issue.delete()
+        self.assertEqual([("comment", "delete", comment_pk, issue_pk), ("issue", "delete", issue_pk, issue_pk)],
+                         sorted(self.published()))
+
+    def test_rolled_back_savepoints(self):
+        issue, other = self.committed(lambda: (self.generate_issue(), self.generate_issue()))
+        RecordingEventBackend.published = []
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                issue.save()
+            with contextlib.suppress(RuntimeError), transaction.atomic():
+                other.save()
+                raise RuntimeError("Rolled back")
+            issue.components.add(self.component_one)
+        self.assertEqual([("issue", "save", issue.pk, issue.pk)], self.published())
+
+    def test_requires_asgi(self):
+        self.assertEqual(501, self.client.get(self.EVENTS_URI).status_code)
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(self.EVENTS_URI)
+        self.assertEqual(403, response.status_code)
+
+    async def test_stream(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        issue, other = await sync_to_async(self.committed)(lambda: (self.generate_issue(), self.generate_issue()))
+
+        response = await self.async_client.get("{0}?issues={1}".format(self.EVENTS_URI, issue.pk))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("text/event-stream", response["Content-Type"])
+        # A request cancelled before its body starts has nothing to close.
+        self.assertEqual(set(), events.broker.subscriptions)
+
+        messages = asyncio.Queue()
+
+        async def read():
+            async for message in response.streaming_content:
+                await messages.put(message.decode())
+        reader = asyncio.ensure_future(read())
+        self.assertEqual("retry: 3000\n\n", await asyncio.wait_for(messages.get(), 5))
+
+        await sync_to_async(self.committed)(lambda: (other.save(), issue.save()))
+
+        message = await asyncio.wait_for(messages.get(), 5)
+        self.assertTrue(message.startswith("event: issue\ndata: "), message)
+        self.assertEqual(
+            {"model": "issue", "action": "save", "id": issue.pk, "issueId": issue.pk, "issueKey": issue.issue_key},
+            json.loads(message.split("data: ", 1)[1]))
+
+        # As DisconnectMiddleware does when the client goes away.
+        reader.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await reader
+        self.assertEqual(set(), events.broker.subscriptions)
+
+    async def test_keepalive_and_overflow(self):
+        broker = EventBroker()
+        content = event_stream(broker, keepalive=0.01, max_queued=2)
+        self.assertEqual(set(), broker.subscriptions)
+        self.assertEqual("retry: 3000\n\n", await content.__anext__())
+        self.assertEqual(1, len(broker.subscriptions))
+        self.assertEqual(": keepalive\n\n", await content.__anext__())
+
+        for pk in range(3):
+            broker.dispatch(events.issue_event(events.SAVED, pk))
+        await asyncio.sleep(0)
+        messages = [message async for message in content]
+        self.assertEqual(3, len(messages))
+        self.assertEqual("event: overflow\ndata: {}\n\n", messages[-1])
+        self.assertEqual(set(), broker.subscriptions)
+
+    async def test_redis_backend(self):
+        client = FakeRedis()
+        backend = RedisEventBackend(EventBroker(), client=client)
+        subscription = backend.broker.subscribe()
+        backend.start()
+        self.assertTrue(await sync_to_async(client.subscribed.wait)(5))
+
+        event = events.comment_event(events.SAVED, 1, 2)
+        backend.publish(event)
+        self.assertEqual(event, await asyncio.wait_for(subscription.get(), 5))
+        subscription.close()
+
+    async def test_disconnect_cancels_request(self):
+        finished = []
+        disconnected = asyncio.Event()
+
+        async def app(scope, receive, send):
+            self.assertEqual("http.request", (await receive())["type"])
+            try:
+                await asyncio.sleep(60)
+            finally:
+                finished.append(True)
+
+        async def receive():
+            if not finished and not disconnected.is_set():
+                disconnected.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        await asyncio.wait_for(DisconnectMiddleware(app)({"type": "http"}, receive, None), 5)
+        self.assertEqual([True], finished)
@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+from django.test import TestCase as TestCaseBase
+
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+class IssueExportTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def export(self, query):
+        response = self.client.get("/rest/issues/export/?" + query)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_ndjson(self):
+        issues = [self.generate_issue(status="CLOSED", resolution="FIXED") for _ in range(3)]
+        _ = self.generate_issue(status="OPEN")
+
+        lines = self.export("statuses=CLOSED&order_by=-issue_key").splitlines()
+
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([i.issue_key for i in reversed(issues)], [r["issueKey"] for r in rows])
+        self.assertEqual([self.version_one.pk], rows[0]["fixVersions"])
+        self.assertEqual(self.user.pk, rows[0]["assignee"]["id"])
+
+    def test_csv(self):
+        issue = self.generate_issue(components=[self.component_one, self.component_two])
+
+        rows = list(csv.DictReader(io.StringIO(self.export("output=csv"))))
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(issue.issue_key, rows[0]["issue_key"])
+        self.assertEqual(issue.summary, rows[0]["summary"])
+        self.assertEqual(self.user.username, rows[0]["assignee"])
+        self.assertEqual(self.milestone.name, rows[0]["milestone"])
+        self.assertEqual({str(self.component_one.pk), str(self.component_two.pk)}, set(rows[0]["components"].split(";")))
+
+    def test_unknown_output(self):
+        response = self.client.get("/rest/issues/export/?output=xml")
+        self.assertEqual(400, response.status_code)
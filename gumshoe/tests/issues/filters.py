@@ -1,8 +1,13 @@
 import json
+import unittest
 
+from django.db import connection
+from django.db.models import Q
+from django.http import QueryDict
 from django.test import TestCase as TestCaseBase
 
-from gumshoe.models import Project, Component, Version
+from gumshoe.models import Issue, Project, Component, Version
+from gumshoe.filters import _compile_issue_filters, filter_issues, parse_issue_filters, related_pks_filter
 from gumshoe.tests.utils import IssueTestCaseBase, random_string
 
 
@@ -129,6 +134,32 @@ class IssueFilterTests(IssueTestCaseBase, TestCaseBase):
         self.assertEqual(3, len(pl["results"]))
         self.assertListEqual([issue_blk.pk, issue_maj.pk, issue_min.pk], [i["id"] for i in pl["results"]])
 
+    def test_order_by_resolution(self):
+        issue_wont_fix = self.generate_issue(resolution="WONT_FIX")
+        issue_fixed = self.generate_issue(resolution="FIXED")
+        issue_invalid = self.generate_issue(resolution="INVALID")
+
+        response = self.client.get("/rest/issues/?order_by=resolution")
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual([issue_fixed.pk, issue_invalid.pk, issue_wont_fix.pk],
+                             [i["id"] for i in json.loads(response.content)["results"]])
+
+        response = self.client.get("/rest/issues/?order_by=-resolution")
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual([issue_wont_fix.pk, issue_invalid.pk, issue_fixed.pk],
+                             [i["id"] for i in json.loads(response.content)["results"]])
+
+    def test_order_by_client_headers(self):
+        # The issue list joins its sorted headers, in this order, each
+        # prefixed with - when ascending.
+        headers = ["priority", "issue_key", "resolution"]
+        for mask in range(1, 1 << len(headers)):
+            for signs in range(1 << len(headers)):
+                order_by = ",".join(("-" if signs & (1 << i) else "") + header
+                                    for i, header in enumerate(headers) if mask & (1 << i))
+                response = self.client.get("/rest/issues/?order_by=" + order_by)
+                self.assertEqual(200, response.status_code, order_by)
+
     def test_filter_by_term_issue_key(self):
         issue = self.generate_issue()
 
@@ -155,4 +186,106 @@ class IssueFilterTests(IssueTestCaseBase, TestCaseBase):
         pl = json.loads(response.content)
 
         self.assertEqual(2, len(pl["results"]))
-        self.assertSetEqual({issue_two.issue_key, issue_three.issue_key}, set(r["issueKey"] for r in pl["results"]))
\ No newline at end of file
+        self.assertSetEqual({issue_two.issue_key, issue_three.issue_key}, set(r["issueKey"] for r in pl["results"]))
+
+    def filtered_issue_keys(self, query):
+        response = self.client.get("/rest/issues/?" + query)
+        self.assertEqual(200, response.status_code, response.content)
+        pl = json.loads(response.content)
+        keys = [r["issueKey"] for r in pl["results"]]
+        self.assertEqual(len(keys), pl["count"])
+        return keys
+
+    def test_filter_by_none(self):
+        versioned = self.generate_issue(fix_versions=[self.version_one], affects_versions=[self.version_one], status="OPEN")
+        unversioned = self.generate_issue(fix_versions=[], affects_versions=[], milestone=None, status="OPEN")
+        unassigned = self.generate_issue(assignee=None, status="OPEN")
+
+        # Noise, excluded by the other filters.
+        self.generate_issue(fix_versions=[], affects_versions=[], milestone=None, assignee=None, status="CLOSED")
+        self.generate_issue(project=self.project_two, components=[], fix_versions=[], affects_versions=[], milestone=None,
+                            assignee=None, status="OPEN")
+
+        base = "projects={0}&statuses=OPEN&".format(self.project.issue_key)
+        self.assertCountEqual([unversioned.issue_key], self.filtered_issue_keys(base + "fix_versions=-1"))
+        self.assertCountEqual([unversioned.issue_key], self.filtered_issue_keys(base + "affects_versions=-1"))
+        self.assertCountEqual(
+            [versioned.issue_key, unversioned.issue_key, unassigned.issue_key],
+            self.filtered_issue_keys(base + "fix_versions={0},-1".format(self.version_one.pk)))
+        self.assertCountEqual([unversioned.issue_key], self.filtered_issue_keys(base + "milestones=-1"))
+        self.assertCountEqual([unassigned.issue_key], self.filtered_issue_keys(base + "assignees=-1"))
+        self.assertCountEqual(
+            [versioned.issue_key, unversioned.issue_key, unassigned.issue_key],
+            self.filtered_issue_keys(base + "assignees={0},-1".format(self.user.pk)))
+
+    def test_filter_by_many_versions_is_not_duplicated(self):
+        issue = self.generate_issue(fix_versions=[self.version_one, self.version_two])
+
+        keys = self.filtered_issue_keys("fix_versions={0},{1}".format(self.version_one.pk, self.version_two.pk))
+        self.assertEqual([issue.issue_key], keys)
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "Checks SQLite query plans.")
+    def test_none_filter_query_plans(self):
+        for field, through_table in (("fix_versions", "gumshoe_issue_fix_versions"), ("affects_versions", "gumshoe_issue_affects_versions")):
+            qs = Issue.objects.filter(Q(status__in=["OPEN"]) & related_pks_filter(field, [self.version_one.pk, -1]))
+            plan = qs.order_by("-last_updated").explain()
+
+            # One pass over the issues and an index lookup per subquery,
+            # with no joins to remove duplicates from.
+            self.assertNotIn("DISTINCT", plan)
+            through_lines = [line for line in plan.splitlines() if through_table in line]
+            self.assertEqual(2, len(through_lines), plan)
+            for line in through_lines:
+                self.assertIn("SEARCH", line, plan)
+                self.assertIn("INDEX", line, plan)
+
+        for field in ("assignee", "milestone"):
+            plan = Issue.objects.filter(related_pks_filter(field, [1, -1])).explain()
+            self.assertNotIn("SCAN", plan)
+
+
+class IssueFilterSpecTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def test_canonical_spec(self):
+        spec = parse_issue_filters(QueryDict("statuses=OPEN,CLOSED&projects=B,A&fix_versions=2,1,2&order_by=-last_updated,id"))
+        same = parse_issue_filters(QueryDict("order_by=-last_updated,id&projects=A,B,A&fix_versions=1,2&statuses=CLOSED,OPEN&page=2"))
+        self.assertEqual(spec, same)
+        self.assertEqual(hash(spec), hash(same))
+        self.assertEqual(spec.cache_key, same.cache_key)
+        self.assertEqual(("A", "B"), spec.get("projects"))
+        self.assertEqual((1, 2), spec.get("fix_versions"))
+        self.assertEqual(("-last_updated", "id"), spec.order_by)
+
+        self.assertNotEqual(spec, parse_issue_filters(QueryDict("projects=A,B&statuses=OPEN,CLOSED&fix_versions=1,2")))
+        self.assertNotEqual(spec.order_by, parse_issue_filters(QueryDict("order_by=id,-last_updated")).order_by)
+        self.assertEqual(("id", ), parse_issue_filters(QueryDict("order_by=pk,-id")).order_by)
+
+    def test_invalid_parameters(self):
+        response = self.client.get("/rest/issues/?order_by=project__name&statuses=OPEN,WONTFIX&fix_versions=1,x")
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({"orderBy", "statuses", "fixVersions"}, set(json.loads(response.content)))
+
+        for order_by in ("reported", "description", "assignee__username", "?"):
+            response = self.client.get("/rest/issues/?order_by=" + order_by)
+            self.assertEqual(400, response.status_code, order_by)
+
+        self.assertEqual(200, self.client.get("/rest/issues/?order_by=-priority,issue_key").status_code)
+
+    def test_compilation_is_memoized(self):
+        issue = self.generate_issue(status="OPEN")
+        spec = parse_issue_filters(QueryDict("statuses=OPEN&projects=" + self.project.issue_key))
+
+        _compile_issue_filters.cache_clear()
+        first = filter_issues(spec)
+        second = filter_issues(parse_issue_filters(QueryDict("projects={0}&statuses=OPEN".format(self.project.issue_key))))
+        self.assertEqual(1, _compile_issue_filters.cache_info().misses)
+        self.assertEqual(1, _compile_issue_filters.cache_info().hits)
+
+        self.assertIsNot(first, second)
+        self.assertEqual([issue], list(first))
+        self.assertEqual([issue], list(second.filter(pk=issue.pk)))
+        self.assertEqual([], list(filter_issues(spec).exclude(pk=issue.pk)))
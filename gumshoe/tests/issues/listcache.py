@@ -0,0 +1,133 @@
+import json
+
+from django.test import TestCase as TestCaseBase
+from django.test.utils import override_settings
+
+from gumshoe.bulk import IssueBulkWriter
+from gumshoe.models import Issue, Project
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+class IssueListCacheTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+        self.other_project = Project(name="Other Project", issue_key="OTHER")
+        self.other_project.save()
+
+    def get(self, uri, **headers):
+        response = self.client.get(uri, **headers)
+        self.assertIn(response.status_code, (200, 304), response.content)
+        return response
+
+    def assertCached(self, uri):
+        # Only session + user.
+        with self.assertNumQueries(2):
+            return self.get(uri)
+
+    def assertNotCached(self, uri):
+        response = self.get(uri)
+        self.assertCached(uri)
+        return response
+
+    def issue_keys(self, response):
+        return {issue["issueKey"] for issue in json.loads(response.content)["results"]}
+
+    def test_hit(self):
+        issue = self.generate_issue(status="OPEN")
+        uri = "/rest/issues/?projects=TESTPROJECT&statuses=OPEN,CLOSED"
+
+        response = self.get(uri)
+        cached = self.assertCached(uri)
+        self.assertEqual(response.content, cached.content)
+        self.assertEqual(response["ETag"], cached["ETag"])
+        self.assertEqual({issue.issue_key}, self.issue_keys(cached))
+
+        # The same filter written differently.
+        self.assertCached("/rest/issues/?statuses=CLOSED,OPEN&projects=TESTPROJECT")
+
+        with self.assertNumQueries(2):
+            not_modified = self.get(uri, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(304, not_modified.status_code)
+
+        self.assertNotCached(uri + "&page=1")
+        self.assertNotCached("/rest/issues/?projects=TESTPROJECT&statuses=OPEN")
+
+    def test_writes_invalidate_their_projects(self):
+        issue = self.generate_issue()
+        uris = ["/rest/issues/", "/rest/issues/?projects=TESTPROJECT", "/rest/issues/?projects=OTHER"]
+        for uri in uris:
+            self.get(uri)
+
+        issue.summary = "Changed"
+        issue.save()
+        self.assertNotCached(uris[0])
+        self.assertNotCached(uris[1])
+        self.assertCached(uris[2])
+
+        self.generate_comment(issue)
+        self.assertNotCached(uris[0])
+        self.assertNotCached(uris[1])
+
+        # Relation changes go through issue_update_timestamp.
+        issue.components.add(self.component_one)
+        self.assertNotCached(uris[1])
+
+        self.component_one.name = "Renamed"
+        self.component_one.save()
+        self.assertNotCached(uris[1])
+        self.assertCached(uris[2])
+
+        self.milestone.name = "Renamed"
+        self.milestone.save()
+        for uri in uris:
+            self.assertNotCached(uri)
+
+    def test_lookup_renames(self):
+        issue = self.generate_issue()
+        uri = "/rest/issues/?projects=TESTPROJECT"
+        self.get(uri)
+
+        for lookup in (issue.priority, issue.issue_type):
+            lookup.short_name = "Z" + lookup.short_name[:3]
+            lookup.save()
+            result = json.loads(self.assertNotCached(uri).content)["results"][0]
+            self.assertIn(lookup.short_name, (result["priority"], result["issueType"]))
+
+    def test_move_between_projects(self):
+        issue = Issue.objects.get(pk=self.generate_issue().pk)
+        uris = ["/rest/issues/?projects=TESTPROJECT", "/rest/issues/?projects=OTHER"]
+        self.assertEqual({issue.issue_key}, self.issue_keys(self.get(uris[0])))
+        self.get(uris[1])
+
+        issue.project = self.other_project
+        issue.save()
+        self.assertEqual(set(), self.issue_keys(self.assertNotCached(uris[0])))
+        self.assertEqual({issue.issue_key}, self.issue_keys(self.assertNotCached(uris[1])))
+
+    def test_new_project(self):
+        uri = "/rest/issues/?projects=NEW"
+        self.assertEqual(set(), self.issue_keys(self.assertNotCached(uri)))
+
+        project = Project(name="New Project", issue_key="NEW")
+        project.save()
+        issue = self.generate_issue(project=project, components=[], affects_versions=[], fix_versions=[])
+        self.assertEqual({issue.issue_key}, self.issue_keys(self.assertNotCached(uri)))
+
+    def test_bulk_write(self):
+        issue = self.generate_issue()
+        uri = "/rest/issues/?projects=TESTPROJECT"
+        self.get(uri)
+
+        IssueBulkWriter(user=self.user).write([
+            (None, {"project": self.project.pk, "summary": "Bulk", "issue_type": issue.issue_type, "priority": issue.priority}),
+        ])
+        self.assertEqual(2, len(self.issue_keys(self.assertNotCached(uri))))
+
+    @override_settings(GUMSHOE_ISSUE_LIST_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.generate_issue()
+        self.get("/rest/issues/")
+        with self.assertNumQueries(7):
+            self.get("/rest/issues/")
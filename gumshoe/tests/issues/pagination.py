@@ -0,0 +1,74 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase as TestCaseBase
+from django.test.utils import CaptureQueriesContext
+
+from gumshoe.models import Issue
+from gumshoe.pagination import KeysetPagination
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+@mock.patch.object(KeysetPagination, "page_size", 3)
+class IssueCursorPaginationTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+        for priority in ["MIN", "BLK", "MAJ", "MIN", "NP", "BLK", "MAJ"]:
+            self.generate_issue(priority=priority)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code, response.content)
+        return json.loads(response.content)
+
+    def test_walk_forward_and_back(self):
+        expected = list(Issue.objects.order_by("priority", "pk").values_list("issue_key", flat=True))
+
+        pages = []
+        pl = self.get("/rest/issues/?pagination=cursor&order_by=priority")
+        self.assertIsNone(pl["previous"])
+        pages.append([r["issueKey"] for r in pl["results"]])
+        while pl["next"]:
+            pl = self.get(pl["next"])
+            pages.append([r["issueKey"] for r in pl["results"]])
+
+        self.assertEqual([3, 3, 1], [len(page) for page in pages])
+        self.assertEqual(expected, sum(pages, []))
+
+        pl = self.get(pl["previous"])
+        self.assertEqual(pages[1], [r["issueKey"] for r in pl["results"]])
+        pl = self.get(pl["previous"])
+        self.assertEqual(pages[0], [r["issueKey"] for r in pl["results"]])
+        self.assertIsNone(pl["previous"])
+
+    def test_descending_order(self):
+        expected = list(Issue.objects.order_by("-last_updated", "pk").values_list("issue_key", flat=True))
+
+        keys = []
+        url = "/rest/issues/?pagination=cursor&order_by=-last_updated"
+        while url:
+            pl = self.get(url)
+            keys += [r["issueKey"] for r in pl["results"]]
+            url = pl["next"]
+
+        self.assertEqual(expected, keys)
+
+    def test_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            pl = self.get("/rest/issues/?pagination=cursor")
+        self.assertIsNone(pl["count"])
+        self.assertFalse(any("COUNT(" in q["sql"] for q in ctx.captured_queries))
+
+        pl = self.get("/rest/issues/?pagination=cursor&count=exact")
+        self.assertEqual(7, pl["count"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/rest/issues/?cursor=garbage")
+        self.assertEqual(404, response.status_code)
+
+    def test_nullable_ordering(self):
+        response = self.client.get("/rest/issues/?pagination=cursor&order_by=assignee")
+        self.assertEqual(400, response.status_code)
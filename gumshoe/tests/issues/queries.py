@@ -0,0 +1,177 @@
+import datetime
+import json
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase as TestCaseBase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.timezone import utc
+
+from gumshoe.lookups import LookupTable
+from gumshoe.models import Issue
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+class IssueQueryCountTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def list_query_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/rest/issues/")
+        self.assertEqual(200, response.status_code, response.content)
+        return len(ctx.captured_queries), json.loads(response.content)
+
+    def test_list_query_count_is_fixed(self):
+        self.generate_issue()
+        single_count, pl = self.list_query_count()
+        self.assertEqual(1, len(pl["results"]))
+
+        for _ in range(9):
+            self.generate_issue(assignee=self.another_user)
+        many_count, pl = self.list_query_count()
+        self.assertEqual(10, len(pl["results"]))
+
+        self.assertEqual(single_count, many_count)
+
+    def test_list_query_count(self):
+        for _ in range(5):
+            self.generate_issue()
+
+        # Warm the lookup tables.
+        self.client.get("/rest/issues/")
+
+        # session + user, count, issues with their foreign keys and one
+        # prefetch for each of the three many to many fields.
+        with override_settings(GUMSHOE_ISSUE_LIST_CACHE_TIMEOUT=0), self.assertNumQueries(7):
+            response = self.client.get("/rest/issues/")
+        self.assertEqual(200, response.status_code, response.content)
+
+        # Only session + user when the page comes from the list cache.
+        with self.assertNumQueries(2):
+            response = self.client.get("/rest/issues/")
+        self.assertEqual(200, response.status_code, response.content)
+
+    def test_retrieve_query_count(self):
+        issue = self.generate_issue()
+
+        # Warm the lookup tables.
+        self.client.get(f"/rest/issues/{issue.issue_key}/")
+
+        # session + user, the issue with its foreign keys and one prefetch
+        # for each of the three many to many fields.
+        with self.assertNumQueries(6):
+            response = self.client.get(f"/rest/issues/{issue.issue_key}/")
+        self.assertEqual(200, response.status_code, response.content)
+
+    def test_update_coalesces_timestamp_updates(self):
+        issue = self.generate_issue(components=[self.component_one], affects_versions=[self.version_one], fix_versions=[self.version_one])
+
+        request_pl = {
+            "project": issue.project.pk,
+            "issueType": issue.issue_type.short_name,
+            "summary": "New Summary",
+            "priority": issue.priority.short_name,
+            "status": issue.status,
+            "resolution": issue.resolution,
+            "components": [self.component_two.pk],
+            "affectsVersions": [self.version_two.pk],
+            "fixVersions": [self.version_two.pk],
+        }
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(f"/rest/issues/{issue.issue_key}/", json.dumps(request_pl), content_type="application/json")
+        self.assertEqual(200, response.status_code, response.content)
+
+        # One from saving the issue's own fields, one for all the relation
+        # changes together.
+        issue_updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "gumshoe_issue"')]
+        self.assertEqual(2, len(issue_updates), issue_updates)
+
+    def test_relation_change_touches_issue(self):
+        issue = self.generate_issue()
+        Issue.objects.filter(pk=issue.pk).update(last_updated=datetime.datetime(2000, 1, 1, tzinfo=utc))
+
+        self.version_two.issues.add(issue)
+
+        self.assertGreater(Issue.objects.get(pk=issue.pk).last_updated.year, 2000)
+
+    def test_admin_change_touches_issue_once(self):
+        issue = self.generate_issue(components=[self.component_one], fix_versions=[], affects_versions=[])
+        admin = User.objects.create_superuser("superuser", "superuser@example.com", "superuser")
+        self.client.force_login(admin)
+        uri = "/admin/gumshoe/issue/{0}/change/".format(issue.pk)
+
+        context = self.client.get(uri).context
+        data = {name: value for name, value in context["adminform"].form.initial.items() if value is not None}
+        data.update(
+            components=[self.component_two.pk], affects_versions=[self.version_one.pk],
+            fix_versions=[self.version_two.pk], reporter=self.user.pk, assignee=self.user.pk)
+        # The admin splits dates into a date and a time input.
+        for name in ("reported", "last_updated"):
+            value = data.pop(name)
+            data.update({name + "_0": value.strftime("%Y-%m-%d"), name + "_1": value.strftime("%H:%M:%S")})
+        for inline in context["inline_admin_formsets"]:
+            management_form = inline.formset.management_form
+            data.update((management_form.add_prefix(name), value) for name, value in management_form.initial.items())
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(uri, data)
+        self.assertEqual(302, response.status_code)
+
+        touches = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "gumshoe_issue" SET "last_updated"')]
+        self.assertEqual(1, len(touches), [q["sql"] for q in touches])
+        issue = Issue.objects.get(pk=issue.pk)
+        self.assertEqual([self.component_two], list(issue.components.all()))
+        self.assertEqual([self.version_two], list(issue.fix_versions.all()))
+
+    def test_lookup_fields_do_not_query(self):
+        issue = self.generate_issue()
+        request_pl = {
+            "project": self.project.pk,
+            "issueType": "TASK",
+            "summary": "Summary",
+            "priority": "BLK",
+            "status": "OPEN",
+            "resolution": "UNRESOLVED",
+            "components": [],
+            "affectsVersions": [],
+            "fixVersions": [],
+        }
+
+        # Warm the lookup tables.
+        self.client.get(f"/rest/issues/{issue.issue_key}/")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/rest/issues/", json.dumps(request_pl), content_type="application/json")
+            self.client.get("/rest/issues/")
+        self.assertEqual(201, response.status_code, response.content)
+
+        lookup_queries = [q for q in ctx.captured_queries if "gumshoe_priority" in q["sql"] or "gumshoe_issuetype" in q["sql"]]
+        self.assertEqual([], lookup_queries)
+        self.assertEqual("BLK", json.loads(response.content)["priority"])
+
+    @override_settings(GUMSHOE_LOOKUP_CHECK_INTERVAL=1)
+    def test_lookup_version_is_checked_per_interval(self):
+        now = [0.0]
+        priorities = LookupTable("gumshoe.priority", clock=lambda: now[0])
+        self.addCleanup(priorities.invalidate)
+        self.assertEqual("BLK", priorities.get("short_name", "BLK").short_name)
+
+        # Another process empties the table.
+        version = uuid.uuid4().hex
+        cache.set(priorities.data_key(version), [], None)
+        cache.set(priorities.version_key, version, None)
+
+        now[0] += 0.5
+        self.assertEqual("BLK", priorities.get("short_name", "BLK").short_name)
+        now[0] += 0.6
+        self.assertIsNone(priorities.get("short_name", "BLK"))
+
+        # Changes made in this process are seen at once.
+        priorities.invalidate()
+        self.assertEqual("BLK", priorities.get("short_name", "BLK").short_name)
@@ -0,0 +1,55 @@
+import json
+
+from django.test import TestCase as TestCaseBase
+
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+class IssueSearchTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def search(self, terms, **params):
+        params["terms"] = terms
+        response = self.client.get("/rest/issues/", params)
+        self.assertEqual(200, response.status_code, response.content)
+        return [r["issueKey"] for r in json.loads(response.content)["results"]]
+
+    def test_multiple_words(self):
+        issue = self.generate_issue(summary="Crash on startup", description="The login form never renders")
+        _ = self.generate_issue(summary="Crash on shutdown", description="Nothing to see here")
+
+        self.assertEqual([issue.issue_key], self.search("crash login"))
+
+    def test_prefix(self):
+        issue = self.generate_issue(summary="Renderer is too slow", description="")
+
+        self.assertEqual([issue.issue_key], self.search("rend"))
+
+    def test_comments(self):
+        issue = self.generate_issue(summary="First", description="")
+        _ = self.generate_issue(summary="Second", description="")
+        comment = self.generate_comment(issue, text="reproduced with the nightly build")
+
+        self.assertEqual([issue.issue_key], self.search("nightly"))
+
+        comment.delete()
+        self.assertEqual([], self.search("nightly"))
+
+    def test_updates(self):
+        issue = self.generate_issue(summary="Original summary", description="")
+
+        issue.summary = "Replacement summary"
+        issue.save()
+
+        self.assertEqual([], self.search("original"))
+        self.assertEqual([issue.issue_key], self.search("replacement"))
+
+    def test_ranking(self):
+        weak = self.generate_issue(summary="Unrelated", description="widget mentioned once amongst a lot of other words in a long description")
+        strong = self.generate_issue(summary="Widget widget", description="widget")
+
+        self.assertEqual([strong.issue_key, weak.issue_key], self.search("widget"))
+        self.assertEqual([weak.issue_key, strong.issue_key], self.search("widget", order_by="pk"))
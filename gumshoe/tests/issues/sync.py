@@ -0,0 +1,102 @@
+import json
+from unittest import mock
+
+from django.test import TestCase as TestCaseBase
+from django.test.utils import override_settings
+
+from gumshoe.tests.utils import IssueTestCaseBase
+from gumshoe.views import IssueViewSet
+
+
+@override_settings(GUMSHOE_SYNC_LAG=0)
+class IssueChangesTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+    CHANGES_URI = "/rest/issues/changes/"
+
+    def setUp(self):
+        self.setUpProject()
+
+    def changes(self, since=None):
+        uri = self.CHANGES_URI if since is None else f"{self.CHANGES_URI}?since={since}"
+        response = self.client.get(uri)
+        self.assertEqual(200, response.status_code, response.content)
+        return json.loads(response.content)
+
+    def changed_keys(self, changes):
+        return [issue["issueKey"] for issue in changes["issues"]]
+
+    def test_changes(self):
+        start = self.changes()
+        self.assertEqual([], start["issues"])
+        self.assertFalse(start["hasMore"])
+
+        issue = self.generate_issue()
+        other = self.generate_issue()
+        changes = self.changes(start["since"])
+        self.assertEqual([issue.issue_key, other.issue_key], self.changed_keys(changes))
+        self.assertEqual([], changes["deleted"])
+        self.assertIn("commentCount", changes["issues"][0])
+
+        self.assertEqual([], self.changes(changes["since"])["issues"])
+
+        issue.summary = "Changed"
+        issue.save()
+        changes = self.changes(changes["since"])
+        self.assertEqual([issue.issue_key], self.changed_keys(changes))
+        self.assertEqual("Changed", changes["issues"][0]["summary"])
+
+        comment = self.generate_comment(other)
+        changes = self.changes(changes["since"])
+        self.assertEqual([other.issue_key], self.changed_keys(changes))
+
+        comment_pk, issue_pk = comment.pk, issue.pk
+        comment.delete()
+        issue.delete()
+        changes = self.changes(changes["since"])
+        self.assertEqual([], changes["issues"])
+        self.assertEqual(
+            [("comment", comment_pk, other.pk, ""), ("issue", issue_pk, issue_pk, issue.issue_key)],
+            [(d["kind"], d["id"], d["issueId"], d["issueKey"]) for d in changes["deleted"]])
+
+        self.assertEqual([], self.changes(changes["since"])["deleted"])
+
+    def test_batches(self):
+        since = self.changes()["since"]
+        issues = [self.generate_issue() for _ in range(5)]
+        issues[0].delete()
+        issues[3].summary = "Changed"
+        issues[3].save()
+
+        keys = []
+        deleted = []
+        batches = 0
+        with mock.patch.object(IssueViewSet, "changes_max_items", 2):
+            while True:
+                changes = self.changes(since)
+                self.assertLessEqual(len(changes["issues"]) + len(changes["deleted"]), 2)
+                keys += self.changed_keys(changes)
+                deleted += [d["issueKey"] for d in changes["deleted"]]
+                since = changes["since"]
+                batches += 1
+                if not changes["hasMore"]:
+                    break
+
+        self.assertEqual(3, batches)
+        self.assertEqual([issues[0].issue_key], deleted)
+        self.assertEqual([issue.issue_key for issue in issues[1:3] + issues[4:] + issues[3:4]], keys)
+
+    @override_settings(GUMSHOE_SYNC_LAG=60)
+    def test_recent_changes_are_repeated(self):
+        since = self.changes()["since"]
+        issue = self.generate_issue()
+
+        changes = self.changes(since)
+        self.assertEqual([issue.issue_key], self.changed_keys(changes))
+        # A change inside the lag could still be followed by one committed
+        # with an earlier timestamp, so it comes back.
+        self.assertEqual([issue.issue_key], self.changed_keys(self.changes(changes["since"])))
+
+    def test_invalid_mark(self):
+        response = self.client.get(self.CHANGES_URI + "?since=nonsense")
+        self.assertEqual(400, response.status_code)
+        self.assertIn("since", json.loads(response.content))
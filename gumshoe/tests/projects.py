@@ -0,0 +1,46 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase as TestCaseBase
+
+from gumshoe.models import Component, Priority, Project, Version
+
+
+class ProjectsApiTests(TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        User.objects.create_user("testuser", "", "password")
+        self.client.login(username="testuser", password="password")
+
+        for n in range(3):
+            project = Project(name="Project {0}".format(n), issue_key="P{0}".format(n))
+            project.save()
+            Component(name="Component", project=project).save()
+            Version(name="Version 1", project=project).save()
+            Version(name="Version 2", project=project).save()
+
+    def test_list_query_count(self):
+        # Warm the lookup table caches.
+        self.client.get("/rest/projects/")
+
+        # session + user, count, projects, components and versions.
+        with self.assertNumQueries(6):
+            response = self.client.get("/rest/projects/")
+        self.assertEqual(200, response.status_code, response.content)
+
+        pl = json.loads(response.content)
+        self.assertEqual(3, len(pl["results"]))
+        self.assertEqual(2, len(pl["results"][0]["versions"]))
+        self.assertEqual(["BLK", "MAJ", "MIN", "NP"], [p["shortName"] for p in pl["results"][0]["priorities"]])
+        self.assertEqual(["BUG", "FRQ", "TASK"], pl["results"][0]["issueTypes"])
+
+    def test_priority_changes_are_picked_up(self):
+        self.client.get("/rest/projects/")
+
+        Priority(name="Trivial", short_name="TRV", weight=1).save()
+        Priority.objects.filter(short_name="BLK").delete()
+
+        response = self.client.get("/rest/projects/")
+        pl = json.loads(response.content)
+        self.assertEqual(["MAJ", "MIN", "NP", "TRV"], [p["shortName"] for p in pl["results"][0]["priorities"]])
@@ -0,0 +1,197 @@
+import collections
+import datetime
+import decimal
+import io
+import json
+import unittest
+import uuid
+from unittest import mock
+
+from django.test import TestCase as TestCaseBase
+from django.test.utils import override_settings
+from django.utils.timezone import utc
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+from gumshoe import encoders
+from gumshoe.management.commands.benchmark_renderers import recursive_transform
+from gumshoe.models import Comment
+from gumshoe.renderers import (
+    CaseConvertingJSONParser, CaseConvertingJSONRenderer, camel_case_to_snake_case, do_transform,
+    snake_case_to_camel_case,
+)
+from gumshoe.serializers import CamelCaseSerializerMixin
+from gumshoe.tests.utils import IssueTestCaseBase
+
+
+class CaseConversionTests(TestCaseBase):
+    def test_transform(self):
+        data = collections.OrderedDict([
+            ("issue_key", "P-1"),
+            ("fix_versions", [{"version_id": 1, "name": "1.0"}, {"version_id": 2}]),
+            ("assignee", {"user_name": "me", "groups": ("a_b", )}),
+            ("tags", iter(["x_y"])),
+            ("milestone", None),
+            ("ratio", 1.5),
+        ])
+
+        expected = {
+            "issueKey": "P-1",
+            "fixVersions": [{"versionId": 1, "name": "1.0"}, {"versionId": 2}],
+            "assignee": {"userName": "me", "groups": ["a_b"]},
+            "tags": ["x_y"],
+            "milestone": None,
+            "ratio": 1.5,
+        }
+        result = do_transform(data, snake_case_to_camel_case)
+        self.assertEqual(expected, result)
+        self.assertEqual(list(expected), list(result))
+
+        self.assertEqual(
+            {"issue_key": "P-1", "fix_versions": [{"version_id": 2}]},
+            do_transform({"issueKey": "P-1", "fixVersions": [{"versionId": 2}]}, camel_case_to_snake_case))
+
+    def test_scalars(self):
+        self.assertEqual("a_b", do_transform("a_b", snake_case_to_camel_case))
+        self.assertEqual(3, do_transform(3, snake_case_to_camel_case))
+
+    def test_deep_nesting(self):
+        data = {"child_node": None}
+        for _ in range(5000):
+            data = {"child_node": [data]}
+
+        result = do_transform(data, snake_case_to_camel_case)
+        for _ in range(5000):
+            result = result["childNode"][0]
+        self.assertEqual({"childNode": None}, result)
+
+
+class IssuePageTransformTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def test_matches_recursive_transform(self):
+        for _ in range(50):
+            self.generate_issue(components=[self.component_one, self.component_two])
+        data = self.client.get("/rest/issues/").data
+        self.assertEqual(50, len(data["results"]))
+
+        expected = recursive_transform(data, snake_case_to_camel_case.__wrapped__)
+        self.assertEqual(expected, do_transform(data, snake_case_to_camel_case))
+        self.assertEqual(expected, json.loads(CaseConvertingJSONRenderer().render(data)))
+
+
+class SerializerCaseTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def test_wire_format_is_unchanged(self):
+        issue = self.generate_issue(components=[self.component_one, self.component_two])
+        self.generate_issue(milestone=None, assignee=self.another_user)
+        timestamp = datetime.datetime(2020, 1, 1, tzinfo=utc)
+        Comment(content=issue, author=self.user, text="Comment", created=timestamp, updated=timestamp).save(update_timestamps=False)
+
+        uris = [
+            "/rest/issues/",
+            f"/rest/issues/{issue.issue_key}/",
+            f"/rest/issues/{issue.issue_key}/comments/",
+            "/rest/projects/",
+            "/rest/issues/export/",
+        ]
+        responses = [self.client.get(uri).getvalue() for uri in uris]
+
+        def snake_case_representation(serializer, instance):
+            return serializers.Serializer.to_representation(serializer, instance)
+
+        with mock.patch.object(CamelCaseSerializerMixin, "to_representation", snake_case_representation):
+            expected = [self.client.get(uri).getvalue() for uri in uris]
+
+        for uri, content, expected_content in zip(uris, responses, expected):
+            self.assertEqual(expected_content, content, uri)
+        self.assertIn(b'"issueKey"', responses[0])
+
+
+class StdlibJSONBackendTests(TestCaseBase):
+    def test_dumps_like_the_renderer(self):
+        data = {
+            "createdAt": datetime.datetime(2020, 1, 2, 3, 4, 5, 678000, tzinfo=utc),
+            "amount": decimal.Decimal("1.50"),
+            "big": 2 ** 70,
+            "text": "Caf\u00e9 \\ / \"quoted\"",
+            "tags": ("a", "b"),
+        }
+        # Not accelerated, so the renderer doesn't call the backend.
+        with override_settings(GUMSHOE_JSON_BACKEND="gumshoe.encoders.JSONBackend"):
+            expected = CaseConvertingJSONRenderer().render(data)
+        self.assertEqual(expected, encoders.JSONBackend().dumps(data))
+        self.assertEqual(data["text"], encoders.JSONBackend().loads(expected)["text"])
+
+        with self.assertRaises(ValueError):
+            encoders.JSONBackend().dumps({"ratio": float("nan")})
+
+
+STDLIB_JSON_BACKEND = "gumshoe.encoders.JSONBackend"
+ACCELERATED_JSON_BACKENDS = [
+    path for path, module in (("gumshoe.encoders.OrjsonBackend", encoders.orjson), ("gumshoe.encoders.UjsonBackend", encoders.ujson))
+    if module is not None
+]
+
+
+@unittest.skipUnless(ACCELERATED_JSON_BACKENDS, "No accelerated JSON library installed.")
+class JSONBackendParityTests(IssueTestCaseBase, TestCaseBase):
+    fixtures = ["initial_data.json"]
+
+    def setUp(self):
+        self.setUpProject()
+
+    def render_with(self, backend_path, data, accepted_media_type=None):
+        with override_settings(GUMSHOE_JSON_BACKEND=backend_path):
+            return CaseConvertingJSONRenderer().render(data, accepted_media_type)
+
+    def parse_with(self, backend_path, content):
+        with override_settings(GUMSHOE_JSON_BACKEND=backend_path):
+            return CaseConvertingJSONParser().parse(io.BytesIO(content))
+
+    def test_api_responses(self):
+        issue = self.generate_issue(components=[self.component_one, self.component_two], summary="Caf\u00e9 \u2028 \"quoted\" </script>")
+        timestamp = datetime.datetime(2020, 1, 1, tzinfo=utc)
+        Comment(content=issue, author=self.user, text="\U0001F41B bug", created=timestamp, updated=timestamp).save(update_timestamps=False)
+
+        uris = ["/rest/issues/", f"/rest/issues/{issue.issue_key}/", f"/rest/issues/{issue.issue_key}/comments/", "/rest/projects/"]
+        for backend_path in ACCELERATED_JSON_BACKENDS:
+            for uri in uris:
+                with override_settings(GUMSHOE_JSON_BACKEND=STDLIB_JSON_BACKEND):
+                    expected = self.client.get(uri).content
+                with override_settings(GUMSHOE_JSON_BACKEND=backend_path):
+                    content = self.client.get(uri).content
+                self.assertEqual(expected, content, (backend_path, uri))
+
+    def test_other_values(self):
+        data = {
+            "created_at": datetime.datetime(2020, 1, 2, 3, 4, 5, 678000, tzinfo=utc),
+            "day": datetime.date(2020, 1, 2),
+            "amount": decimal.Decimal("1.50"),
+            "token": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "big": 2 ** 70,
+            "text": "line\u2029separator \\ /",
+        }
+        expected = self.render_with(STDLIB_JSON_BACKEND, data)
+        for backend_path in ACCELERATED_JSON_BACKENDS:
+            self.assertEqual(expected, self.render_with(backend_path, data), backend_path)
+            self.assertEqual(
+                self.render_with(STDLIB_JSON_BACKEND, data, "application/json; indent=4"),
+                self.render_with(backend_path, data, "application/json; indent=4"))
+
+    def test_parse(self):
+        content = '{"issueKey": "P-1", "fixVersions": [1, 2], "big": 1180591620717411303424, "text": "Caf\u00e9"}'.encode()
+        expected = self.parse_with(STDLIB_JSON_BACKEND, content)
+        self.assertEqual("P-1", expected["issue_key"])
+        for backend_path in ACCELERATED_JSON_BACKENDS:
+            self.assertEqual(expected, self.parse_with(backend_path, content), backend_path)
+            for invalid in (b"{", b'{"a": NaN}'):
+                with self.assertRaises(ParseError):
+                    self.parse_with(backend_path, invalid)
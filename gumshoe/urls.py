@@ -2,6 +2,7 @@ from django.conf import settings
 from django.urls import re_path, include
 
 import gumshoe.views
+from gumshoe.asyncviews import async_read_view
 
 
 rest_urlpatterns = [
@@ -12,6 +13,26 @@ rest_urlpatterns = [
     re_path(r'^versions/(?P<pk>[0-9]+)$', gumshoe.views.VersionDetailView.as_view(), name='versions_detail'),
     re_path(r'^issues/(?P<issue_key>[-A-Za-z0-9_]+)/comments/$', gumshoe.views.CommentCollectionView.as_view(), name="comment_collection"),
     re_path(r'^comments/(?P<pk>[0-9]+)$', gumshoe.views.CommentRetrieveUpdateDestroyView.as_view(), name="comment-detail"),
+    re_path(r'^events/$', gumshoe.views.events_view, name="events"),
+]
+
+# The read-heavy endpoints, as the ASGI entry point serves them.
+async_read_viewsets = (gumshoe.views.IssueViewSet, gumshoe.views.ProjectViewSet, gumshoe.views.UsersViewSet,
+                       gumshoe.views.MilestoneViewSet)
+
+
+def async_read_pattern(pattern):
+    # The router's other routes stay, in order, so e.g. issues/changes/ isn't
+    # taken for an issue key.
+    if getattr(pattern.callback, "cls", None) not in async_read_viewsets or \
+            pattern.callback.actions.get("get") not in ("list", "retrieve"):
+        return pattern
+    return re_path(pattern.pattern.regex.pattern, async_read_view(pattern.callback), name=pattern.name)
+
+
+async_rest_urlpatterns = [async_read_pattern(pattern) for pattern in gumshoe.views.router.urls] + [
+    re_path(r'^issues/(?P<issue_key>[-A-Za-z0-9_]+)/comments/$',
+            async_read_view(gumshoe.views.CommentCollectionView.as_view()), name="comment_collection"),
 ]
 
 page_urlpatterns = [
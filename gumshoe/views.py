@@ -1,21 +1,34 @@
+from asgiref.sync import sync_to_async
 from django.contrib import auth
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.http.response import HttpResponseRedirect, HttpResponse, Http404
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import prefetch_related_objects
+from django.http.response import HttpResponseRedirect, HttpResponse, Http404, StreamingHttpResponse
 from django.shortcuts import render
 from django.urls import reverse
 
 from rest_framework import generics, viewsets, routers
 from rest_framework.decorators import api_view, action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 
+from gumshoe.bulk import BulkItemError, IssueBulkWriter
+from gumshoe.conditional import not_modified, request_variant, set_validators, weak_etag
+from gumshoe.events import event_stream, get_event_backend
+from gumshoe.export import ISSUE_EXPORT_FORMATS
+from gumshoe.filters import filter_issues, parse_issue_filters
+from gumshoe.listcache import issue_list_cache_key, issue_list_cache_timeout
 from gumshoe.serializers import VersionSerializer, ComponentSerializer, ProjectSerializer, MilestoneSerializer, \
-    CommentSerializer, UserSerializer, IssueSerializer
-from gumshoe.models import Project, Issue, Component, Version, Milestone, Comment
+    CommentSerializer, UserSerializer, IssueSerializer, TombstoneSerializer
+from gumshoe.models import Project, Issue, Component, Version, Milestone, Comment, batched_issue_touches
+from gumshoe.pagination import KeysetPagination
+from gumshoe.querysets import eager_load
+from gumshoe.sync import changes_since, decode_mark, encode_mark, present_mark
 
 
 #####################################
@@ -128,28 +141,67 @@ def pages_view(request):
 
 
 class ModelPaginationSerializer(object):
+    """
+    Serializes one page of the queryset.
+
+    With ``version_fields``, the response carries a weak ETag built from the
+    page's links, the total count and each row's primary key and versions, so
+    an unchanged page is answered with a 304 before the page's prefetches run
+    or anything is serialized.  No Last-Modified header is sent: a date alone
+    can't tell when a row leaves the page.
+    """
     serializer_class = None
+    version_fields = ()
 
     def __init__(self, request, queryset):
         self.queryset = queryset
         self.request = request
 
+    def get_paginator(self):
+        if self.request.GET.get("pagination") == "cursor" or "cursor" in self.request.GET:
+            return KeysetPagination()
+        return PageNumberPagination()
+
+    def get_etag(self, paginator, page):
+        if isinstance(paginator, PageNumberPagination):
+            count = paginator.page.paginator.count
+        else:
+            count = paginator.count
+        rows = [(obj.pk, ) + tuple(getattr(obj, field) for field in self.version_fields) for obj in page]
+        return weak_etag(count, paginator.get_next_link(), paginator.get_previous_link(), rows,
+                         request_variant(self.request))
+
     def get_paginated_response(self):
-        paginator = PageNumberPagination()
+        paginator = self.get_paginator()
+
+        prefetches = self.queryset._prefetch_related_lookups
+        page = paginator.paginate_queryset(self.queryset.prefetch_related(None), self.request)
 
-        page = paginator.paginate_queryset(self.queryset, self.request)
+        etag = None
+        if self.version_fields:
+            etag = self.get_etag(paginator, page)
+            response = not_modified(self.request, etag)
+            if response is not None:
+                return response
 
+        prefetch_related_objects(page, *prefetches)
         model_serializer = self.serializer_class(page, many=True, context={"request": self.request})
 
-        return paginator.get_paginated_response(model_serializer.data)
+        response = paginator.get_paginated_response(model_serializer.data)
+        if etag is not None:
+            set_validators(response, etag)
+        return response
 
 
 class IssuePaginationSerializer(ModelPaginationSerializer):
     serializer_class = IssueSerializer
+    # Comments change the count without touching last_updated.
+    version_fields = ("last_updated", "comment_count")
 
 
-def get_pk_list(pk_str):
-    return [int(pk) for pk in pk_str.split(",")]
+class CommentPaginationSerializer(ModelPaginationSerializer):
+    serializer_class = CommentSerializer
+    version_fields = ("updated", )
 
 
 class IssueViewSet(viewsets.ViewSet):
@@ -157,100 +209,174 @@ class IssueViewSet(viewsets.ViewSet):
     serializer_class = IssueSerializer
     base_name = "issues"
     lookup_field = "issue_key"
+    bulk_max_items = 1000
+    export_chunk_size = 500
+    changes_max_items = 500
+
+    def filter_issues(self, request):
+        """
+        Builds the issue queryset for the filter and ordering parameters used
+        by the issue list.
+        """
+        return filter_issues(parse_issue_filters(request.GET))
 
     def list(self, request):
-        projects_param = request.GET.get("projects")
-        statuses_param = request.GET.get("statuses")
-        fix_versions_param = request.GET.get("fix_versions")
-        affects_versions_param = request.GET.get("affects_versions")
-        assignees_param = request.GET.get("assignees")
-        milestones_param = request.GET.get("milestones")
-        terms_param = request.GET.get("terms")
-
-        order_by_param = request.GET.get("order_by")
-
-        no_affects_version = False
-        no_fix_version = False
-        unassigned = False
-
-        q = {}
-        if projects_param:
-            q["project__issue_key__in"] = projects_param.split(",")
-        if statuses_param:
-            q["status__in"] = statuses_param.split(",")
-        if fix_versions_param:
-            fix_version_pks = get_pk_list(fix_versions_param)
-            if -1 in fix_version_pks:
-                no_fix_version = True
-                fix_version_pks.remove(-1)
-            q["fix_versions__pk__in"] = fix_version_pks
-        if affects_versions_param:
-            affects_version_pks = get_pk_list(affects_versions_param)
-            if -1 in affects_version_pks:
-                no_affects_version = True
-                affects_version_pks.remove(-1)
-            q["affects_versions__pk__in"] = affects_version_pks
-        if assignees_param:
-            assignee_pks = get_pk_list(assignees_param)
-            if -1 in assignee_pks:
-                unassigned = True
-                assignee_pks.remove(-1)
-            q["assignee__pk__in"] = assignee_pks
-        if milestones_param:
-            milestone_pks = get_pk_list(milestones_param)
-            if -1 in milestone_pks:
-                no_milestone = True
-                milestone_pks.remove(-1)
-            q["milestone__pk__in"] = milestone_pks
-
-        query = Q(**q)
-        if terms_param:
-            query = query & (Q(summary__contains=terms_param) | Q(description__contains=terms_param) | Q(issue_key=terms_param))
-
-        qs = Issue.objects.filter(query)
-        if no_fix_version:
-            qs |= Issue.objects.filter(fix_versions=None)
-        if no_affects_version:
-            qs |= Issue.objects.filter(affects_version=None)
-        if unassigned:
-            qs |= Issue.objects.filter(assignee=None)
-
-        if order_by_param is not None:
-            order_by_fields = order_by_param.split(",")
-            qs = qs.order_by(*order_by_fields)
+        """
+        Lists the issues matching the filters.  Pages are kept in the Django
+        cache, with their ETag, until a write to one of the issues they can
+        contain.
+        """
+        spec = parse_issue_filters(request.GET)
+        cache_key = issue_list_cache_key(request, spec)
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                etag, data = cached
+                response = not_modified(request, etag)
+                if response is not None:
+                    return response
+                return set_validators(Response(data), etag)
+
+        qs = eager_load(filter_issues(spec), self.serializer_class)
 
         serializer = IssuePaginationSerializer(request, qs)
-        return serializer.get_paginated_response()
+        response = serializer.get_paginated_response()
+        if cache_key is not None and response.status_code == 200:
+            cache.set(cache_key, (response["ETag"], response.data), issue_list_cache_timeout())
+        return response
 
     def create(self, request):
         serializer = self.serializer_class(data=request.data, context={"request": request})
         if serializer.is_valid():
-            issue = serializer.save()
+            with batched_issue_touches():
+                issue = serializer.save()
 
-            issue.reporter = request.user
-            issue.assignee = issue.assignee or issue.reporter
-            issue.save()
+                issue.reporter = request.user
+                issue.assignee = issue.assignee or issue.reporter
+                issue.save()
 
-            if hasattr(issue, "components_detached"):
-                issue.components.set(issue.components_detached)
-            if hasattr(issue, "affects_versions_detached"):
-                issue.affects_versions.set(issue.affects_versions_detached)
-            if hasattr(issue, "fix_versions_detached"):
-                issue.fix_versions.set(issue.fix_versions_detached)
+                if hasattr(issue, "components_detached"):
+                    issue.components.set(issue.components_detached)
+                if hasattr(issue, "affects_versions_detached"):
+                    issue.affects_versions.set(issue.affects_versions_detached)
+                if hasattr(issue, "fix_versions_detached"):
+                    issue.fix_versions.set(issue.fix_versions_detached)
 
             response_serializer = self.serializer_class(issue, context={"request": request})
             return Response(response_serializer.data, status=201)
 
         return Response(serializer.errors, status=400)
 
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Streams every issue matching the issue list filters, as newline
+        delimited JSON or, with ``output=csv``, as CSV.
+        """
+        output = request.GET.get("output", "ndjson")
+        if output not in ISSUE_EXPORT_FORMATS:
+            return Response({"output": [f"Expected one of {', '.join(ISSUE_EXPORT_FORMATS)}."]}, status=400)
+
+        qs = eager_load(self.filter_issues(request), self.serializer_class)
+        rows = (self.serializer_class(issue, context={"request": request}).data
+                for issue in qs.iterator(chunk_size=self.export_chunk_size))
+
+        content_type, exporter = ISSUE_EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(exporter(rows), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="issues.{output}"'
+        return response
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        """
+        Returns the issues changed, directly or through their comments, and
+        the issues and comments deleted after the ``since`` high-water mark,
+        along with the mark to pass next time.  ``hasMore`` is set when the
+        changes didn't fit in one response.
+
+        Without ``since`` only the current mark is returned: take it before
+        listing the issues, then poll with it.  A change can be returned more
+        than once.
+        """
+        since = request.GET.get("since")
+        if not since:
+            return Response({"issues": [], "deleted": [], "since": encode_mark(present_mark()), "has_more": False})
+
+        issues, tombstones, mark, has_more = changes_since(
+            decode_mark(since), self.changes_max_items, eager_load(Issue.objects.all(), self.serializer_class))
+        return Response({
+            "issues": self.serializer_class(issues, many=True, context={"request": request}).data,
+            "deleted": TombstoneSerializer(tombstones, many=True).data,
+            "since": encode_mark(mark),
+            "has_more": has_more,
+        })
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Creates and updates a list of issues in one transaction.  Items with an
+        ``issueKey`` update that issue, the rest are created.  The response
+        has one entry per item with its status and either the issue or the
+        validation errors.
+        """
+        if not isinstance(request.data, list):
+            return Response({"non_field_errors": ["Expected a list of issues."]}, status=400)
+        if len(request.data) > self.bulk_max_items:
+            return Response({"non_field_errors": [f"No more than {self.bulk_max_items} issues per request."]}, status=400)
+
+        issue_keys = [item.get("issue_key") for item in request.data if isinstance(item, dict) and item.get("issue_key")]
+        existing = {issue.issue_key: issue for issue in Issue.objects.filter(issue_key__in=issue_keys)}
+
+        validator = self.serializer_class(many=True, context={"request": request}).child
+        results = [None] * len(request.data)
+        items = []
+        item_indexes = []
+        for index, data in enumerate(request.data):
+            issue = None
+            if isinstance(data, dict) and data.get("issue_key"):
+                issue = existing.get(data["issue_key"])
+                if issue is None:
+                    results[index] = {"status": 404, "errors": {"issue_key": ["Issue not found."]}}
+                    continue
+            try:
+                attrs = validator.run_validation(data)
+            except ValidationError as e:
+                results[index] = {"status": 400, "errors": e.detail}
+                continue
+            items.append((issue, attrs))
+            item_indexes.append((index, 201 if issue is None else 200))
+
+        written = IssueBulkWriter(user=request.user).write(items)
+
+        saved_pks = [issue.pk for issue in written if isinstance(issue, Issue)]
+        saved = eager_load(Issue.objects.filter(pk__in=saved_pks), self.serializer_class).in_bulk()
+        for (index, status), issue in zip(item_indexes, written):
+            if isinstance(issue, BulkItemError):
+                results[index] = {"status": 400, "errors": issue.errors}
+            else:
+                results[index] = {"status": status, "issue": self.serializer_class(saved[issue.pk], context={"request": request}).data}
+
+        return Response(results, status=200)
+
     def retrieve(self, request, issue_key=None):
+        qs = eager_load(Issue.objects.all(), self.serializer_class)
         try:
-            issue = Issue.objects.get(issue_key=issue_key)
+            # The many to many fields are only fetched if the client's copy is
+            # out of date.
+            issue = qs.prefetch_related(None).get(issue_key=issue_key)
         except Issue.DoesNotExist:
             raise Http404
 
+        # No Last-Modified header is sent: deleting a comment changes the
+        # issue's comment count without leaving a newer date behind.
+        etag = weak_etag(issue.pk, issue.last_updated, issue.comment_count, request_variant(request))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        prefetch_related_objects([issue], *qs._prefetch_related_lookups)
         serializer = self.serializer_class(issue, context={"request": request})
-        return Response(serializer.data, status=200)
+        return set_validators(Response(serializer.data, status=200), etag)
 
     def update(self, request, issue_key=None):
         try:
@@ -260,16 +386,16 @@ class IssueViewSet(viewsets.ViewSet):
 
         serializer = self.serializer_class(issue, data=request.data, context={"request": request})
         if serializer.is_valid():
-            issue_detached = serializer.save()
+            with batched_issue_touches():
+                issue_detached = serializer.save()
 
-            if hasattr(issue_detached, "components_detached"):
-                issue.components.set(issue_detached.components_detached)
-            if hasattr(issue_detached, "affects_versions_detached"):
-                issue.affects_versions.set(issue_detached.affects_versions_detached)
-            if hasattr(issue_detached, "fix_versions_detached"):
-                issue.fix_versions.set(issue_detached.fix_versions_detached)
+                if hasattr(issue_detached, "components_detached"):
+                    issue.components.set(issue_detached.components_detached)
+                if hasattr(issue_detached, "affects_versions_detached"):
+                    issue.affects_versions.set(issue_detached.affects_versions_detached)
+                if hasattr(issue_detached, "fix_versions_detached"):
+                    issue.fix_versions.set(issue_detached.fix_versions_detached)
 
-            issue.save()
             return Response(self.serializer_class(issue, context={"request": request}).data, status=200)
         return Response(serializer.errors, status=400)
 
@@ -285,10 +411,22 @@ class CommentCollectionView(generics.ListCreateAPIView):
 
         if issue_key:
             issue = self.get_issue(issue_key)
-            return issue.comments.all()
+            # Oldest first, with the primary key breaking ties so cursor
+            # pages are stable.
+            qs = Comment.objects.filter(issue=issue).order_by("created", "pk")
+            return eager_load(qs, self.serializer_class)
 
         return Comment.objects.none()
 
+    def list(self, request, *args, **kwargs):
+        """
+        Lists the issue's comments, oldest first, by page or, with
+        ``pagination=cursor``, by cursor.  Unchanged pages are answered with a
+        304.
+        """
+        serializer = CommentPaginationSerializer(request, self.get_queryset())
+        return serializer.get_paginated_response()
+
     def perform_create(self, serializer):
         # The issue is required for creating the comment and is NOT available
         # to the serializer, so we mimic what the serializer would do here.
@@ -326,6 +464,9 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ProjectSerializer
     base_name = "projects"
 
+    def get_queryset(self):
+        return eager_load(super(ProjectViewSet, self).get_queryset(), self.serializer_class)
+
 
 class UsersViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
@@ -339,6 +480,42 @@ class MilestoneViewSet(viewsets.ReadOnlyModelViewSet):
     base_name = "milestones"
 
 
+#####################################
+#  Event stream
+#####################################
+
+async def events_view(request):
+    """
+    Streams the issue and comment changes as server-sent events, optionally
+    only those of the comma separated ``issues`` ids.  Each event names what
+    changed for the client to refetch; after reconnecting, the client catches
+    up on what it missed with the changes endpoint.
+
+    A stream holds its connection open, which only an ASGI server can afford.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("The event stream is only served by gumshoe.standalone.asgi.",
+                            status=501, content_type="text/plain")
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return HttpResponse(status=403)
+
+    issue_ids = None
+    if request.GET.get("issues"):
+        try:
+            issue_ids = {int(pk) for pk in request.GET["issues"].split(",") if pk}
+        except ValueError:
+            return HttpResponse("Expected a comma separated list of ids.", status=400, content_type="text/plain")
+
+    backend = get_event_backend()
+    backend.start()
+    response = StreamingHttpResponse(
+        event_stream(backend.broker, issue_ids), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Keeps nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 router = routers.DefaultRouter()
 router.register(r'projects', ProjectViewSet)
 router.register(r'issues', IssueViewSet)
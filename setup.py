@@ -46,10 +46,16 @@ setup(
             'gumshoe-init=gumshoe.standalone.commands:gumshoe_init_standalone',
         ]
     },
+    python_requires='>=3.8',
     install_requires=[
         'pytz',
-        'Django==2.1.4',
-        'djangorestframework==3.9.0',
+        'Django>=4.2,<5',
+        'djangorestframework>=3.14',
     ],
+    extras_require={
+        'orjson': ['orjson>=3'],
+        'ujson': ['ujson>=5.2'],
+        'redis': ['redis>=3'],
+    },
     classifiers=CLASSIFIERS
 )